@@ -0,0 +1,82 @@
+"""
+Memory held by token transfers as models, records, dicts and a ColumnBatch, and
+time to total the amount received by each address.
+
+Run with: python -m benchmarks.bench_columnar [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import time
+import tracemalloc
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+
+from flare_explorer.columnar import ColumnBatch
+from flare_explorer.serialization import build_many
+from flare_explorer.token_transfers import TokenTransfer
+
+
+def transfer_node(number: int) -> dict[str, Any]:
+    transaction_hash = f"0x{number:064x}"
+    local_id = f'{{"log_index":{number % 4},"transaction_hash":"{transaction_hash}"}}'
+    return {
+        "amount": str(10**21 + number * 7919),
+        "blockNumber": 4_000_000 + number // 3,
+        "fromAddressHash": f"0x{number % 997:040x}",
+        "id": base64.b64encode(f"TokenTransfer:{local_id}".encode()).decode(),
+        "logIndex": number % 4,
+        "toAddressHash": f"0x{number % 1009:040x}",
+        "tokenContractAddressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+        "tokenId": None,
+        "transactionHash": transaction_hash,
+    }
+
+
+def measure(build: Callable[[], Any]) -> tuple[Any, float]:
+    tracemalloc.start()
+    try:
+        rows = build()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, held
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def nodes() -> list[dict[str, Any]]:
+        return [transfer_node(i) for i in range(args.rows)]
+
+    # rows are built from freshly decoded nodes, which are then freed, so only
+    # the memory the rows keep is counted
+    builds: dict[str, Callable[[], Any]] = {
+        "dict": nodes,
+        "model": lambda: build_many(TokenTransfer, nodes(), "model"),
+        "record": lambda: build_many(TokenTransfer, nodes(), "record"),
+        "batch": lambda: ColumnBatch(TokenTransfer, nodes()),
+    }
+    for name, build in builds.items():
+        rows, held = measure(build)
+        print(f"{name:<7} {held / args.rows:7.1f} bytes/row")
+    batch = rows
+
+    models = build_many(TokenTransfer, nodes(), "model")
+    start = time.perf_counter()
+    totals: dict[str, Decimal] = {}
+    for row in models:
+        totals[row.toAddressHash] = totals.get(row.toAddressHash, 0) + row.amount
+    print(f"sum by address, models {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    assert batch.sum_by("amount", by="toAddressHash") == totals
+    print(f"sum by address, batch  {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
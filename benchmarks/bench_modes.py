@@ -0,0 +1,78 @@
+"""
+Time to turn a page of synthetic transactions into rows in each output mode.
+
+Run with: python -m benchmarks.bench_modes [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any
+
+from flare_explorer.serialization import OutputMode
+from flare_explorer.transaction import Transaction, _parse_transactions_from_address
+
+MODES: tuple[OutputMode, ...] = ("model", "record", "dict")
+
+
+def synthetic_response(rows: int) -> dict[str, Any]:
+    edges = [
+        {
+            "node": {
+                "blockNumber": 4683168 + i,
+                "createdContractAddressHash": None,
+                "cumulativeGasUsed": "110685",
+                "error": None,
+                "fromAddressHash": f"0x{i:040x}",
+                "gas": "121753",
+                "gasPrice": "156276191310",
+                "gasUsed": "110685",
+                "hash": f"0x{i:064x}",
+                "id": f"id_{i}",
+                "index": i % 50,
+                "input": "0xa9059cbb" + "00" * 64,
+                "nonce": str(i),
+                "r": "39522226358337787787768383574627823049557049566410376524577452836117093245834",
+                "s": "2780640716089883124618015225098585498717052003002386545981005099001839286108",
+                "status": "OK",
+                "toAddressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+                "v": "64",
+                "value": str(i * 10**18),
+            }
+        }
+        for i in range(rows)
+    ]
+    return {
+        "address": {
+            "transactions": {
+                "edges": edges,
+                "pageInfo": {
+                    "endCursor": None,
+                    "hasNextPage": False,
+                    "hasPreviousPage": False,
+                    "startCursor": None,
+                },
+            }
+        }
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    response = synthetic_response(args.rows)
+    for mode in MODES:
+        start = time.perf_counter()
+        _parse_transactions_from_address(response, Transaction, mode)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:<7} {elapsed * 1000:9.1f} ms"
+            f"   {elapsed / args.rows * 1e6:7.3f} us/row"
+        )
+
+
+if __name__ == "__main__":
+    main()
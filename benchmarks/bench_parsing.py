@@ -0,0 +1,41 @@
+"""
+Time to prepare the internal transactions query for sending, parsing the query
+str on every call versus re-using the document parsed at import. The transport
+prints the document back to a str before sending in both cases.
+
+Run with: python -m benchmarks.bench_parsing [--calls N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from gql import gql
+from graphql import print_ast
+
+from flare_explorer.transaction import _INTERNAL_TRANSACTIONS_QUERY
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1_000)
+    args = parser.parse_args()
+
+    query = print_ast(_INTERNAL_TRANSACTIONS_QUERY)
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        print_ast(gql(query))
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        print_ast(_INTERNAL_TRANSACTIONS_QUERY)
+    pre_parsed = time.perf_counter() - start
+
+    print(f"parse per call {per_call / args.calls * 1e6:8.1f} us/call")
+    print(f"pre-parsed     {pre_parsed / args.calls * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-call latency of a getter with a shared pooled client vs a fresh client per call.
+
+Run with: python -m benchmarks.bench_pooling [--calls N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.mock_server import mock_graphql_server
+from flare_explorer.block import get_block
+from flare_explorer.gql_client import Client
+
+BLOCK = {
+    "consensus": True,
+    "difficulty": "1",
+    "gasLimit": "8000000",
+    "gasUsed": "85427",
+    "hash": "0x39935d7674e2f031fb69e617fc4a409960378a8953f346517a6124c26be86fee",
+    "minerHash": "0x0100000000000000000000000000000000000000",
+    "nonce": "0x0000000000000000",
+    "number": 4463469,
+    "parentHash": "0xaf474d4cf6ceaf5d1aa69b4789c3bfca337395968ccd1f9a85ca6927479cd467",
+    "size": 814,
+    "timestamp": "2023-01-22T15:54:20.000000Z",
+    "totalDifficulty": "4463469",
+}
+
+
+def respond(payload: dict[str, Any]) -> dict[str, Any]:
+    return {"data": {"block": BLOCK}}
+
+
+def measure(call: Callable[[], Any], calls: int) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings_ms = sorted(t * 1000 for t in timings)
+    print(
+        f"{name:<12} mean {statistics.mean(timings_ms):7.3f} ms"
+        f"   p50 {timings_ms[len(timings_ms) // 2]:7.3f} ms"
+        f"   p99 {timings_ms[int(len(timings_ms) * 0.99)]:7.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    with mock_graphql_server(respond) as url:
+
+        def unpooled() -> None:
+            with Client(url=url) as client:
+                get_block(1, client=client)
+
+        pooled_client = Client(url=url)
+
+        def pooled() -> None:
+            get_block(1, client=pooled_client)
+
+        # warm up both paths before timing
+        measure(unpooled, 10)
+        measure(pooled, 10)
+        report("fresh client", measure(unpooled, args.calls))
+        report("pooled", measure(pooled, args.calls))
+        pooled_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Peak memory to fetch a page of addresses with large contract bytecode, reading
+the whole response before building rows versus decoding rows as the response is
+read. The page is encoded once up front so only the client's allocations are
+traced.
+
+Run with: python -m benchmarks.bench_streaming [--code-mb N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.mock_server import mock_graphql_server
+from flare_explorer.address import get_addresses, stream_addresses
+from flare_explorer.gql_client import Client
+
+ADDRESSES = 15
+
+
+def address_node(number: int, code_bytes: int) -> dict[str, Any]:
+    return {
+        "contractCode": "0x" + "60" * code_bytes,
+        "fetchedCoinBalance": "0",
+        "fetchedCoinBalanceBlockNumber": 4497096,
+        "hash": f"0x{number:040x}",
+        "smartContract": None,
+    }
+
+
+def measure(fetch: Callable[[], int]) -> tuple[int, float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        rows = fetch()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, peak / 1024**2, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--code-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    code_bytes = int(args.code_mb * 1024**2)
+    nodes = [address_node(i, code_bytes) for i in range(ADDRESSES)]
+    body = json.dumps({"data": {"addresses": nodes}}).encode()
+    del nodes
+    hashes = [f"0x{i:040x}" for i in range(ADDRESSES)]
+    print(f"response {len(body) / 1024**2:.1f} MiB, {ADDRESSES} addresses")
+
+    with (
+        mock_graphql_server(lambda payload: body) as url,
+        Client(url=url, mode="dict") as client,
+    ):
+
+        def buffered() -> int:
+            return sum(1 for _ in get_addresses(hashes, client=client))
+
+        def streamed() -> int:
+            return sum(1 for _ in stream_addresses(hashes, client=client))
+
+        for name, fetch in ("buffered", buffered), ("streamed", streamed):
+            fetch()
+            rows, peak, elapsed = measure(fetch)
+            print(f"{name}  {rows} rows  peak {peak:6.1f} MiB  {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
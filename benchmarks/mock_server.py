@@ -0,0 +1,57 @@
+"""Minimal local GraphQL stand-in used by the benchmarks"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+Responder = Callable[[dict[str, Any]], dict[str, Any] | bytes]
+
+
+@contextmanager
+def mock_graphql_server(responder: Responder) -> Iterator[str]:
+    """
+    Serve GraphQL POSTs on localhost with HTTP/1.1 keep-alive
+    Args:
+        responder: builds the JSON body for each decoded request payload, or
+            returns it already encoded
+
+    Returns:
+        url of the running server
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:
+            length = int(self.headers["Content-Length"])
+            payload = json.loads(self.rfile.read(length))
+            response = responder(payload)
+            body = (
+                response
+                if isinstance(response, bytes)
+                else json.dumps(response).encode()
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/graphql"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,515 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel
+
+from flare_explorer.address import get_addresses_bulk
+from flare_explorer.binary import BinaryData
+from flare_explorer.exceptions import AbiDecodingError
+from flare_explorer.gql_client import Client
+from flare_explorer.serialization import Row
+from flare_explorer.transaction import InternalTransaction, Transaction
+
+_WORD = 32
+_MASK_64 = 2**64 - 1
+_KECCAK_RATE = 136
+
+
+def _rotate(lane: int, shift: int) -> int:
+    return ((lane << shift) | (lane >> (64 - shift))) & _MASK_64 if shift else lane
+
+
+def _keccak_f(lanes: list[list[int]]) -> None:
+    lfsr = 1
+    for _ in range(24):
+        # theta
+        parities = [
+            lanes[x][0] ^ lanes[x][1] ^ lanes[x][2] ^ lanes[x][3] ^ lanes[x][4]
+            for x in range(5)
+        ]
+        for x in range(5):
+            mix = parities[(x + 4) % 5] ^ _rotate(parities[(x + 1) % 5], 1)
+            for y in range(5):
+                lanes[x][y] ^= mix
+        # rho and pi
+        x, y = 1, 0
+        current = lanes[x][y]
+        for t in range(24):
+            x, y = y, (2 * x + 3 * y) % 5
+            current, lanes[x][y] = (
+                lanes[x][y],
+                _rotate(current, (t + 1) * (t + 2) // 2 % 64),
+            )
+        # chi
+        for y in range(5):
+            row = [lanes[x][y] for x in range(5)]
+            for x in range(5):
+                lanes[x][y] = row[x] ^ (~row[(x + 1) % 5] & row[(x + 2) % 5])
+        # iota
+        for j in range(7):
+            lfsr = ((lfsr << 1) ^ ((lfsr >> 7) * 0x71)) % 256
+            if lfsr & 2:
+                lanes[0][0] ^= 1 << ((1 << j) - 1)
+
+
+def keccak256(data: bytes) -> bytes:
+    """
+    Keccak-256 hash, as used for function selectors and event topics. This is
+    not hashlib's sha3_256, which pads its input differently
+    Args:
+        data: data to hash
+
+    Returns:
+        32 byte hash
+    """
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(bytes(-len(padded) % _KECCAK_RATE))
+    padded[-1] |= 0x80
+    lanes = [[0] * 5 for _ in range(5)]
+    for start in range(0, len(padded), _KECCAK_RATE):
+        block = padded[start : start + _KECCAK_RATE]
+        for i in range(_KECCAK_RATE // 8):
+            lanes[i % 5][i // 5] ^= int.from_bytes(block[8 * i : 8 * i + 8], "little")
+        _keccak_f(lanes)
+    return b"".join(
+        lanes[i % 5][i // 5].to_bytes(8, "little") for i in range(_WORD // 8)
+    )
+
+
+_ARRAY_SUFFIX = re.compile(r"\[(\d*)\]$")
+
+
+@dataclass(frozen=True)
+class _AbiType:
+    """A parsed abi type, arrays hold their element type in components"""
+
+    name: str
+    components: tuple[_AbiType, ...] = ()
+    component_names: tuple[str, ...] = ()
+    length: int | None = None
+    """Length of a fixed size array, None for a dynamic array or non array"""
+
+    @property
+    def is_array(self) -> bool:
+        return self.name.endswith("]")
+
+    @property
+    def is_dynamic(self) -> bool:
+        if self.name in ("bytes", "string") or (self.is_array and self.length is None):
+            return True
+        return any(i.is_dynamic for i in self.components)
+
+    @property
+    def head_size(self) -> int:
+        if self.is_dynamic:
+            return _WORD
+        if self.is_array:
+            return (self.length or 0) * self.components[0].head_size
+        if self.components:
+            return sum(i.head_size for i in self.components)
+        return _WORD
+
+
+def _parse_type(spec: dict[str, Any]) -> _AbiType:
+    type_name: str = spec["type"]
+    match = _ARRAY_SUFFIX.search(type_name)
+    if match:
+        element = _parse_type({**spec, "type": type_name[: match.start()]})
+        length = int(match.group(1)) if match.group(1) else None
+        return _AbiType(f"{element.name}[{match.group(1)}]", (element,), length=length)
+    if type_name == "tuple":
+        components = tuple(_parse_type(i) for i in spec.get("components", []))
+        names = tuple(
+            i.get("name") or f"arg{index}"
+            for index, i in enumerate(spec.get("components", []))
+        )
+        signature = ",".join(i.name for i in components)
+        return _AbiType(f"({signature})", components, names)
+    return _AbiType(type_name)
+
+
+def _word(data: memoryview, position: int) -> memoryview:
+    if position < 0 or position + _WORD > len(data):
+        raise AbiDecodingError(f"Data ends before the word at byte {position}")
+    return data[position : position + _WORD]
+
+
+def _offset(data: memoryview, position: int) -> int:
+    return int.from_bytes(_word(data, position), "big")
+
+
+def _decode_sequence(
+    types: Sequence[_AbiType], data: memoryview, start: int
+) -> list[Any]:
+    values = []
+    head = start
+    for abi_type in types:
+        if abi_type.is_dynamic:
+            values.append(_decode(abi_type, data, start + _offset(data, head)))
+            head += _WORD
+        else:
+            values.append(_decode(abi_type, data, head))
+            head += abi_type.head_size
+    return values
+
+
+def _decode(abi_type: _AbiType, data: memoryview, position: int) -> Any:
+    if abi_type.is_array:
+        element = abi_type.components[0]
+        length = abi_type.length
+        if length is None:
+            length = _offset(data, position)
+            position += _WORD
+        if length * min(element.head_size, _WORD) > len(data) - position:
+            raise AbiDecodingError(f"Array of {length} items is longer than the data")
+        return _decode_sequence([element] * length, data, position)
+    if abi_type.components:
+        values = _decode_sequence(abi_type.components, data, position)
+        return dict(zip(abi_type.component_names, values, strict=True))
+
+    name = abi_type.name
+    if name in ("bytes", "string"):
+        length = _offset(data, position)
+        start = position + _WORD
+        if start + length > len(data):
+            raise AbiDecodingError(f"{name} of {length} bytes is longer than the data")
+        value = bytes(data[start : start + length])
+        return value.decode("utf-8", errors="replace") if name == "string" else value
+
+    word = _word(data, position)
+    if name == "address":
+        return f"0x{word[12:].hex()}"
+    if name == "bool":
+        return int.from_bytes(word, "big") != 0
+    if name.startswith(("uint", "ufixed")):
+        return int.from_bytes(word, "big")
+    if name.startswith(("int", "fixed")):
+        return int.from_bytes(word, "big", signed=True)
+    if name == "function":
+        return bytes(word[:24])
+    if name.startswith("bytes"):
+        return bytes(word[: int(name[5:])])
+    raise AbiDecodingError(f"Unknown abi type {name}")
+
+
+def _names(inputs: list[dict[str, Any]]) -> tuple[str, ...]:
+    return tuple(i.get("name") or f"arg{index}" for index, i in enumerate(inputs))
+
+
+class DecodedCall(BaseModel):
+    """A function call decoded from transaction input"""
+
+    name: str
+    signature: str
+    """Canonical signature, e.g. transfer(address,uint256)"""
+    selector: str
+    """First 4 bytes of the input, 0x prefixed hex"""
+    arguments: dict[str, Any]
+    """Argument values by name, arg0, arg1... for unnamed arguments. Integers
+    are ints, addresses lower case hex, bytes are bytes and tuples are dicts"""
+
+
+class DecodedLog(BaseModel):
+    """An event decoded from a log"""
+
+    name: str
+    signature: str
+    """Canonical signature, e.g. Transfer(address,address,uint256)"""
+    arguments: dict[str, Any]
+    """Argument values by name. Indexed arguments of dynamic types are left as
+    the 32 byte hash held in the topic"""
+
+
+@dataclass(frozen=True)
+class _AbiFunction:
+    name: str
+    signature: str
+    selector: str
+    types: tuple[_AbiType, ...]
+    names: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class _AbiEvent:
+    name: str
+    signature: str
+    types: tuple[_AbiType, ...]
+    names: tuple[str, ...]
+    indexed: tuple[bool, ...]
+
+
+def _signature(name: str, types: Iterable[_AbiType]) -> str:
+    return f"{name}({','.join(i.name for i in types)})"
+
+
+def _as_view(data: str | bytes | BinaryData) -> memoryview:
+    if isinstance(data, BinaryData):
+        return data.view()
+    if isinstance(data, str):
+        if not data.startswith("0x"):
+            raise AbiDecodingError(f"Data {data[:10]!r} is not 0x prefixed hex")
+        return memoryview(BinaryData(data).tobytes())
+    return memoryview(data)
+
+
+class ContractAbi:
+    """
+    A parsed contract abi, with its functions by selector and events by topic.
+    Selectors and topics are hashed once when the abi is parsed
+    Args:
+        abi: the abi, as the json string returned by the api or parsed
+
+    Raises:
+        AbiDecodingError: if the abi is not valid json
+    """
+
+    def __init__(self, abi: str | list[dict[str, Any]]) -> None:
+        items: list[dict[str, Any]]
+        if isinstance(abi, str):
+            try:
+                items = json.loads(abi)
+            except json.JSONDecodeError as e:
+                raise AbiDecodingError(f"Abi is not valid json: {e}") from e
+        else:
+            items = abi
+        self.functions: dict[bytes, _AbiFunction] = {}
+        self.events: dict[bytes, _AbiEvent] = {}
+        for item in items:
+            if item.get("type", "function") not in ("function", "event"):
+                continue
+            inputs = item.get("inputs", [])
+            types = tuple(_parse_type(i) for i in inputs)
+            signature = _signature(item["name"], types)
+            digest = keccak256(signature.encode())
+            if item.get("type", "function") == "function":
+                self.functions[digest[:4]] = _AbiFunction(
+                    item["name"],
+                    signature,
+                    f"0x{digest[:4].hex()}",
+                    types,
+                    _names(inputs),
+                )
+            elif not item.get("anonymous"):
+                self.events[digest] = _AbiEvent(
+                    item["name"],
+                    signature,
+                    types,
+                    _names(inputs),
+                    tuple(bool(i.get("indexed")) for i in inputs),
+                )
+
+    def decode_input(self, data: str | bytes | BinaryData) -> DecodedCall | None:
+        """
+        Decode the function call in transaction input
+        Args:
+            data: the input, as hex, bytes or BinaryData
+
+        Returns:
+            The call, None if the input calls no function of the abi
+
+        Raises:
+            AbiDecodingError: if the arguments do not match the function, or
+                hex data is not 0x prefixed
+        """
+        view = _as_view(data)
+        function = self.functions.get(bytes(view[:4]))
+        if function is None:
+            return None
+        values = _decode_sequence(function.types, view[4:], 0)
+        return DecodedCall(
+            name=function.name,
+            signature=function.signature,
+            selector=function.selector,
+            arguments=dict(zip(function.names, values, strict=True)),
+        )
+
+    def decode_log(
+        self, topics: Sequence[str | bytes], data: str | bytes | BinaryData
+    ) -> DecodedLog | None:
+        """
+        Decode an event from a log. The explorer api does not serve logs, this
+        decodes logs fetched elsewhere, e.g. from a node
+        Args:
+            topics: topics of the log, the first being the event's signature hash
+            data: data of the log, as hex, bytes or BinaryData
+
+        Returns:
+            The event, None if the log is of no event in the abi
+
+        Raises:
+            AbiDecodingError: if the topics or data do not match the event, or
+                hex topics or data are not 0x prefixed
+        """
+        words = [_as_view(i) for i in topics]
+        event = self.events.get(bytes(words[0])) if words else None
+        if event is None:
+            return None
+        if len(words) - 1 != sum(event.indexed):
+            raise AbiDecodingError(
+                f"{event.signature} has {sum(event.indexed)} indexed arguments, "
+                f"got {len(words) - 1} topics"
+            )
+        data_types = [
+            t
+            for t, indexed in zip(event.types, event.indexed, strict=True)
+            if not indexed
+        ]
+        data_values = iter(_decode_sequence(data_types, _as_view(data), 0))
+        indexed_values = iter(words[1:])
+        values = []
+        for abi_type, indexed in zip(event.types, event.indexed, strict=True):
+            if not indexed:
+                values.append(next(data_values))
+            elif abi_type.is_dynamic or abi_type.components:
+                values.append(bytes(next(indexed_values)))
+            else:
+                values.append(_decode(abi_type, next(indexed_values), 0))
+        return DecodedLog(
+            name=event.name,
+            signature=event.signature,
+            arguments=dict(zip(event.names, values, strict=True)),
+        )
+
+
+@lru_cache(maxsize=256)
+def parse_abi(abi: str) -> ContractAbi:
+    """
+    Parse an abi json string, cached so contracts sharing an abi, such as
+    token clones, parse it once
+    Args:
+        abi: the abi json string
+
+    Returns:
+        The parsed abi
+
+    Raises:
+        AbiDecodingError: if the abi is not valid json
+    """
+    return ContractAbi(abi)
+
+
+def _parse_or_none(abi: str) -> ContractAbi | None:
+    try:
+        return parse_abi(abi)
+    except AbiDecodingError:
+        return None
+
+
+def _call_fields(row: Any) -> tuple[str | None, Any]:
+    if isinstance(row, dict):
+        return row.get("toAddressHash"), row.get("input")
+    return getattr(row, "toAddressHash", None), getattr(row, "input", None)
+
+
+class AbiRegistry:
+    """
+    Parsed abis of contracts by address, fetched from the api the first time
+    each contract is needed and kept for later lookups. Contracts with no
+    verified source, an abi that can not be parsed or whose fetch failed are
+    remembered as having no abi too, so they are not fetched again
+    Args:
+        client: client to fetch abis with, defaults to the shared client
+        raise_failures: raise the error of a chunk of addresses that could not
+            be fetched, rather than treat its contracts as having no abi
+    """
+
+    def __init__(
+        self, client: Client | None = None, raise_failures: bool = False
+    ) -> None:
+        self.client = client
+        self.raise_failures = raise_failures
+        self._abis: dict[str, ContractAbi | None] = {}
+
+    def prefetch(self, address_hashes: Iterable[str]) -> None:
+        """
+        Fetch the abis of contracts not fetched yet, many per request
+        Args:
+            address_hashes: contract addresses
+
+        Raises:
+            Exception: the error of the first chunk of addresses that could not
+                be fetched, if raise_failures is set
+        """
+        missing = list(
+            dict.fromkeys(
+                i.lower() for i in address_hashes if i.lower() not in self._abis
+            )
+        )
+        if not missing:
+            return
+        bulk = get_addresses_bulk(
+            missing, fields=["smartContract.abi"], client=self.client, mode="dict"
+        )
+        if bulk.failures and self.raise_failures:
+            raise bulk.failures[0].error
+        # addresses in failed chunks are None, as are missing addresses
+        for address_hash, address in zip(missing, bulk.addresses, strict=True):
+            contract = address and address["smartContract"]
+            self._abis[address_hash] = contract and _parse_or_none(contract["abi"])
+
+    def get(self, address_hash: str) -> ContractAbi | None:
+        """
+        Get the abi of a contract, fetching it on first use
+        Args:
+            address_hash: contract address
+
+        Returns:
+            The parsed abi, None if the address has no verified contract, its
+            abi can not be parsed or it could not be fetched
+        """
+        self.prefetch([address_hash])
+        return self._abis[address_hash.lower()]
+
+    def decode_input(
+        self, address_hash: str, data: str | bytes | BinaryData
+    ) -> DecodedCall | None:
+        """
+        Decode a call to a contract
+        Args:
+            address_hash: contract address
+            data: the call's input, as hex, bytes or BinaryData
+
+        Returns:
+            The call, None if the contract has no abi or no function matches
+
+        Raises:
+            AbiDecodingError: if the arguments do not match the function, or
+                hex data is not 0x prefixed
+        """
+        abi = self.get(address_hash)
+        return None if abi is None else abi.decode_input(data)
+
+    def decode_transactions(
+        self,
+        transactions: Iterable[Row[Transaction] | Row[InternalTransaction]],
+    ) -> list[DecodedCall | None]:
+        """
+        Decode the calls of many transactions or internal transactions. The abis
+        of all contracts called are fetched together up front
+        Args:
+            transactions: transactions or internal transactions in any output
+                mode, with at least their toAddressHash and input fields
+
+        Returns:
+            The call of each transaction in order, None where the contract has no
+            abi, no function matches or the input does not match the function
+        """
+        calls = [_call_fields(i) for i in transactions]
+        self.prefetch(address for address, _ in calls if address)
+        decoded: list[DecodedCall | None] = []
+        for address, data in calls:
+            abi = self._abis.get(address.lower()) if address else None
+            try:
+                decoded.append(
+                    None if abi is None or data is None else abi.decode_input(data)
+                )
+            except AbiDecodingError:
+                decoded.append(None)
+        return decoded
@@ -1,11 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import partial
+from typing import Any
 
-from pydantic import BaseModel
+from gql import gql
+from graphql import DocumentNode
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
-from flare_explorer.exceptions import QueryComplexityLimit
-from flare_explorer.gql_client import Client
+from flare_explorer.binary import BinaryData
+from flare_explorer.exceptions import (
+    FlareExplorerQueryError,
+    InvalidFieldSelection,
+    QueryComplexityLimit,
+)
+from flare_explorer.gql_client import (
+    AsyncClient,
+    Client,
+    chunked,
+    get_default_async_client,
+    get_default_client,
+)
+from flare_explorer.projection import Fields, project_query
+from flare_explorer.serialization import OutputMode, Row, build, build_many
+from flare_explorer.streaming import ResponseStream
+
+MAX_ADDRESSES_PER_QUERY = 15
+DEFAULT_BULK_CONCURRENCY = 8
 
 
 class SmartContract(BaseModel):
@@ -21,71 +44,574 @@ class Address(BaseModel):
     contractCode: str | None
     fetchedCoinBalance: Decimal
     fetchedCoinBalanceBlockNumber: int
+    hash: str | None = None
     smartContract: SmartContract | None
 
 
-def get_address(address_hash: str) -> Address:
+class LazySmartContract(BaseModel):
+    """
+    Smart contract fetched without its abi and source code, which can be
+    hundreds of KB each. Both are fetched with one query on first access of
+    either and kept for later accesses. Contracts from async getters are
+    fetched with ``await load_async()``, after which both can be accessed
+    without fetching
+    """
+
+    addressHash: str
+    compilerVersion: str
+    name: str
+    optimization: bool
+
+    _client: Client | None = PrivateAttr(default=None)
+    _async_client: AsyncClient | None = PrivateAttr(default=None)
+    _contract: SmartContract | None = PrivateAttr(default=None)
+
+    def _loaded(self, contract: Row[SmartContract] | None) -> SmartContract:
+        if not isinstance(contract, SmartContract):
+            raise FlareExplorerQueryError(
+                f"No smart contract found at {self.addressHash}"
+            )
+        self._contract = contract
+        return contract
+
+    def load(self) -> SmartContract:
+        """
+        Get the full smart contract, fetching it on the first call
+        Returns:
+            The smart contract with its abi and source code
+
+        Raises:
+            FlareExplorerQueryError: if the address has no smart contract
+        """
+        if self._contract is None:
+            return self._loaded(
+                get_smart_contract(self.addressHash, client=self._client, mode="model")
+            )
+        return self._contract
+
+    async def load_async(self) -> SmartContract:
+        """
+        Get the full smart contract, fetching it on the first call
+        Returns:
+            The smart contract with its abi and source code
+
+        Raises:
+            FlareExplorerQueryError: if the address has no smart contract
+        """
+        if self._contract is None:
+            return self._loaded(
+                await get_smart_contract_async(
+                    self.addressHash, client=self._async_client, mode="model"
+                )
+            )
+        return self._contract
+
+    @property
+    def abi(self) -> str:
+        return self.load().abi
+
+    @property
+    def contractSourceCode(self) -> str:
+        return self.load().contractSourceCode
+
+
+class LazyAddress(Address):
+    """Address whose smart contract's abi and source code are fetched lazily"""
+
+    smartContract: LazySmartContract | None  # type: ignore[assignment]
+
+
+class BinaryAddress(Address):
+    """Address with its hex encoded contract code decoded on first read"""
+
+    contractCode: BinaryData | None  # type: ignore[assignment]
+
+
+class LazyBinaryAddress(LazyAddress):
+    """LazyAddress with its hex encoded contract code decoded on first read"""
+
+    contractCode: BinaryData | None  # type: ignore[assignment]
+
+
+class AddressChunkFailure(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    addressHashes: list[str]
+    error: Exception
+
+
+class BulkAddresses(BaseModel):
+    addresses: list[Any]
+    failures: list[AddressChunkFailure]
+
+
+_ADDRESS_QUERY = gql(
+    """
+    query Address($hash: AddressHash!) {
+        address(hash: $hash) {
+            contractCode
+            fetchedCoinBalance
+            fetchedCoinBalanceBlockNumber
+            hash
+            smartContract {
+                abi
+                addressHash
+                compilerVersion
+                contractSourceCode
+                name
+                optimization
+            }
+        }
+    }
+    """
+)
+
+_ADDRESSES_QUERY = gql(
+    """
+    query Addresses($hashes: [AddressHash!]!) {
+        addresses(hashes: $hashes) {
+            contractCode
+            fetchedCoinBalance
+            fetchedCoinBalanceBlockNumber
+            hash
+            smartContract {
+                abi
+                addressHash
+                compilerVersion
+                contractSourceCode
+                name
+                optimization
+            }
+        }
+    }
+    """
+)
+
+
+_LAZY_ADDRESS_FIELDS = [
+    *(i for i in Address.model_fields if i != "smartContract"),
+    *(f"smartContract.{i}" for i in LazySmartContract.model_fields),
+]
+
+
+def _address_query(
+    document: DocumentNode,
+    root: str,
+    fields: Fields | None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+) -> tuple[DocumentNode, type[Address]]:
+    if not lazy_contracts:
+        model = BinaryAddress if binary else Address
+        return project_query(document, (root,), model, fields)
+    if fields is not None:
+        raise InvalidFieldSelection("fields can not be combined with lazy_contracts")
+    query, _ = project_query(document, (root,), Address, _LAZY_ADDRESS_FIELDS)
+    return query, LazyBinaryAddress if binary else LazyAddress
+
+
+def _bind_contracts(rows: list[Any], client: Client | AsyncClient) -> None:
+    for row in rows:
+        if isinstance(row, LazyAddress) and row.smartContract is not None:
+            if isinstance(client, AsyncClient):
+                row.smartContract._async_client = client
+            else:
+                row.smartContract._client = client
+
+
+def _addresses_variables(address_hashes: list[str]) -> dict[str, Any]:
+    if len(address_hashes) > MAX_ADDRESSES_PER_QUERY:
+        raise QueryComplexityLimit("Limit of 15 addresses breached")
+    return {"hashes": address_hashes}
+
+
+def get_address(
+    address_hash: str,
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Address]:
+    """
+    Get information about a given address
+    Args:
+        address_hash: hash of the address
+        fields: fields of each address to fetch, e.g.
+            ["fetchedCoinBalance", "smartContract.name"], defaults to all. Rows
+            then hold only those fields
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them on first access instead. Only model rows can fetch
+            them, dict and record rows just leave them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about the address
+
+    Raises:
+        InvalidFieldSelection: if fields is combined with lazy_contracts
+    """
+    client = client or get_default_client()
+    query, model = _address_query(
+        _ADDRESS_QUERY, "address", fields, lazy_contracts, binary
+    )
+    response = client.query(query, {"hash": address_hash})
+    address = build(model, response["address"], mode or client.mode)
+    _bind_contracts([address], client)
+    return address
+
+
+async def get_address_async(
+    address_hash: str,
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Address]:
     """
     Get information about a given address
     Args:
         address_hash: hash of the address
+        fields: fields of each address to fetch, e.g.
+            ["fetchedCoinBalance", "smartContract.name"], defaults to all. Rows
+            then hold only those fields
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them with ``await smartContract.load_async()`` instead.
+            Only model rows can fetch them, dict and record rows just leave
+            them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Information about the address
+
+    Raises:
+        InvalidFieldSelection: if fields is combined with lazy_contracts
+    """
+    client = client or get_default_async_client()
+    query, model = _address_query(
+        _ADDRESS_QUERY, "address", fields, lazy_contracts, binary
+    )
+    response = await client.query(query, {"hash": address_hash})
+    address = build(model, response["address"], mode or client.mode)
+    _bind_contracts([address], client)
+    return address
+
+
+def get_smart_contract(
+    address_hash: str, client: Client | None = None, mode: OutputMode | None = None
+) -> Row[SmartContract] | None:
+    """
+    Get the smart contract at a given address, with its abi and source code
+    Args:
+        address_hash: hash of the address
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        The smart contract, None if the address has none
     """
-    query = (
-        "{"
-        f'   address(hash: "{address_hash}") {{'
-        "        contractCode"
-        "        fetchedCoinBalance"
-        "        fetchedCoinBalanceBlockNumber"
-        "        smartContract {"
-        "            abi"
-        "            addressHash"
-        "            compilerVersion"
-        "            contractSourceCode"
-        "            name"
-        "            optimization"
-        "        }"
-        "    }"
-        "}"
+    client = client or get_default_client()
+    query, _ = project_query(_ADDRESS_QUERY, ("address",), Address, ["smartContract"])
+    response = client.query(query, {"hash": address_hash})
+    contract = response["address"]["smartContract"]
+    return (
+        None
+        if contract is None
+        else build(SmartContract, contract, mode or client.mode)
     )
-    response = Client().query(query)
-    return Address(**response["address"])
 
 
-def get_addresses(address_hashes: list[str]) -> list[Address]:
+async def get_smart_contract_async(
+    address_hash: str,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> Row[SmartContract] | None:
+    """
+    Get the smart contract at a given address, with its abi and source code
+    Args:
+        address_hash: hash of the address
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        The smart contract, None if the address has none
+    """
+    client = client or get_default_async_client()
+    query, _ = project_query(_ADDRESS_QUERY, ("address",), Address, ["smartContract"])
+    response = await client.query(query, {"hash": address_hash})
+    contract = response["address"]["smartContract"]
+    return (
+        None
+        if contract is None
+        else build(SmartContract, contract, mode or client.mode)
+    )
+
+
+def get_addresses(
+    address_hashes: list[str],
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Address]]:
     """
     Get multiple addresses in one call.
     API complexity limit is 15 addresses at once
     Args:
         address_hashes: list of address hashes
+        fields: fields of each address to fetch, e.g.
+            ["fetchedCoinBalance", "smartContract.name"], defaults to all. Rows
+            then hold only those fields
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them on first access instead. Only model rows can fetch
+            them, dict and record rows just leave them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         List of address objects
 
     Raises:
         QueryComplexityLimit: if address_hashes is > 15 hashes
+        InvalidFieldSelection: if fields is combined with lazy_contracts
     """
-    if len(address_hashes) > 15:
-        raise QueryComplexityLimit("Limit of 15 addresses breached")
-    query_args = ",".join([f'"{i}"' for i in address_hashes])
-    query = (
-        "{"
-        f"   addresses(hashes: [{query_args}]) {{"
-        "        contractCode"
-        "        fetchedCoinBalance"
-        "        fetchedCoinBalanceBlockNumber"
-        "        smartContract {"
-        "            abi"
-        "            addressHash"
-        "            compilerVersion"
-        "            contractSourceCode"
-        "            name"
-        "            optimization"
-        "        }"
-        "    }"
-        "}"
+    variables = _addresses_variables(address_hashes)
+    client = client or get_default_client()
+    query, model = _address_query(
+        _ADDRESSES_QUERY, "addresses", fields, lazy_contracts, binary
+    )
+    response = client.query(query, variables)
+    addresses = build_many(model, response["addresses"], mode or client.mode)
+    _bind_contracts(addresses, client)
+    return addresses
+
+
+async def get_addresses_async(
+    address_hashes: list[str],
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Address]]:
+    """
+    Get multiple addresses in one call.
+    API complexity limit is 15 addresses at once
+    Args:
+        address_hashes: list of address hashes
+        fields: fields of each address to fetch, e.g.
+            ["fetchedCoinBalance", "smartContract.name"], defaults to all. Rows
+            then hold only those fields
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them with ``await smartContract.load_async()`` instead.
+            Only model rows can fetch them, dict and record rows just leave
+            them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        List of address objects
+
+    Raises:
+        QueryComplexityLimit: if address_hashes is > 15 hashes
+        InvalidFieldSelection: if fields is combined with lazy_contracts
+    """
+    variables = _addresses_variables(address_hashes)
+    client = client or get_default_async_client()
+    query, model = _address_query(
+        _ADDRESSES_QUERY, "addresses", fields, lazy_contracts, binary
+    )
+    response = await client.query(query, variables)
+    addresses = build_many(model, response["addresses"], mode or client.mode)
+    _bind_contracts(addresses, client)
+    return addresses
+
+
+def stream_addresses(
+    address_hashes: list[str],
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> ResponseStream[Row[Address]]:
+    """
+    Get multiple addresses in one call, decoding each address as the response
+    is read so large contract sources and bytecode are not all held in memory
+    at once. Requires the optional ijson dependency.
+    API complexity limit is 15 addresses at once
+    Args:
+        address_hashes: list of address hashes
+        fields: fields of each address to fetch, e.g.
+            ["fetchedCoinBalance", "smartContract.name"], defaults to all. Rows
+            then hold only those fields
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of address objects
+
+    Raises:
+        QueryComplexityLimit: if address_hashes is > 15 hashes
+    """
+    variables = _addresses_variables(address_hashes)
+    client = client or get_default_client()
+    query, model = _address_query(_ADDRESSES_QUERY, "addresses", fields, binary=binary)
+    return ResponseStream(
+        partial(client.query_stream, query, variables),
+        "data.addresses.item",
+        partial(build, model, mode=mode or client.mode),
+    )
+
+
+def _chunk_address_hashes(address_hashes: list[str]) -> list[list[str]]:
+    unique_hashes = list(dict.fromkeys(i.lower() for i in address_hashes))
+    return chunked(unique_hashes, MAX_ADDRESSES_PER_QUERY)
+
+
+def _bulk_addresses_query(
+    fields: Fields | None, lazy_contracts: bool = False, binary: bool = False
+) -> tuple[DocumentNode, type[Address]]:
+    if fields is not None:
+        fields = [*fields, "hash"]
+    return _address_query(_ADDRESSES_QUERY, "addresses", fields, lazy_contracts, binary)
+
+
+def _collect_bulk_addresses(
+    address_hashes: list[str],
+    chunks: list[list[str]],
+    results: list[dict[str, Any] | Exception],
+    model: type[Address],
+    mode: OutputMode,
+) -> BulkAddresses:
+    rows: dict[str, Any] = {}
+    failures = []
+    for chunk, result in zip(chunks, results, strict=True):
+        if isinstance(result, Exception):
+            failures.append(AddressChunkFailure(addressHashes=chunk, error=result))
+            continue
+        for i in result["addresses"]:
+            rows[i["hash"].lower()] = build(model, i, mode)
+    return BulkAddresses(
+        addresses=[rows.get(i.lower()) for i in address_hashes],
+        failures=failures,
+    )
+
+
+def get_addresses_bulk(
+    address_hashes: list[str],
+    concurrency: int = DEFAULT_BULK_CONCURRENCY,
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> BulkAddresses:
+    """
+    Get any number of addresses. Hashes are de-duplicated and split into chunks
+    of MAX_ADDRESSES_PER_QUERY, which are queried concurrently on a thread pool.
+    A failing chunk does not fail the batch, it is reported in failures instead
+    Args:
+        address_hashes: list of address hashes
+        concurrency: maximum number of chunks queried at once
+        fields: fields of each address to fetch, defaults to all. The hash is
+            always fetched to match addresses to address_hashes
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them on first access instead. Only model rows can fetch
+            them, dict and record rows just leave them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Addresses in the same order as address_hashes, None for addresses not
+        found or in a failed chunk, and the failures of each failed chunk
+
+    Raises:
+        InvalidFieldSelection: if fields is combined with lazy_contracts
+    """
+    client = client or get_default_client()
+    chunks = _chunk_address_hashes(address_hashes)
+    query, model = _bulk_addresses_query(fields, lazy_contracts, binary)
+
+    def query_chunk(chunk: list[str]) -> dict[str, Any] | Exception:
+        try:
+            return client.query(query, _addresses_variables(chunk))
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(query_chunk, chunks))
+    bulk = _collect_bulk_addresses(
+        address_hashes, chunks, results, model, mode or client.mode
+    )
+    _bind_contracts(bulk.addresses, client)
+    return bulk
+
+
+async def get_addresses_bulk_async(
+    address_hashes: list[str],
+    concurrency: int = DEFAULT_BULK_CONCURRENCY,
+    fields: Fields | None = None,
+    lazy_contracts: bool = False,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> BulkAddresses:
+    """
+    Get any number of addresses. Hashes are de-duplicated and split into chunks
+    of MAX_ADDRESSES_PER_QUERY, which are queried concurrently.
+    A failing chunk does not fail the batch, it is reported in failures instead
+    Args:
+        address_hashes: list of address hashes
+        concurrency: maximum number of chunks queried at once
+        fields: fields of each address to fetch, defaults to all. The hash is
+            always fetched to match addresses to address_hashes
+        lazy_contracts: leave out the abi and source code of smart contracts,
+            fetching them with ``await smartContract.load_async()`` instead.
+            Only model rows can fetch them, dict and record rows just leave
+            them out
+        binary: keep hex encoded contract code as BinaryData, decoded to bytes
+            on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Addresses in the same order as address_hashes, None for addresses not
+        found or in a failed chunk, and the failures of each failed chunk
+
+    Raises:
+        InvalidFieldSelection: if fields is combined with lazy_contracts
+    """
+    client = client or get_default_async_client()
+    chunks = _chunk_address_hashes(address_hashes)
+    query, model = _bulk_addresses_query(fields, lazy_contracts, binary)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def query_chunk(chunk: list[str]) -> dict[str, Any] | Exception:
+        async with semaphore:
+            try:
+                return await client.query(query, _addresses_variables(chunk))
+            except Exception as e:
+                return e
+
+    results = await asyncio.gather(*(query_chunk(i) for i in chunks))
+    bulk = _collect_bulk_addresses(
+        address_hashes, chunks, results, model, mode or client.mode
     )
-    response = Client().query(query)
-    return [Address(**i) for i in response["addresses"]]
+    _bind_contracts(bulk.addresses, client)
+    return bulk
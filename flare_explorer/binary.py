@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+
+class BinaryData:
+    """
+    Binary data the api returns hex encoded, such as transaction input and
+    contract code. The hex string is held until the data is first read as bytes,
+    then only the bytes are held, so each value is decoded at most once and never
+    held twice. Serialized to json as the hex string
+    Args:
+        data: 0x prefixed hex string, or the bytes themselves
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: str | bytes | bytearray | memoryview) -> None:
+        self._data: str | bytes = data if isinstance(data, str) else bytes(data)
+
+    @property
+    def decoded(self) -> bool:
+        """True once the hex string has been decoded to bytes"""
+        return not isinstance(self._data, str)
+
+    def tobytes(self) -> bytes:
+        """
+        Get the data as bytes, decoding the hex string on the first call
+        Returns:
+            The data
+
+        Raises:
+            ValueError: if the hex string is not valid hex
+        """
+        data = self._data
+        if isinstance(data, str):
+            data = self._data = bytes.fromhex(data[2:])
+        return data
+
+    def view(self) -> memoryview:
+        """
+        Get a read only view of the data, sharing the decoded bytes
+        Returns:
+            View of the data
+
+        Raises:
+            ValueError: if the hex string is not valid hex
+        """
+        return memoryview(self.tobytes())
+
+    def hex(self) -> str:
+        """
+        Get the data as a 0x prefixed hex string, as returned by the api.
+        Re-encoded on each call once the data has been decoded
+        Returns:
+            The hex string
+        """
+        data = self._data
+        return data if isinstance(data, str) else f"0x{data.hex()}"
+
+    def __bytes__(self) -> bytes:
+        return self.tobytes()
+
+    def __len__(self) -> int:
+        data = self._data
+        return (len(data) - 2) // 2 if isinstance(data, str) else len(data)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, str):
+            return self.hex().lower() == other.lower()
+        if isinstance(other, BinaryData):
+            return self.tobytes() == other.tobytes()
+        if isinstance(other, bytes | bytearray | memoryview):
+            return self.tobytes() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.tobytes())
+
+    def __str__(self) -> str:
+        return self.hex()
+
+    def __repr__(self) -> str:
+        return f"BinaryData({self.hex()!r})"
+
+    @classmethod
+    def _validate(cls, value: Any) -> BinaryData:
+        if isinstance(value, BinaryData):
+            return value
+        if isinstance(value, str):
+            if not value.startswith("0x"):
+                raise ValueError("Binary data must be a 0x prefixed hex string")
+            return cls(value)
+        if isinstance(value, bytes | bytearray | memoryview):
+            return cls(value)
+        raise ValueError(f"Binary data must be a hex string or bytes, not {value!r}")
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                str, when_used="json"
+            ),
+        )
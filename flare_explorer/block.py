@@ -1,11 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
 from decimal import Decimal
 
+from gql import gql
+from graphql import DocumentNode
 from pydantic import BaseModel
 
-from flare_explorer.gql_client import Client
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import (
+    AsyncClient,
+    Client,
+    aliased_query,
+    aliased_variables,
+    chunked,
+    get_default_async_client,
+    get_default_client,
+    unpack_aliased_response,
+)
+from flare_explorer.projection import Fields, partial_model, project_query, selection
+from flare_explorer.serialization import OutputMode, Row, build
+from flare_explorer.watch import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL
+
+# estimated from the api's query complexity limit
+MAX_BLOCKS_PER_QUERY = 20
 
 
 class Block(BaseModel):
@@ -23,32 +43,220 @@ class Block(BaseModel):
     totalDifficulty: Decimal
 
 
-def get_block(block_number: int) -> Block:
+_BLOCK_QUERY = gql(
+    """
+    query Block($number: Int!) {
+        block(number: $number) {
+            consensus
+            difficulty
+            gasLimit
+            gasUsed
+            hash
+            minerHash
+            nonce
+            number
+            parentHash
+            size
+            timestamp
+            totalDifficulty
+        }
+    }
+    """
+)
+
+
+def _blocks_query(batch_size: int, fields: Fields | None = None) -> DocumentNode:
+    return aliased_query(
+        "block", "number", "Int!", batch_size, selection(Block, fields)
+    )
+
+
+def _validate_batch_size(batch_size: int) -> None:
+    if not 1 <= batch_size <= MAX_BLOCKS_PER_QUERY:
+        raise QueryComplexityLimit(
+            f"Batch size must be between 1 and {MAX_BLOCKS_PER_QUERY}, got {batch_size}"
+        )
+
+
+def get_block(
+    block_number: int,
+    fields: Fields | None = None,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Block]:
+    """
+    Get information about a given block
+    Args:
+        block_number: number of the block
+        fields: fields of each block to fetch, e.g. ["number", "timestamp"],
+            defaults to all. Rows then hold only those fields
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about the block
+    """
+    client = client or get_default_client()
+    query, model = project_query(_BLOCK_QUERY, ("block",), Block, fields)
+    response = client.query(query, {"number": block_number})
+    return build(model, response["block"], mode or client.mode)
+
+
+async def get_block_async(
+    block_number: int,
+    fields: Fields | None = None,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Block]:
     """
     Get information about a given block
     Args:
         block_number: number of the block
+        fields: fields of each block to fetch, e.g. ["number", "timestamp"],
+            defaults to all. Rows then hold only those fields
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Information about the block
     """
-    query = (
-        "{"
-        f"    block(number: {block_number}) {{"
-        "        consensus"
-        "        difficulty"
-        "        gasLimit"
-        "        gasUsed"
-        "        hash"
-        "        minerHash"
-        "        nonce"
-        "        number"
-        "        parentHash"
-        "        size"
-        "        timestamp"
-        "        totalDifficulty"
-        "    }"
-        "}"
+    client = client or get_default_async_client()
+    query, model = project_query(_BLOCK_QUERY, ("block",), Block, fields)
+    response = await client.query(query, {"number": block_number})
+    return build(model, response["block"], mode or client.mode)
+
+
+def get_blocks(
+    block_numbers: list[int],
+    batch_size: int = MAX_BLOCKS_PER_QUERY,
+    fields: Fields | None = None,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Block] | None]:
+    """
+    Get information about many blocks, packing up to batch_size lookups into
+    each request
+    Args:
+        block_numbers: numbers of the blocks
+        batch_size: number of blocks per request, at most MAX_BLOCKS_PER_QUERY
+        fields: fields of each block to fetch, e.g. ["number", "timestamp"],
+            defaults to all. Rows then hold only those fields
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about each block in the order of block_numbers, None for
+        blocks that were not found
+
+    Raises:
+        QueryComplexityLimit: if batch_size is outside 1 to MAX_BLOCKS_PER_QUERY
+        FlareExplorerQueryError: if a lookup failed other than not being found
+    """
+    _validate_batch_size(batch_size)
+    client = client or get_default_client()
+    mode = mode or client.mode
+    model = partial_model(Block, fields)
+    blocks: dict[int, Row[Block] | None] = {}
+    for batch in chunked(list(dict.fromkeys(block_numbers)), batch_size):
+        data, errors = client.query_partial(
+            _blocks_query(len(batch), fields), aliased_variables(batch)
+        )
+        for number, block in unpack_aliased_response(batch, data, errors).items():
+            blocks[number] = None if block is None else build(model, block, mode)
+    return [blocks[i] for i in block_numbers]
+
+
+async def get_blocks_async(
+    block_numbers: list[int],
+    batch_size: int = MAX_BLOCKS_PER_QUERY,
+    fields: Fields | None = None,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Block] | None]:
+    """
+    Get information about many blocks, packing up to batch_size lookups into
+    each request and sending the requests concurrently
+    Args:
+        block_numbers: numbers of the blocks
+        batch_size: number of blocks per request, at most MAX_BLOCKS_PER_QUERY
+        fields: fields of each block to fetch, e.g. ["number", "timestamp"],
+            defaults to all. Rows then hold only those fields
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about each block in the order of block_numbers, None for
+        blocks that were not found
+
+    Raises:
+        QueryComplexityLimit: if batch_size is outside 1 to MAX_BLOCKS_PER_QUERY
+        FlareExplorerQueryError: if a lookup failed other than not being found
+    """
+    _validate_batch_size(batch_size)
+    client = client or get_default_async_client()
+    mode = mode or client.mode
+    model = partial_model(Block, fields)
+    batches = chunked(list(dict.fromkeys(block_numbers)), batch_size)
+    responses = await asyncio.gather(
+        *(
+            client.query_partial(_blocks_query(len(i), fields), aliased_variables(i))
+            for i in batches
+        )
     )
-    response = Client().query(query)
-    return Block(**response["block"])
+    blocks: dict[int, Row[Block] | None] = {}
+    for batch, (data, errors) in zip(batches, responses, strict=True):
+        for number, block in unpack_aliased_response(batch, data, errors).items():
+            blocks[number] = None if block is None else build(model, block, mode)
+    return [blocks[i] for i in block_numbers]
+
+
+async def follow_blocks(
+    start: int,
+    batch_size: int = MAX_BLOCKS_PER_QUERY,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> AsyncIterator[Row[Block]]:
+    """
+    Follow the chain from a block, yielding each block once it is produced.
+    The api has no subscription to new blocks, so the next batch_size blocks
+    are looked up in one request and the wait before looking again grows from
+    min_interval to max_interval while no new block is found. Pass the number
+    after the last block seen as start to resume
+    Args:
+        start: number of the first block to yield
+        batch_size: number of blocks looked up per request, at most
+            MAX_BLOCKS_PER_QUERY
+        min_interval: shortest wait in seconds after reaching the newest block
+        max_interval: longest wait in seconds between looking for new blocks
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Async iterator of blocks in order
+
+    Raises:
+        QueryComplexityLimit: if batch_size is outside 1 to MAX_BLOCKS_PER_QUERY
+    """
+    _validate_batch_size(batch_size)
+    number = start
+    interval = min_interval
+    while True:
+        blocks = await get_blocks_async(
+            list(range(number, number + batch_size)),
+            batch_size=batch_size,
+            client=client,
+            mode=mode,
+        )
+        found = 0
+        # the first block not found is the one being produced next
+        for block in blocks:
+            if block is None:
+                break
+            found += 1
+            yield block
+        number += found
+        interval = min_interval if found else min(max_interval, interval * 2)
+        if found < batch_size:
+            await asyncio.sleep(interval)
@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from graphql import DocumentNode, FieldNode, OperationDefinitionNode, print_ast
+from pydantic import BaseModel
+
+from flare_explorer.sqlite import SqliteConnections
+
+# seconds each root field of a query may be cached for, None caches forever.
+# blocks and transactions (with their internal transactions) never change once
+# final, balances and transfer lists keep changing as new blocks are added
+DEFAULT_TTLS: dict[str, float | None] = {
+    "block": None,
+    "transaction": None,
+    "address": 15.0,
+    "addresses": 15.0,
+    "tokenTransfers": 15.0,
+}
+# blocks this many below the newest block seen, or mined this many seconds ago,
+# are final. Anything newer, pending or not found may still change, so it is
+# only cached for UNFINALIZED_TTL
+FINALITY_DEPTH = 32
+FINALITY_AGE = 300.0
+UNFINALIZED_TTL = 15.0
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 1024**3
+# last access times are only rewritten when older than this, so reads of hot
+# entries do not all need the database write lock
+ACCESS_RESOLUTION = 60.0
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def query_text(document: DocumentNode) -> str:
+    """
+    Text of a query document, taken from the source it was parsed from so the
+    document does not need printing
+    Args:
+        document: parsed query document
+
+    Returns:
+        query str
+    """
+    return document.loc.source.body if document.loc else print_ast(document)
+
+
+def root_fields(document: DocumentNode) -> list[str]:
+    """
+    Names of the root fields selected by a query document, e.g. block
+    Args:
+        document: parsed query document
+
+    Returns:
+        root field names, once per selection including aliased selections
+    """
+    return [
+        selection.name.value
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        for selection in definition.selection_set.selections
+        if isinstance(selection, FieldNode)
+    ]
+
+
+def _root_keys(document: DocumentNode) -> list[tuple[str, str]]:
+    return [
+        (
+            selection.alias.value if selection.alias else selection.name.value,
+            selection.name.value,
+        )
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        for selection in definition.selection_set.selections
+        if isinstance(selection, FieldNode)
+    ]
+
+
+def cache_key(document: DocumentNode, variables: dict[str, Any] | None) -> str:
+    """
+    Key identifying a query document sent with the given variables
+    Args:
+        document: parsed query document
+        variables: values of the variables used in the query
+
+    Returns:
+        cache key
+    """
+    return f"{query_text(document)}\n{json.dumps(variables, sort_keys=True)}"
+
+
+class Cache(ABC):
+    """
+    Cache of query responses, used by a client to skip the network for queries
+    it has already answered.
+
+    How long a response is kept depends on the root fields it selects, looked
+    up in ``ttls``. A query selecting several root fields is kept for the
+    shortest of their ttls, and queries selecting a root field missing from
+    ``ttls`` are not cached.
+
+    Blocks and transactions are only kept forever once final. A block is final
+    once it was mined FINALITY_AGE seconds ago or is FINALITY_DEPTH blocks below
+    the newest block seen in any response, a transaction once its block is that
+    deep. Responses that are not final, or do not select the fields to tell,
+    are kept for UNFINALIZED_TTL.
+
+    Args:
+        ttls: seconds to keep responses for each root field, None for forever
+    """
+
+    def __init__(self, ttls: dict[str, float | None] | None = None) -> None:
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._head = 0
+
+    def ttl_for(self, document: DocumentNode) -> float | None:
+        """
+        Seconds a response to the document may be cached for
+        Args:
+            document: parsed query document
+
+        Returns:
+            ttl in seconds, None to cache forever, 0 to not cache
+        """
+        fields = root_fields(document)
+        if not fields or any(i not in self.ttls for i in fields):
+            return 0
+        finite = [ttl for i in fields if (ttl := self.ttls[i]) is not None]
+        return min(finite) if finite else None
+
+    def lookup(self, key: str) -> dict[str, Any] | None:
+        """
+        Get a cached response, counting the hit or miss
+        Args:
+            key: cache key of the query, from cache_key
+
+        Returns:
+            cached response, None on a miss
+        """
+        response = self.get(key)
+        with self._stats_lock:
+            if response is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return response
+
+    def store(self, document: DocumentNode, key: str, response: dict[str, Any]) -> None:
+        """
+        Cache the response to a query for the ttl of its root fields
+        Args:
+            document: parsed query document
+            key: cache key of the query, from cache_key
+            response: response to cache
+        """
+        ttl = self.ttl_for(document)
+        if ttl is None and not self._final(document, response):
+            ttl = UNFINALIZED_TTL
+        if ttl is None or ttl > 0:
+            self.set(key, response, ttl)
+
+    def _final(self, document: DocumentNode, response: dict[str, Any]) -> bool:
+        rows = [(field, response.get(key)) for key, field in _root_keys(document)]
+        numbers = [
+            row.get("number" if field == "block" else "blockNumber")
+            for field, row in rows
+            if field in ("block", "transaction") and row
+        ]
+        with self._stats_lock:
+            self._head = max([self._head, *(i for i in numbers if isinstance(i, int))])
+        return all(
+            self._block_final(row) if field == "block" else self._mined(row)
+            for field, row in rows
+            if field in ("block", "transaction")
+        )
+
+    def _block_final(self, block: dict[str, Any] | None) -> bool:
+        if (
+            not block
+            or not block.get("consensus")
+            or not isinstance(block.get("number"), int)
+        ):
+            return False
+        if block["number"] <= self._head - FINALITY_DEPTH:
+            return True
+        timestamp = block.get("timestamp")
+        if not isinstance(timestamp, str):
+            return False
+        mined = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        return time.time() - mined.timestamp() >= FINALITY_AGE
+
+    def _mined(self, transaction: dict[str, Any] | None) -> bool:
+        if not transaction or transaction.get("status") is None:
+            return False
+        block_number = transaction.get("blockNumber")
+        return (
+            isinstance(block_number, int)
+            and block_number <= self._head - FINALITY_DEPTH
+        )
+
+    def _evicted(self, count: int = 1) -> None:
+        with self._stats_lock:
+            self.stats.evictions += count
+
+    @abstractmethod
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Get a cached response
+        Args:
+            key: cache key
+
+        Returns:
+            cached response, None if missing or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, response: dict[str, Any], ttl: float | None) -> None:
+        """
+        Cache a response
+        Args:
+            key: cache key
+            response: response to cache
+            ttl: seconds to keep the response for, None for forever
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every cached response"""
+
+
+class MemoryCache(Cache):
+    """
+    In-memory cache holding at most ``max_entries`` responses, evicting the
+    least recently used first. Safe to share between threads.
+
+    Cached responses are returned as is, not copied, so rows built from them in
+    dict mode must be treated as read-only.
+    Args:
+        max_entries: maximum number of responses to hold
+        ttls: seconds to keep responses for each root field, None for forever
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: dict[str, float | None] | None = None,
+    ) -> None:
+        super().__init__(ttls)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float | None, dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: dict[str, Any], ttl: float | None) -> None:
+        expires = None if ttl is None else time.monotonic() + ttl
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (expires, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._evicted(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER);
+INSERT OR IGNORE INTO usage VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE usage SET size = size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE usage SET size = size + new.size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE usage SET size = size - old.size;
+END;
+"""
+
+
+class SqliteCache(Cache):
+    """
+    Cache stored in a SQLite file, so responses survive restarts and are shared
+    by every process on the host using the same path.
+
+    The database runs in WAL mode so readers do not block each other or the
+    writer. Once the responses stored add up to more than ``max_bytes`` the
+    least recently used are evicted. Safe to share between threads and
+    processes.
+    Args:
+        path: path of the database file, created if missing
+        max_bytes: maximum total size of the responses stored
+        ttls: seconds to keep responses for each root field, None for forever
+        timeout: seconds to wait for another process holding the write lock
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: dict[str, float | None] | None = None,
+        timeout: float = 30.0,
+    ) -> None:
+        super().__init__(ttls)
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._connections = SqliteConnections(self.path, timeout)
+        self._connection().executescript(_SQLITE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the responses stored"""
+        row = self._connection().execute("SELECT size FROM usage").fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        row = self._connection().execute("SELECT count(*) FROM entries").fetchone()
+        return int(row[0])
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        connection = self._connection()
+        digest = self._digest(key)
+        row = connection.execute(
+            "SELECT response, expires, accessed FROM entries WHERE key = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, expires, accessed = row
+        now = time.time()
+        if expires is not None and expires <= now:
+            connection.execute(
+                "DELETE FROM entries WHERE key = ? AND expires <= ?", (digest, now)
+            )
+            return None
+        if now - accessed > ACCESS_RESOLUTION:
+            connection.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, digest)
+            )
+        result: dict[str, Any] = json.loads(response)
+        return result
+
+    def set(self, key: str, response: dict[str, Any], ttl: float | None) -> None:
+        data = json.dumps(response, separators=(",", ":"))
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET response = excluded.response, "
+                "size = excluded.size, expires = excluded.expires, "
+                "accessed = excluded.accessed",
+                (self._digest(key), data, len(data), expires, now),
+            )
+            evicted = self._evict(connection, now)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._evicted(evicted)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> int:
+        (size,) = connection.execute("SELECT size FROM usage").fetchone()
+        if size <= self.max_bytes:
+            return 0
+        evicted = connection.execute(
+            "DELETE FROM entries WHERE expires <= ?", (now,)
+        ).rowcount
+        while True:
+            (size,) = connection.execute("SELECT size FROM usage").fetchone()
+            if size <= self.max_bytes:
+                return evicted
+            # remove about as many of the least recently used as needed at once
+            (average,) = connection.execute("SELECT avg(size) FROM entries").fetchone()
+            batch = max(1, int((size - self.max_bytes) / average) + 1)
+            evicted += connection.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed LIMIT ?)",
+                (batch,),
+            ).rowcount
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Close this thread's connection to the database"""
+        self._connections.close()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    De-duplicate concurrent calls made from threads. While a call for a key is
+    running, further calls for the same key wait for it and share its result or
+    exception instead of running again.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, Future[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run fn, or wait for the call already running for key
+        Args:
+            key: identifies calls that would return the same result
+            fn: call to run if none is running for key
+
+        Returns:
+            Result of the call
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight(Generic[T]):
+    """
+    De-duplicate concurrent calls made from one event loop. While a call for a
+    key is running, further calls for the same key await it and share its result
+    or exception instead of running again. The call runs as its own task, so
+    cancelling one caller does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future[T]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn, or await the call already running for key
+        Args:
+            key: identifies calls that would return the same result
+            fn: call to run if none is running for key
+
+        Returns:
+            Result of the call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(fn())
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(call)
@@ -0,0 +1,659 @@
+from __future__ import annotations
+
+import base64
+import operator
+from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from decimal import Decimal
+from functools import partial
+from types import UnionType
+from typing import Any, Generic, Union, cast, get_args, get_origin
+
+from pydantic import BaseModel
+
+from flare_explorer.binary import BinaryData
+from flare_explorer.serialization import ModelT, OutputMode, Row, build, nested_model
+from flare_explorer.token_transfers import TokenTransfer
+from flare_explorer.transaction import Transaction
+
+_HASH_BYTES = 32
+_WORD_MASK = 2**64 - 1
+
+
+def _append(values: array[int], value: int) -> array[int]:
+    # arrays start 4 bytes wide and are widened once a value does not fit
+    try:
+        values.append(value)
+    except OverflowError:
+        values = array("q", values)
+        values.append(value)
+    return values
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            value = Decimal(value)
+    if value != value.to_integral_value():
+        raise ValueError(f"Amount {value} is not a whole number")
+    return int(value)
+
+
+def _join_words(words: Sequence[int]) -> int:
+    # words may be totals of many words, so can be wider than 64 bits
+    number = 0
+    for word in reversed(words):
+        number = (number << 64) + word
+    return number
+
+
+class _Column(ABC):
+    """Storage for the values of one field, which are returned as raw json values"""
+
+    @abstractmethod
+    def append(self, value: Any) -> None:
+        """Add a value to the end of the column"""
+
+    @abstractmethod
+    def __getitem__(self, index: int) -> Any:
+        """Raw json value at a position"""
+
+    @abstractmethod
+    def take(self, indices: Sequence[int]) -> _Column:
+        """New column of the values at the given positions, in order"""
+
+    def positions(self, value: Any) -> Iterator[int]:
+        return (i for i in range(len(self)) if self[i] == value)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of values held"""
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Bytes used by the buffers holding the values"""
+
+
+class _IntColumn(_Column):
+    def __init__(self, values: array[int] | None = None) -> None:
+        self.values = values if values is not None else array("i")
+
+    def append(self, value: Any) -> None:
+        self.values = _append(self.values, value)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[index]
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        values = self.values
+        return _IntColumn(array(values.typecode, [values[i] for i in indices]))
+
+    def positions(self, value: Any) -> Iterator[int]:
+        return (i for i, v in enumerate(self.values) if v == value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values)
+
+
+class _VariableWidthColumn(_Column):
+    """Values packed end to end as bytes, with the offset where each one ends"""
+
+    def __init__(
+        self, data: bytearray | None = None, ends: array[int] | None = None
+    ) -> None:
+        self.data = data if data is not None else bytearray()
+        self.ends = ends if ends is not None else array("i")
+
+    def _add(self, value: bytes | bytearray) -> None:
+        self.data += value
+        self.ends = _append(self.ends, len(self.data))
+
+    def _bytes(self, index: int) -> bytearray:
+        start = self.ends[index - 1] if index else 0
+        return self.data[start : self.ends[index]]
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        column = type(self)()
+        for i in indices:
+            column._add(self._bytes(i))
+        return column
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class _AmountColumn(_Column):
+    """
+    Whole amounts split into 64 bit words, lowest first, with an array per word
+    so they are added up a word at a time. Arrays for higher words are added
+    once an amount needs them, e.g. the four of 256 bit signature values
+    """
+
+    def __init__(self, words: list[array[int]] | None = None) -> None:
+        self.words = words if words is not None else [array("Q"), array("Q")]
+
+    def append(self, value: Any) -> None:
+        number = _to_integer(value)
+        if number < 0:
+            raise ValueError(f"Amount {number} is negative")
+        while number >> 64 * len(self.words):
+            # amounts added so far have a zero word here
+            self.words.append(array("Q", bytes(8 * len(self))))
+        for word in self.words:
+            word.append(number & _WORD_MASK)
+            number >>= 64
+
+    def integers(self) -> Iterator[int]:
+        return map(_join_words, zip(*self.words, strict=True))
+
+    def total(self) -> int:
+        return _join_words([sum(word) for word in self.words])
+
+    def __getitem__(self, index: int) -> Any:
+        return str(_join_words([word[index] for word in self.words]))
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        return _AmountColumn(
+            [array("Q", [word[i] for i in indices]) for word in self.words]
+        )
+
+    def positions(self, value: Any) -> Iterator[int]:
+        number = _to_integer(value)
+        return (i for i, v in enumerate(self.integers()) if v == number)
+
+    def __len__(self) -> int:
+        return len(self.words[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(word.itemsize * len(word) for word in self.words)
+
+
+class _BinaryColumn(_VariableWidthColumn):
+    """Hex encoded binary data, held decoded"""
+
+    def append(self, value: Any) -> None:
+        if not isinstance(value, BinaryData):
+            value = BinaryData(value)
+        self._add(value.tobytes())
+
+    def __getitem__(self, index: int) -> Any:
+        return f"0x{self._bytes(index).hex()}"
+
+
+class _StringColumn(_VariableWidthColumn):
+    """utf-8 strings"""
+
+    def append(self, value: Any) -> None:
+        self._add(value.encode())
+
+    def __getitem__(self, index: int) -> Any:
+        return self._bytes(index).decode()
+
+
+class _HashColumn(_Column):
+    """32 byte transaction hashes packed end to end"""
+
+    def __init__(self, data: bytearray | None = None) -> None:
+        self.data = data if data is not None else bytearray()
+
+    @staticmethod
+    def _pack(value: str) -> bytes:
+        packed = bytes.fromhex(value.removeprefix("0x"))
+        if len(packed) != _HASH_BYTES:
+            raise ValueError(f"Hash {value} is not {_HASH_BYTES} bytes long")
+        return packed
+
+    def append(self, value: Any) -> None:
+        self.data += self._pack(value)
+
+    def __getitem__(self, index: int) -> Any:
+        start = index * _HASH_BYTES
+        return f"0x{self.data[start : start + _HASH_BYTES].hex()}"
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        data = self.data
+        return _HashColumn(
+            bytearray().join(
+                data[i * _HASH_BYTES : (i + 1) * _HASH_BYTES] for i in indices
+            )
+        )
+
+    def positions(self, value: Any) -> Iterator[int]:
+        packed = self._pack(value)
+        start = self.data.find(packed)
+        while start != -1:
+            if start % _HASH_BYTES == 0:
+                yield start // _HASH_BYTES
+            start = self.data.find(packed, start + 1)
+
+    def __len__(self) -> int:
+        return len(self.data) // _HASH_BYTES
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+
+class _AddressColumn(_Column):
+    """
+    Dictionary encoded addresses, each distinct address is held once and rows
+    hold its 4 byte code. Code 0 is None
+    """
+
+    def __init__(
+        self,
+        codes: array[int] | None = None,
+        values: list[str | None] | None = None,
+        lookup: dict[str | None, int] | None = None,
+    ) -> None:
+        self.codes = codes if codes is not None else array("I")
+        self.values: list[str | None] = values if values is not None else [None]
+        self.lookup: dict[str | None, int] = lookup if lookup is not None else {None: 0}
+
+    def code(self, value: str | None) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Any) -> None:
+        self.codes.append(self.code(value))
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[self.codes[index]]
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        codes = self.codes
+        # the dictionary is shared, codes added by either column stay valid
+        return _AddressColumn(
+            array("I", [codes[i] for i in indices]), self.values, self.lookup
+        )
+
+    def positions(self, value: Any) -> Iterator[int]:
+        code = self.lookup.get(value)
+        if code is None:
+            return iter(())
+        return (i for i, c in enumerate(self.codes) if c == code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes)
+
+
+class _NullableColumn(_Column):
+    """Column of optional values, holding a placeholder where the value is None"""
+
+    def __init__(self, column: _Column, placeholder: Any, nulls: bytearray) -> None:
+        self.column = column
+        self.placeholder = placeholder
+        self.nulls = nulls
+
+    def append(self, value: Any) -> None:
+        self.nulls.append(value is None)
+        self.column.append(self.placeholder if value is None else value)
+
+    def __getitem__(self, index: int) -> Any:
+        return None if self.nulls[index] else self.column[index]
+
+    def take(self, indices: Sequence[int]) -> _Column:
+        nulls = self.nulls
+        return _NullableColumn(
+            self.column.take(indices),
+            self.placeholder,
+            bytearray(nulls[i] for i in indices),
+        )
+
+    def positions(self, value: Any) -> Iterator[int]:
+        if value is None:
+            return (i for i, null in enumerate(self.nulls) if null)
+        return (i for i in self.column.positions(value) if not self.nulls[i])
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    @property
+    def nbytes(self) -> int:
+        return self.column.nbytes + len(self.nulls)
+
+
+def _new_column(name: str, annotation: Any) -> _Column:
+    optional = False
+    if get_origin(annotation) in (Union, UnionType):
+        (annotation,) = [i for i in get_args(annotation) if i is not type(None)]
+        optional = True
+    if nested_model(annotation) is not None:
+        raise TypeError(f"Field {name} holds nested objects, which are not supported")
+
+    column: _Column
+    placeholder: Any
+    if annotation is str and name.endswith("AddressHash"):
+        return _AddressColumn()
+    if annotation is int:
+        column, placeholder = _IntColumn(), 0
+    elif annotation is Decimal:
+        column, placeholder = _AmountColumn(), 0
+    elif annotation is str and (name == "hash" or name.endswith("Hash")):
+        column, placeholder = _HashColumn(), "0x" + "00" * _HASH_BYTES
+    elif annotation is str:
+        column, placeholder = _StringColumn(), ""
+    elif annotation is BinaryData:
+        column, placeholder = _BinaryColumn(), "0x"
+    else:
+        raise TypeError(f"Field {name} of type {annotation!r} is not supported")
+    return _NullableColumn(column, placeholder, bytearray()) if optional else column
+
+
+def _relay_id(type_name: str, local_id: str) -> str:
+    return base64.b64encode(f"{type_name}:{local_id}".encode()).decode()
+
+
+_DERIVED_IDS: dict[type[BaseModel], Callable[[dict[str, Any]], str]] = {
+    TokenTransfer: lambda row: _relay_id(
+        "TokenTransfer",
+        f'{{"log_index":{row["logIndex"]},'
+        f'"transaction_hash":"{row["transactionHash"]}"}}',
+    ),
+    Transaction: lambda row: _relay_id("Transaction", row["hash"]),
+}
+"""
+Relay ids of rows, made from other fields of the row. Ids matching them are not
+stored but built again when rows are read
+"""
+
+
+def _derived_id(model: type[BaseModel]) -> Callable[[dict[str, Any]], str] | None:
+    for base, derive in _DERIVED_IDS.items():
+        if issubclass(model, base):
+            return derive
+    return None
+
+
+def _is_amount(column: _Column) -> bool:
+    if isinstance(column, _NullableColumn):
+        column = column.column
+    return isinstance(column, _AmountColumn)
+
+
+def _values_getter(row: Any) -> Callable[[Any, str], Any]:
+    if isinstance(row, dict):
+        return dict.__getitem__
+    # models and records both have their fields as attributes
+    return getattr
+
+
+class ColumnBatch(Generic[ModelT]):
+    """
+    Compact batch of rows of a flat model, such as TokenTransfer or Transaction,
+    stored a column per field rather than an object per row.
+
+    Integers are held in typed arrays and amounts as arrays of 64 bit words, so
+    no Decimal or int objects are kept, even for 256 bit signature values.
+    Address hashes are dictionary encoded, so each distinct address is held
+    once. Transaction hashes are packed as 32 bytes, BinaryData fields are held
+    decoded and other strings as utf-8. Ids of token transfers and transactions
+    are made from their transaction hash, so are not stored. Rows take around a
+    fifteenth of the memory of models.
+
+    Rows are built only when read, in any output mode, and filters and
+    aggregates work on the columns directly.
+    Args:
+        model: pydantic model describing the rows
+        rows: rows to add, in any output mode, e.g. a page iterator such as
+            iter_token_transfers. Only one row is held at a time
+
+    Raises:
+        TypeError: if the model has fields of a type that can not be stored
+        ValueError: if an amount is negative or not a whole number, or a
+            transaction hash is not 32 bytes
+    """
+
+    def __init__(self, model: type[ModelT], rows: Iterable[Row[ModelT]] = ()) -> None:
+        self.model = model
+        self._derive_id = _derived_id(model)
+        self._columns = {
+            name: _new_column(name, info.annotation)
+            for name, info in model.model_fields.items()
+        }
+        if self._derive_id is not None:
+            # ids are never None, so None marks an id to derive
+            self._columns["id"] = _NullableColumn(_StringColumn(), "", bytearray())
+        self.extend(rows)
+
+    @classmethod
+    def _from_columns(
+        cls, model: type[ModelT], columns: dict[str, _Column]
+    ) -> ColumnBatch[ModelT]:
+        batch = cls.__new__(cls)
+        batch.model = model
+        batch._derive_id = _derived_id(model)
+        batch._columns = columns
+        return batch
+
+    def append(self, row: Row[ModelT]) -> None:
+        """
+        Add a row to the batch
+        Args:
+            row: row in any output mode
+        """
+        self.extend([row])
+
+    def extend(self, rows: Iterable[Row[ModelT]]) -> None:
+        """
+        Add rows to the batch
+        Args:
+            rows: rows in any output mode
+        """
+        value: Callable[[Any, str], Any] | None = None
+        derive_id = self._derive_id
+        columns = list(self._columns.items())
+        for row in rows:
+            if value is None:
+                value = _values_getter(row)
+            data = {name: value(row, name) for name, _ in columns}
+            if derive_id is not None and data["id"] == derive_id(data):
+                data["id"] = None
+            for name, column in columns:
+                column.append(data[name])
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values())))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the column buffers, excluding the address dictionaries"""
+        return sum(i.nbytes for i in self._columns.values())
+
+    def row(self, index: int, mode: OutputMode = "model") -> Row[ModelT]:
+        """
+        Build a single row of the batch
+        Args:
+            index: position of the row
+            mode: output mode for the row
+
+        Returns:
+            The row, with the raw json values returned by the api
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError("ColumnBatch index out of range")
+        return build(self.model, self._data(index % len(self)), mode)
+
+    def _data(self, index: int) -> dict[str, Any]:
+        data = {name: column[index] for name, column in self._columns.items()}
+        if self._derive_id is not None and data["id"] is None:
+            data["id"] = self._derive_id(data)
+        return data
+
+    def rows(self, mode: OutputMode = "model") -> Iterator[Row[ModelT]]:
+        """
+        Build the rows of the batch one at a time
+        Args:
+            mode: output mode for rows
+
+        Returns:
+            Iterator of rows, in the order they were added
+        """
+        return (self.row(i, mode) for i in range(len(self)))
+
+    def __getitem__(self, index: int) -> ModelT:
+        return cast(ModelT, self.row(index))
+
+    def __iter__(self) -> Iterator[ModelT]:
+        return cast(Iterator[ModelT], self.rows())
+
+    def column(self, name: str) -> list[Any]:
+        """
+        Get the values of one field
+        Args:
+            name: field name
+
+        Returns:
+            Values of the field, as in models, e.g. Decimal amounts
+        """
+        column = self._columns[name]
+        if isinstance(column, _AmountColumn):
+            return [Decimal(i) for i in column.integers()]
+        if self._is_derived(name):
+            return [self._data(i)[name] for i in range(len(self))]
+        values = [column[i] for i in range(len(self))]
+        if _is_amount(column):
+            return [None if i is None else Decimal(i) for i in values]
+        return values
+
+    def _is_derived(self, name: str) -> bool:
+        return name == "id" and self._derive_id is not None
+
+    def take(self, indices: Iterable[int]) -> ColumnBatch[ModelT]:
+        """
+        Get a new batch with the rows at the given positions
+        Args:
+            indices: positions of rows, in the order wanted
+
+        Returns:
+            Batch of the rows
+        """
+        indices = list(indices)
+        return self._from_columns(
+            self.model,
+            {name: column.take(indices) for name, column in self._columns.items()},
+        )
+
+    def filter(self, **conditions: Any) -> ColumnBatch[ModelT]:
+        """
+        Get a new batch with only the rows matching every condition, e.g.
+        ``filter(toAddressHash="0x...", blockNumber=lambda i: i >= 4_000_000)``.
+        Equality is tested on the stored columns, without building values
+        Args:
+            conditions: value each field must equal, or a function of the field's
+                value, as in models, returning True for rows to keep
+
+        Returns:
+            Batch of the matching rows, in order
+        """
+        matching: Iterable[int] = range(len(self))
+        for name, condition in conditions.items():
+            if name not in self._columns:
+                raise KeyError(f"{self.model.__name__} has no field {name}")
+            if callable(condition) or self._is_derived(name):
+                test = (
+                    condition
+                    if callable(condition)
+                    else partial(operator.eq, condition)
+                )
+                values = self.column(name)
+                matching = [i for i in matching if test(values[i])]
+            else:
+                positions = set(self._columns[name].positions(condition))
+                matching = [i for i in matching if i in positions]
+        return self.take(matching)
+
+    def _numbers(self, name: str) -> Iterable[int | None]:
+        column = self._columns[name]
+        nulls = bytearray()
+        if isinstance(column, _NullableColumn):
+            nulls, column = column.nulls, column.column
+        if isinstance(column, _AmountColumn):
+            values: Iterable[int] = column.integers()
+        elif isinstance(column, _IntColumn):
+            values = column.values
+        else:
+            raise TypeError(f"Field {name} is not a number")
+        if nulls:
+            return (
+                None if null else value
+                for value, null in zip(values, nulls, strict=True)
+            )
+        return values
+
+    def _total(self, name: str, total: int) -> Decimal | int:
+        return Decimal(total) if _is_amount(self._columns[name]) else total
+
+    def sum(self, name: str) -> Decimal | int:
+        """
+        Add up the values of a field
+        Args:
+            name: name of an integer or amount field
+
+        Returns:
+            Total of the field, ignoring None values
+        """
+        column = self._columns[name]
+        if isinstance(column, _NullableColumn):
+            # None values hold a placeholder of 0
+            column = column.column
+        if isinstance(column, _AmountColumn):
+            return Decimal(column.total())
+        if isinstance(column, _IntColumn):
+            return sum(column.values)
+        raise TypeError(f"Field {name} is not a number")
+
+    def sum_by(self, name: str, by: str) -> dict[Any, Decimal | int]:
+        """
+        Add up the values of a field for each value of another, e.g.
+        ``sum_by("amount", by="toAddressHash")`` for the amount received by each
+        address
+        Args:
+            name: name of an integer or amount field to add up
+            by: name of the field to group by
+
+        Returns:
+            Total of the field by each value of the by field, ignoring None values
+        """
+        column = self._columns[name]
+        keys = self._columns[by]
+        if isinstance(keys, _AddressColumn) and isinstance(column, _AmountColumn):
+            # add up each word by address code, looking each address up once
+            sums = []
+            for word in column.words:
+                word_sums = [0] * len(keys.values)
+                for code, value in zip(keys.codes, word, strict=True):
+                    word_sums[code] += value
+                sums.append(word_sums)
+            return {
+                keys.values[code]: Decimal(_join_words([i[code] for i in sums]))
+                for code in sorted(set(keys.codes))
+            }
+
+        totals: dict[Any, int] = {}
+        for key, number in zip(self.column(by), self._numbers(name), strict=True):
+            if number is not None:
+                totals[key] = totals.get(key, 0) + number
+        return {key: self._total(name, total) for key, total in totals.items()}
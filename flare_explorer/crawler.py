@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Generator, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from types import TracebackType
+
+from pydantic import BaseModel
+
+from flare_explorer.block import MAX_BLOCKS_PER_QUERY, Block, get_blocks
+from flare_explorer.gql_client import Client, get_default_client
+from flare_explorer.serialization import OutputMode, Row
+
+DEFAULT_CRAWL_WORKERS = 8
+
+
+class CrawlStats(BaseModel):
+    blocks: int = 0
+    missing: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.blocks / self.elapsed if self.elapsed else 0.0
+
+
+class BlockCrawl:
+    """
+    Iterate over a range of blocks, fetched in batches on a pool of threads.
+
+    Batches of ``batch_size`` blocks are queried with get_blocks, with up to
+    twice ``workers`` batches fetched or buffered at once. With ``ordered``
+    blocks are yielded in block number order, batches finishing early waiting in
+    a reorder buffer, otherwise each batch is yielded as soon as it arrives.
+
+    ``next_block`` is the block to resume from: every block below it has been
+    yielded. With a ``checkpoint`` file it is saved as the crawl progresses and
+    a crawl started with the same file resumes from it. Blocks yielded out of
+    order above it are yielded again by a resumed crawl.
+    Args:
+        start: first block number
+        end: block number to stop before
+        batch_size: number of blocks per request, at most MAX_BLOCKS_PER_QUERY
+        workers: number of requests in flight at once
+        ordered: yield blocks in order, otherwise in the order batches complete
+        checkpoint: path of a file to save progress to and resume from
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+    """
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        batch_size: int = MAX_BLOCKS_PER_QUERY,
+        workers: int = DEFAULT_CRAWL_WORKERS,
+        ordered: bool = True,
+        checkpoint: str | os.PathLike[str] | None = None,
+        client: Client | None = None,
+        mode: OutputMode | None = None,
+    ) -> None:
+        self.end = end
+        self.batch_size = batch_size
+        self.workers = workers
+        self.ordered = ordered
+        self.checkpoint = checkpoint
+        self.client = client or get_default_client()
+        self.mode = mode or self.client.mode
+        self.next_block = max(start, self._load_checkpoint())
+        self.stats = CrawlStats()
+        self._started: float | None = None
+        self._rows = self._crawl()
+
+    def _load_checkpoint(self) -> int:
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as f:
+            next_block: int = json.load(f)["next_block"]
+            return next_block
+
+    def _save_checkpoint(self) -> None:
+        if self.checkpoint is None:
+            return
+        path = os.fspath(self.checkpoint)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"next_block": self.next_block}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _fetch(self, batch_start: int) -> list[Row[Block] | None]:
+        numbers = list(range(batch_start, min(batch_start + self.batch_size, self.end)))
+        return get_blocks(
+            numbers, batch_size=self.batch_size, client=self.client, mode=self.mode
+        )
+
+    def _emit(self, blocks: list[Row[Block] | None]) -> Iterator[Row[Block]]:
+        for block in blocks:
+            if block is None:
+                self.stats.missing += 1
+                continue
+            self.stats.blocks += 1
+            self._update_elapsed()
+            yield block
+
+    def _update_elapsed(self) -> None:
+        if self._started is not None:
+            self.stats.elapsed = time.monotonic() - self._started
+
+    def _advance(self) -> None:
+        self.next_block = min(self.next_block + self.batch_size, self.end)
+        self._save_checkpoint()
+
+    def _crawl(self) -> Generator[Row[Block], None, None]:
+        self._started = time.monotonic()
+        batch_starts = iter(range(self.next_block, self.end, self.batch_size))
+        pending: dict[Future[list[Row[Block] | None]], int] = {}
+        # batches fetched but not yet yielded, or yielded out of order
+        finished: dict[int, list[Row[Block] | None]] = {}
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                while len(pending) + len(finished) < 2 * self.workers:
+                    batch_start = next(batch_starts, None)
+                    if batch_start is None:
+                        break
+                    pending[executor.submit(self._fetch, batch_start)] = batch_start
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_start = pending.pop(future)
+                    blocks = future.result()
+                    if self.ordered:
+                        finished[batch_start] = blocks
+                        continue
+                    yield from self._emit(blocks)
+                    finished[batch_start] = []
+                while self.next_block in finished:
+                    yield from self._emit(finished.pop(self.next_block))
+                    self._advance()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            self._update_elapsed()
+
+    def __iter__(self) -> BlockCrawl:
+        return self
+
+    def __next__(self) -> Row[Block]:
+        return next(self._rows)
+
+    def close(self) -> None:
+        """Stop crawling and release the worker threads"""
+        self._rows.close()
+
+    def __enter__(self) -> BlockCrawl:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def crawl_blocks(
+    start: int,
+    end: int,
+    batch_size: int = MAX_BLOCKS_PER_QUERY,
+    workers: int = DEFAULT_CRAWL_WORKERS,
+    ordered: bool = True,
+    checkpoint: str | os.PathLike[str] | None = None,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> BlockCrawl:
+    """
+    Crawl the blocks from start up to end, fetching batches of blocks
+    concurrently. Blocks that are not found are skipped
+    Args:
+        start: first block number
+        end: block number to stop before
+        batch_size: number of blocks per request, at most MAX_BLOCKS_PER_QUERY
+        workers: number of requests in flight at once
+        ordered: yield blocks in order, otherwise in the order batches complete
+        checkpoint: path of a file to save progress to and resume from
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of blocks, with throughput in its stats attribute
+    """
+    return BlockCrawl(
+        start,
+        end,
+        batch_size=batch_size,
+        workers=workers,
+        ordered=ordered,
+        checkpoint=checkpoint,
+        client=client,
+        mode=mode,
+    )
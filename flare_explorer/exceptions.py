@@ -8,3 +8,15 @@ class FlareExplorerQueryError(BaseFlareExplorerException):
 
 class QueryComplexityLimit(BaseFlareExplorerException):
     """Too many inputs to flare explorer, api will return complexity error"""
+
+
+class QueryTimeout(BaseFlareExplorerException, TimeoutError):
+    """Query did not finish within its deadline"""
+
+
+class InvalidFieldSelection(BaseFlareExplorerException, ValueError):
+    """Fields requested that are not on the rows of the query"""
+
+
+class AbiDecodingError(BaseFlareExplorerException, ValueError):
+    """Data could not be decoded with the abi it was decoded against"""
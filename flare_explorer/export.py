@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from datetime import datetime
+from decimal import Decimal
+from os import PathLike
+from types import UnionType
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from flare_explorer.binary import BinaryData
+from flare_explorer.serialization import nested_model
+from flare_explorer.transaction import Transaction
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+
+DEFAULT_BATCH_SIZE = 10_000
+
+ColumnTypes = Mapping[str, "pa.DataType"]
+"""Arrow type of columns, by field name, replacing their default type"""
+
+
+def _require_pyarrow() -> None:
+    if pa is None:  # pragma: no cover
+        raise ImportError(
+            "Exporting requires pyarrow, "
+            "install it with: pip install flare-explorer-python[export]"
+        )
+
+
+def _default_types(model: type[BaseModel]) -> dict[str, pa.DataType]:
+    if issubclass(model, Transaction):
+        # signature values use all 256 bits, more digits than any decimal holds
+        return {"r": pa.string(), "s": pa.string()}
+    return {}
+
+
+def _arrow_type(annotation: Any) -> pa.DataType:
+    if get_origin(annotation) in (Union, UnionType):
+        (annotation,) = [i for i in get_args(annotation) if i is not type(None)]
+    if (model := nested_model(annotation)) is not None:
+        return pa.struct(arrow_schema(model))
+    arrow_types = {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        str: pa.string(),
+        Decimal: pa.decimal128(38, 0),
+        datetime: pa.timestamp("us", tz="UTC"),
+        # written as the hex string the api returns, like the other hashes
+        BinaryData: pa.string(),
+    }
+    if annotation not in arrow_types:
+        raise TypeError(f"No arrow type for {annotation!r}")
+    return arrow_types[annotation]
+
+
+def arrow_schema(model: type[BaseModel], types: ColumnTypes | None = None) -> pa.Schema:
+    """
+    Arrow schema for rows of a model. Integers are int64 and Decimals are
+    decimal128(38, 0), so amounts are stored as fixed width integers. Transaction
+    signature values r and s are strings, being too wide for any decimal. Nested
+    objects are structs
+    Args:
+        model: pydantic model describing the rows
+        types: arrow type of columns replacing their default type, e.g.
+            ``{"amount": pa.decimal256(76, 0)}`` for amounts over 38 digits
+
+    Returns:
+        Schema with a column per field of the model, in the model's order
+    """
+    _require_pyarrow()
+    column_types = {**_default_types(model), **(types or {})}
+    return pa.schema(
+        [
+            pa.field(
+                name,
+                column_types.get(name) or _arrow_type(info.annotation),
+                nullable=_is_optional(info.annotation),
+            )
+            for name, info in model.model_fields.items()
+        ]
+    )
+
+
+def _is_optional(annotation: Any) -> bool:
+    return type(None) in get_args(annotation)
+
+
+def _record_values(value: Any) -> Any:
+    if hasattr(value, "_asdict"):
+        # nested records become dicts, which arrow turns into structs
+        return {k: _record_values(v) for k, v in value._asdict().items()}
+    return value
+
+
+def _raw_values(model: type[BaseModel], row: Any) -> Callable[[Any], tuple[Any, ...]]:
+    fields = list(model.model_fields)
+    if isinstance(row, dict):
+        return lambda data: tuple(data[i] for i in fields)
+    if isinstance(row, BaseModel):
+        return lambda data: tuple(data.model_dump(mode="json").values())
+    if any(nested_model(i.annotation) for i in model.model_fields.values()):
+        return lambda data: tuple(_record_values(i) for i in data)
+    return tuple
+
+
+def _column(values: list[Any], arrow_type: pa.DataType, name: str) -> pa.Array:
+    array = pa.array(values)
+    if pa.types.is_decimal(arrow_type) and pa.types.is_string(array.type):
+        # casts wrap around instead of failing on values too wide for the type
+        widest = pc.max(pc.utf8_length(array)).as_py() or 0
+        if widest > arrow_type.precision - arrow_type.scale:
+            raise ValueError(
+                f"Column {name} has values of {widest} digits, wider than "
+                f"{arrow_type}. Pass a wider type for it in types"
+            )
+    return array.cast(arrow_type)
+
+
+def iter_record_batches(
+    rows: Iterable[Any],
+    model: type[BaseModel],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    types: ColumnTypes | None = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Pack rows into arrow record batches, a batch_size rows at a time.
+
+    Rows are buffered as the raw json values of each column and converted to
+    arrow a whole column at a time, so the values are never turned into python
+    Decimals or datetimes. Only one batch of rows is held at a time. Rows may be
+    in any output mode, "dict" being the fastest to fetch and convert.
+    Requires the optional pyarrow dependency
+    (``pip install flare-explorer-python[export]``).
+    Args:
+        rows: rows to pack, e.g. a page iterator such as iter_token_transfers
+        model: pydantic model describing the rows
+        batch_size: number of rows per batch
+        types: arrow type of columns replacing their default type
+
+    Returns:
+        Iterator of record batches with the schema from arrow_schema
+
+    Raises:
+        ValueError: if a decimal column has values too wide for its type
+    """
+    schema = arrow_schema(model, types)
+    raw_values: Callable[[Any], tuple[Any, ...]] | None = None
+    buffer: list[tuple[Any, ...]] = []
+
+    def flush() -> pa.RecordBatch:
+        columns = [
+            _column(list(values), field.type, field.name)
+            for values, field in zip(zip(*buffer, strict=True), schema, strict=True)
+        ]
+        buffer.clear()
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    for row in rows:
+        if raw_values is None:
+            raw_values = _raw_values(model, row)
+        buffer.append(raw_values(row))
+        if len(buffer) >= batch_size:
+            yield flush()
+    if buffer:
+        yield flush()
+
+
+def to_arrow(
+    rows: Iterable[Any],
+    model: type[BaseModel],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    types: ColumnTypes | None = None,
+) -> pa.Table:
+    """
+    Collect rows into an arrow table. Requires the optional pyarrow dependency
+    Args:
+        rows: rows to collect, e.g. a page iterator such as iter_token_transfers
+        model: pydantic model describing the rows
+        batch_size: number of rows converted at a time
+        types: arrow type of columns replacing their default type
+
+    Returns:
+        Table with the schema from arrow_schema
+
+    Raises:
+        ValueError: if a decimal column has values too wide for its type
+    """
+    return pa.Table.from_batches(
+        iter_record_batches(rows, model, batch_size, types),
+        schema=arrow_schema(model, types),
+    )
+
+
+def write_parquet(
+    rows: Iterable[Any],
+    model: type[BaseModel],
+    path: str | PathLike[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    types: ColumnTypes | None = None,
+    compression: str = "zstd",
+) -> int:
+    """
+    Write rows to a parquet file a batch at a time, so memory use is bounded by
+    batch_size rather than the number of rows. Requires the optional pyarrow
+    dependency
+    Args:
+        rows: rows to write, e.g. a page iterator such as iter_token_transfers
+        model: pydantic model describing the rows
+        path: file to write
+        batch_size: number of rows per row group
+        types: arrow type of columns replacing their default type
+        compression: parquet compression codec
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: if a decimal column has values too wide for its type
+    """
+    written = 0
+    schema = arrow_schema(model, types)
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for batch in iter_record_batches(rows, model, batch_size, types):
+            writer.write_batch(batch)
+            written += batch.num_rows
+    return written
+
+
+def write_csv(
+    rows: Iterable[Any],
+    model: type[BaseModel],
+    path: str | PathLike[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    types: ColumnTypes | None = None,
+) -> int:
+    """
+    Write rows to a csv file with a header row, a batch at a time, so memory use
+    is bounded by batch_size rather than the number of rows. Nested objects can
+    not be written to csv. Requires the optional pyarrow dependency
+    Args:
+        rows: rows to write, e.g. a page iterator such as iter_token_transfers
+        model: pydantic model describing the rows
+        path: file to write
+        batch_size: number of rows converted at a time
+        types: arrow type of columns replacing their default type
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: if a decimal column has values too wide for its type
+    """
+    written = 0
+    schema = arrow_schema(model, types)
+    with pa_csv.CSVWriter(path, schema) as writer:
+        for batch in iter_record_batches(rows, model, batch_size, types):
+            writer.write_batch(batch)
+            written += batch.num_rows
+    return written
@@ -1,20 +1,53 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import threading
+import weakref
 from abc import ABC, abstractmethod
-from functools import cached_property
-from typing import Any
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import cached_property, lru_cache, partial
+from types import TracebackType
+from typing import Any, TypeVar
 
+import requests
 from gql import Client as GqlClient
 from gql import gql
-from gql.transport import Transport
+from gql.client import AsyncClientSession, SyncClientSession
+from gql.transport import AsyncTransport, Transport
+from gql.transport.exceptions import TransportQueryError, TransportServerError
 from gql.transport.requests import RequestsHTTPTransport
+from graphql import DocumentNode
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter, Retry
 
+from flare_explorer.cache import Cache, cache_key, query_text
+from flare_explorer.coalescing import AsyncSingleFlight, SingleFlight
 from flare_explorer.exceptions import (
     FlareExplorerQueryError,
+    QueryComplexityLimit,
 )
+from flare_explorer.retry import DEFAULT_RECONNECT_EXCEPTIONS, RetryPolicy
+from flare_explorer.serialization import OutputMode
+from flare_explorer.throttling import (
+    AdaptiveConcurrency,
+    AsyncAdaptiveConcurrency,
+    RateLimiter,
+    is_throttling_error,
+)
+
+T = TypeVar("T")
 
 API_URL = "https://flare-explorer.flare.network/api/v1/graphql"
+WEBSOCKET_URL = "wss://flare-explorer.flare.network/socket/websocket"
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_HEARTBEAT_INTERVAL = 30.0
+PARSED_QUERY_CACHE_SIZE = 256
 
 
 class PageInfo(BaseModel):
@@ -24,14 +57,166 @@ class PageInfo(BaseModel):
     startCursor: str | None
 
 
-def generate_after_pagination_query_line(previous_cursor: str | None) -> str:
-    return f'after: "{previous_cursor}"' if previous_cursor else ""
+def chunked(items: list[T], size: int) -> list[list[T]]:
+    """
+    Split items into consecutive chunks
+    Args:
+        items: items to split
+        size: maximum size of each chunk
+
+    Returns:
+        List of chunks in order
+    """
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+@lru_cache(maxsize=PARSED_QUERY_CACHE_SIZE)
+def parse_query(query: str) -> DocumentNode:
+    """
+    Parse a query str into a graphql document. Documents are cached, so a query
+    str is only parsed the first time it is seen
+    Args:
+        query: query str
+
+    Returns:
+        Parsed query document
+    """
+    return gql(query)
+
+
+@lru_cache(maxsize=PARSED_QUERY_CACHE_SIZE)
+def aliased_query(
+    root: str, argument: str, argument_type: str, count: int, selection: str
+) -> DocumentNode:
+    """
+    Build a query selecting the same root field count times, each under an alias
+    (a0, a1, ...) with its argument passed in a variable (v0, v1, ...) so many
+    lookups are sent in one request. Documents are cached per batch size
+    Args:
+        root: root field to select, e.g. block
+        argument: name of the argument of the root field, e.g. number
+        argument_type: graphql type of the argument, e.g. Int!
+        count: number of lookups
+        selection: fields to select for each lookup
+
+    Returns:
+        Parsed query document, to be sent with aliased_variables
+    """
+    variables = ", ".join(f"$v{i}: {argument_type}" for i in range(count))
+    roots = " ".join(
+        f"a{i}: {root}({argument}: $v{i}) {{ {selection} }}" for i in range(count)
+    )
+    return gql(f"query ({variables}) {{ {roots} }}")
+
+
+def aliased_variables(values: list[Any]) -> dict[str, Any]:
+    """
+    Variables for an aliased_query
+    Args:
+        values: argument value for each lookup
+
+    Returns:
+        Variable values keyed by variable name
+    """
+    return {f"v{i}": value for i, value in enumerate(values)}
+
+
+def unpack_aliased_response(
+    keys: list[T], data: dict[str, Any], errors: list[dict[str, Any]]
+) -> dict[T, dict[str, Any] | None]:
+    """
+    Split the response of an aliased_query back into one result per lookup
+    Args:
+        keys: key for each lookup, in the order they were passed to aliased_query
+        data: data returned for the query
+        errors: errors returned for the query
+
+    Returns:
+        Result for each key, None where the api reported the lookup not found
+
+    Raises:
+        FlareExplorerQueryError: if any lookup failed for a reason other than not
+            being found
+    """
+    failures = [
+        error["message"]
+        for error in errors
+        if not error.get("path") or "not found" not in error["message"].lower()
+    ]
+    if failures:
+        raise FlareExplorerQueryError("; ".join(failures))
+    return {key: data.get(f"a{i}") for i, key in enumerate(keys)}
+
+
+def _as_document(query: str | DocumentNode) -> DocumentNode:
+    return parse_query(query) if isinstance(query, str) else query
+
+
+def _timeouts(
+    connect_timeout: float | None, read_timeout: float | None, remaining: float | None
+) -> tuple[float | None, float | None]:
+    if remaining is None:
+        return connect_timeout, read_timeout
+    return (
+        remaining if connect_timeout is None else min(connect_timeout, remaining),
+        remaining if read_timeout is None else min(read_timeout, remaining),
+    )
+
+
+def raise_for_complexity_error(error: TransportQueryError) -> None:
+    """
+    Re-raise a query error as QueryComplexityLimit if the api rejected the query
+    for being too complex
+    Args:
+        error: error returned for the query
+
+    Raises:
+        QueryComplexityLimit: if the error is a complexity error
+    """
+    if "complex" in str(error).lower():
+        raise QueryComplexityLimit(str(error)) from error
+
+
+class PooledRequestsHTTPTransport(RequestsHTTPTransport):
+    """Requests transport whose session keeps a sized pool of keep-alive connections"""
+
+    def __init__(
+        self,
+        *args: Any,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+    def connect(self) -> None:
+        super().connect()
+        # without retries, errors are raised as is rather than as retries running out
+        max_retries = (
+            Retry(
+                total=self.retries,
+                backoff_factor=self.retry_backoff_factor,
+                status_forcelist=self.retry_status_forcelist,
+                allowed_methods=None,
+            )
+            if self.retries
+            else 0
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=max_retries,
+        )
+        for prefix in "http://", "https://":
+            self.session.mount(prefix, adapter)  # type: ignore[attr-defined]
 
 
 class BaseClient(ABC):
     @property
     @abstractmethod
-    def _transport(self) -> Transport:
+    def _transport(self) -> Transport | AsyncTransport:
         """Over-ridden transport for each child class"""
 
     @cached_property
@@ -40,23 +225,678 @@ class BaseClient(ABC):
 
 
 class Client(BaseClient):
+    """
+    Synchronous client for flares graphql api.
+
+    The underlying HTTP session is opened on first use and kept alive, so
+    repeated queries re-use pooled connections instead of paying a TCP/TLS
+    handshake per call. A client is safe to share between threads.
+    Args:
+        url: graphql endpoint to query
+        pool_connections: number of per-host connection pools to cache
+        pool_maxsize: maximum number of keep-alive connections per host
+        mode: default output mode for rows returned by getters using this client
+        cache: cache to answer repeated queries from, None to always query
+        coalesce: share one request between identical queries made at the same
+            time from different threads
+        rate_limiter: limit on requests started per second, None for no limit
+        concurrency: adaptive limit on requests in flight, backing off when the
+            api throttles, None for no limit
+        retry: when and how often to retry failed requests, defaults to
+            RetryPolicy()
+        deadline: seconds each query, including retries, must finish within,
+            None for no deadline
+        connect_timeout: seconds to wait for a connection, None to wait forever
+        read_timeout: seconds to wait between bytes of a response, None to wait
+            forever
+    """
+
+    def __init__(
+        self,
+        url: str = API_URL,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        mode: OutputMode = "model",
+        cache: Cache | None = None,
+        coalesce: bool = True,
+        rate_limiter: RateLimiter | None = None,
+        concurrency: AdaptiveConcurrency | None = None,
+        retry: RetryPolicy | None = None,
+        deadline: float | None = None,
+        connect_timeout: float | None = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float | None = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.mode: OutputMode = mode
+        self.cache = cache
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry or RetryPolicy()
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._in_flight: SingleFlight[dict[str, Any]] = SingleFlight()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session_lock = threading.Lock()
+        self._sync_session: SyncClientSession | None = None
+
+    @cached_property
+    def _transport(self) -> PooledRequestsHTTPTransport:
+        return PooledRequestsHTTPTransport(
+            url=self.url,
+            verify=True,
+            # retried by the client's retry policy instead
+            retries=0,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+
+    @property
+    def _session(self) -> SyncClientSession:
+        with self._session_lock:
+            if self._sync_session is None:
+                self._sync_session = self._client.connect_sync()
+            return self._sync_session
+
+    def close(self) -> None:
+        """Close the pooled HTTP session. The client reconnects if used again"""
+        with self._session_lock:
+            if self._sync_session is not None:
+                self._client.close_sync()
+                self._sync_session = None
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def query(
+        self, query: str | DocumentNode, variables: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """
+        Query flares graphql api
+        Args:
+            query: parsed query document, or query str to parse
+            variables: values of the variables used in the query
+
+        Returns:
+            contents of the data key returned from flare
+
+        Raises:
+            FlareExplorerQueryError: if no response received or response is empty
+            QueryComplexityLimit: if the api rejects the query as too complex
+        """
+        document = _as_document(query)
+        key = cache_key(document, variables)
+        if self.cache is not None:
+            cached = self.cache.lookup(key)
+            if cached is not None:
+                return cached
+        if self.coalesce:
+            return self._in_flight.do(
+                key, partial(self._fetch, document, variables, key)
+            )
+        return self._fetch(document, variables, key)
+
+    def _fetch(
+        self, document: DocumentNode, variables: dict[str, Any] | None, key: str
+    ) -> dict[str, Any]:
+        response = self.retry.call(
+            partial(self._attempt, document, variables), self.deadline
+        )
+        if self.cache is not None:
+            self.cache.store(document, key, response)
+        return response
+
+    def _attempt(
+        self,
+        document: DocumentNode,
+        variables: dict[str, Any] | None,
+        remaining: float | None,
+    ) -> dict[str, Any]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.concurrency is None:
+            return self._send(document, variables, remaining)
+        token = self.concurrency.acquire()
+        throttled = False
+        try:
+            return self._send(document, variables, remaining)
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            raise
+        finally:
+            self.concurrency.release(token, throttled)
+
+    def _send(
+        self,
+        document: DocumentNode,
+        variables: dict[str, Any] | None,
+        remaining: float | None,
+    ) -> dict[str, Any]:
+        timeout = _timeouts(self.connect_timeout, self.read_timeout, remaining)
+        try:
+            response = self._session.execute(
+                document, variable_values=variables, extra_args={"timeout": timeout}
+            )
+        except TransportQueryError as e:
+            raise_for_complexity_error(e)
+            raise
+        if not response:
+            raise FlareExplorerQueryError("No response received from GraphQL API")
+        return response
+
+    def query_stream(
+        self, query: str | DocumentNode, variables: dict[str, Any] | None = None
+    ) -> requests.Response:
+        """
+        Query flares graphql api, returning the response before its body is
+        read so it can be decoded as it arrives. Failed requests are retried, but
+        responses are neither cached nor shared between identical queries
+        Args:
+            query: parsed query document, or query str to parse
+            variables: values of the variables used in the query
+
+        Returns:
+            Response with an unread body, to be closed by the caller
+
+        Raises:
+            TransportServerError: if the api responds with an error status
+        """
+        document = _as_document(query)
+        return self.retry.call(
+            partial(self._open_stream, document, variables), self.deadline
+        )
+
+    def _open_stream(
+        self,
+        document: DocumentNode,
+        variables: dict[str, Any] | None,
+        remaining: float | None,
+    ) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        # connects the transport, opening its pooled session
+        self._session  # noqa: B018
+        session: requests.Session = self._transport.session  # type: ignore[assignment]
+        response = session.post(
+            self.url,
+            json={"query": query_text(document), "variables": variables or {}},
+            timeout=_timeouts(self.connect_timeout, self.read_timeout, remaining),
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            response.close()
+            raise TransportServerError(str(e), response.status_code) from e
+        response.raw.decode_content = True
+        return response
+
+    def query_partial(
+        self, query: str | DocumentNode, variables: dict[str, Any] | None = None
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """
+        Query flares graphql api, keeping the data of any parts of the query that
+        succeeded when others fail
+        Args:
+            query: parsed query document, or query str to parse
+            variables: values of the variables used in the query
+
+        Returns:
+            Tuple[
+                contents of the data key returned from flare,
+                errors returned from flare
+            ]
+
+        Raises:
+            FlareExplorerQueryError: if no response received or response is empty
+            QueryComplexityLimit: if the api rejects the query as too complex
+        """
+        try:
+            return self.query(query, variables), []
+        except TransportQueryError as e:
+            return e.data or {}, e.errors or []
+
+
+_default_client: Client | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> Client:
+    """
+    Get the process-wide client used by getters when no client is passed in.
+    It is created on first use
+
+    Returns:
+        The shared client
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = Client()
+        return _default_client
+
+
+def set_default_client(client: Client | None) -> None:
+    """
+    Replace the process-wide client used by getters when no client is passed in.
+    The previous default client is closed
+    Args:
+        client: client to share, or None to lazily create a fresh default
+    """
+    global _default_client
+    with _default_client_lock:
+        previous, _default_client = _default_client, client
+    if previous is not None and previous is not client:
+        previous.close()
+
+
+class AsyncClient(BaseClient):
+    """
+    Asyncio client for flares graphql api. Requires the optional aiohttp
+    dependency (``pip install flare-explorer-python[asyncio]``).
+
+    All queries share one aiohttp connection pool, opened on first use inside the
+    running event loop, and at most ``max_concurrency`` queries are in flight at
+    once so thousands of lookups can be gathered without exhausting sockets.
+    Args:
+        url: graphql endpoint to query
+        pool_maxsize: maximum number of open connections in the pool
+        max_concurrency: maximum number of queries in flight at once
+        mode: default output mode for rows returned by getters using this client
+        cache: cache to answer repeated queries from, None to always query
+        coalesce: share one request between identical queries made at the same
+            time from different tasks
+        rate_limiter: limit on requests started per second, None for no limit
+        concurrency: adaptive limit on requests in flight, backing off when the
+            api throttles, None to only limit by max_concurrency
+        retry: when and how often to retry failed requests, defaults to
+            RetryPolicy()
+        deadline: seconds each query, including retries, must finish within,
+            None for no deadline
+        connect_timeout: seconds to wait for a connection, None to wait forever
+        read_timeout: seconds to wait between bytes of a response, None to wait
+            forever
+    """
+
+    def __init__(
+        self,
+        url: str = API_URL,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        mode: OutputMode = "model",
+        cache: Cache | None = None,
+        coalesce: bool = True,
+        rate_limiter: RateLimiter | None = None,
+        concurrency: AsyncAdaptiveConcurrency | None = None,
+        retry: RetryPolicy | None = None,
+        deadline: float | None = None,
+        connect_timeout: float | None = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float | None = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.mode: OutputMode = mode
+        self.cache = cache
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry or RetryPolicy()
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._in_flight: AsyncSingleFlight[dict[str, Any]] = AsyncSingleFlight()
+        self.pool_maxsize = pool_maxsize
+        self.max_concurrency = max_concurrency
+        self._session_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._async_session: AsyncClientSession | None = None
+
+    @cached_property
+    def _transport(self) -> AsyncTransport:
+        try:
+            import aiohttp
+            from gql.transport.aiohttp import AIOHTTPTransport
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "AsyncClient requires aiohttp, "
+                "install it with: pip install flare-explorer-python[asyncio]"
+            ) from e
+        return AIOHTTPTransport(
+            url=self.url,
+            ssl=True,
+            client_session_args={
+                "connector": aiohttp.TCPConnector(limit=self.pool_maxsize)
+            },
+        )
+
     @cached_property
-    def _transport(self) -> RequestsHTTPTransport:
-        return RequestsHTTPTransport(url=API_URL, verify=True, retries=3)
+    def _request_timeout(self) -> Any:
+        import aiohttp
+
+        # the deadline, if any, is enforced around each attempt by the retry policy
+        return aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
+
+    async def _session(self) -> AsyncClientSession:
+        async with self._session_lock:
+            if self._async_session is None:
+                self._async_session = await self._client.connect_async()
+            return self._async_session
 
-    def query(self, query: str) -> dict[str, Any]:
+    async def close(self) -> None:
+        """Close the connection pool. The client reconnects if used again"""
+        async with self._session_lock:
+            if self._async_session is not None:
+                await self._client.close_async()
+                self._async_session = None
+                # the connector is closed along with the session, so a fresh
+                # transport is built if the client is used again
+                del self._transport
+                del self._client
+
+    async def __aenter__(self) -> AsyncClient:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def query(
+        self, query: str | DocumentNode, variables: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
         """
         Query flares graphql api
         Args:
-            query: query str
+            query: parsed query document, or query str to parse
+            variables: values of the variables used in the query
 
         Returns:
             contents of the data key returned from flare
 
         Raises:
             FlareExplorerQueryError: if no response received or response is empty
+            QueryComplexityLimit: if the api rejects the query as too complex
         """
-        response = self._client.execute(gql(query))
+        document = _as_document(query)
+        key = cache_key(document, variables)
+        if self.cache is not None:
+            cached = self.cache.lookup(key)
+            if cached is not None:
+                return cached
+        if self.coalesce:
+            return await self._in_flight.do(
+                key, partial(self._fetch, document, variables, key)
+            )
+        return await self._fetch(document, variables, key)
+
+    async def _fetch(
+        self, document: DocumentNode, variables: dict[str, Any] | None, key: str
+    ) -> dict[str, Any]:
+        response = await self.retry.call_async(
+            partial(self._attempt, document, variables), self.deadline
+        )
+        if self.cache is not None:
+            self.cache.store(document, key, response)
+        return response
+
+    async def _attempt(
+        self,
+        document: DocumentNode,
+        variables: dict[str, Any] | None,
+        remaining: float | None,
+    ) -> dict[str, Any]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        if self.concurrency is None:
+            return await self._send(document, variables)
+        token = await self.concurrency.acquire()
+        throttled = False
+        try:
+            return await self._send(document, variables)
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            raise
+        finally:
+            await self.concurrency.release(token, throttled)
+
+    async def _send(
+        self, document: DocumentNode, variables: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        async with self._semaphore:
+            session = await self._session()
+            try:
+                response = await session.execute(
+                    document,
+                    variable_values=variables,
+                    extra_args={"timeout": self._request_timeout},
+                )
+            except TransportQueryError as e:
+                raise_for_complexity_error(e)
+                raise
         if not response:
             raise FlareExplorerQueryError("No response received from GraphQL API")
         return response
+
+    async def query_partial(
+        self, query: str | DocumentNode, variables: dict[str, Any] | None = None
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """
+        Query flares graphql api, keeping the data of any parts of the query that
+        succeeded when others fail
+        Args:
+            query: parsed query document, or query str to parse
+            variables: values of the variables used in the query
+
+        Returns:
+            Tuple[
+                contents of the data key returned from flare,
+                errors returned from flare
+            ]
+
+        Raises:
+            FlareExplorerQueryError: if no response received or response is empty
+            QueryComplexityLimit: if the api rejects the query as too complex
+        """
+        try:
+            return await self.query(query, variables), []
+        except TransportQueryError as e:
+            return e.data or {}, e.errors or []
+
+
+_default_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+def get_default_async_client() -> AsyncClient:
+    """
+    Get the client used by async getters when no client is passed in.
+    One client, and so one connection pool, is shared per running event loop
+
+    Returns:
+        The shared async client for the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _default_async_clients.get(loop)
+    if client is None:
+        client = _default_async_clients[loop] = AsyncClient()
+    return client
+
+
+class SubscriptionClient(BaseClient):
+    """
+    Websocket client for subscriptions to flares graphql api. Requires the
+    optional websockets dependency
+    (``pip install flare-explorer-python[websockets]``).
+
+    The api is served by Absinthe, so subscriptions are sent over a Phoenix
+    channel. All subscriptions made with a client share one websocket, opened
+    on first use inside the running event loop. When the connection drops it is
+    reopened and subscriptions are made again, waiting between attempts as set
+    by ``retry``.
+    Args:
+        url: websocket endpoint to subscribe to
+        mode: default output mode for rows returned by subscriptions using this
+            client
+        retry: when and how often to reconnect, defaults to retrying dropped
+            connections with backoff up to 10 attempts in a row
+        heartbeat_interval: seconds between heartbeats keeping the channel open
+        connect_timeout: seconds to wait for a connection, None to wait forever
+    """
+
+    def __init__(
+        self,
+        url: str = WEBSOCKET_URL,
+        mode: OutputMode = "model",
+        retry: RetryPolicy | None = None,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        connect_timeout: float | None = DEFAULT_CONNECT_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.mode: OutputMode = mode
+        self.retry = retry or RetryPolicy(
+            max_attempts=10,
+            backoff=0.5,
+            max_backoff=30.0,
+            exceptions=DEFAULT_RECONNECT_EXCEPTIONS,
+        )
+        self.heartbeat_interval = heartbeat_interval
+        self.connect_timeout = connect_timeout
+        self._session_lock = asyncio.Lock()
+        self._async_session: AsyncClientSession | None = None
+
+    @cached_property
+    def _transport(self) -> AsyncTransport:
+        try:
+            from gql.transport.phoenix_channel_websockets import (
+                PhoenixChannelWebsocketsTransport,
+            )
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "SubscriptionClient requires websockets, "
+                "install it with: pip install flare-explorer-python[websockets]"
+            ) from e
+        return PhoenixChannelWebsocketsTransport(
+            url=self.url,
+            heartbeat_interval=self.heartbeat_interval,
+            connect_timeout=self.connect_timeout,
+        )
+
+    async def _session(self) -> AsyncClientSession:
+        async with self._session_lock:
+            if self._async_session is None:
+                self._async_session = await self._client.connect_async()
+            return self._async_session
+
+    async def _discard(self, session: AsyncClientSession) -> None:
+        async with self._session_lock:
+            # another subscription may already have reconnected
+            if self._async_session is session:
+                await self._disconnect()
+
+    async def _disconnect(self) -> None:
+        if self._async_session is not None:
+            with contextlib.suppress(*self.retry.exceptions):
+                await self._client.close_async()
+            self._async_session = None
+            del self._transport
+            del self._client
+
+    async def close(self) -> None:
+        """Close the websocket. The client reconnects if used again"""
+        async with self._session_lock:
+            await self._disconnect()
+
+    async def __aenter__(self) -> SubscriptionClient:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def subscribe(
+        self,
+        query: str | DocumentNode,
+        variables: dict[str, Any] | None = None,
+        backfill: Callable[[], Awaitable[list[dict[str, Any]]]] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Subscribe to flares graphql api, reconnecting if the connection drops
+        Args:
+            query: parsed subscription document, or subscription str to parse
+            variables: values of the variables used in the subscription
+            backfill: called after reconnecting, before subscribing again, to
+                fetch results missed while disconnected
+
+        Returns:
+            Async iterator of the contents of the data key of each result,
+            including those returned by backfill
+
+        Raises:
+            TransportQueryError: if the api rejects the subscription
+        """
+        document = _as_document(query)
+        failures = 0
+        while True:
+            session = None
+            try:
+                session = await self._session()
+                if failures and backfill is not None:
+                    for data in await backfill():
+                        yield data
+                async with contextlib.aclosing(
+                    session.subscribe(document, variable_values=variables)
+                ) as results:
+                    async for data in results:
+                        failures = 0
+                        yield data
+                return
+            except Exception as e:
+                failures += 1
+                if failures >= self.retry.max_attempts or not self.retry.is_retryable(
+                    e
+                ):
+                    raise
+                if session is not None:
+                    await self._discard(session)
+            await asyncio.sleep(self.retry.delay(failures))
+
+
+_default_subscription_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, SubscriptionClient
+] = weakref.WeakKeyDictionary()
+
+
+def get_default_subscription_client() -> SubscriptionClient:
+    """
+    Get the client used by subscriptions when no client is passed in.
+    One client, and so one websocket, is shared per running event loop
+
+    Returns:
+        The shared subscription client for the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _default_subscription_clients.get(loop)
+    if client is None:
+        client = _default_subscription_clients[loop] = SubscriptionClient()
+    return client
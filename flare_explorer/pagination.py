@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import Generic, TypeVar
+
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import PageInfo
+
+RowT = TypeVar("RowT")
+
+PageFetcher = Callable[[str | None, int], tuple[list[RowT], PageInfo]]
+
+
+def validate_page_size(page_size: int, max_page_size: int) -> None:
+    """
+    Check a requested page size is within the api complexity limit
+    Args:
+        page_size: requested number of rows per page
+        max_page_size: largest page size the query allows
+
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to max_page_size
+    """
+    if not 1 <= page_size <= max_page_size:
+        raise QueryComplexityLimit(
+            f"Page size must be between 1 and {max_page_size}, got {page_size}"
+        )
+
+
+class AdaptivePageSize:
+    """
+    Page size that grows while the api accepts it and backs off when a page is
+    rejected as too complex.
+
+    Sizes grow geometrically after each successful page up to ``max_page_size``.
+    A complexity error caps future sizes below the rejected one and retries
+    halfway between the last accepted and the rejected size, so the largest
+    accepted size is found in a few round trips.
+    Args:
+        initial: page size to start with
+        max_page_size: largest page size to try
+        growth: factor the page size grows by after a successful page
+    """
+
+    def __init__(self, initial: int, max_page_size: int, growth: float = 2.0) -> None:
+        self.size = initial
+        self.ceiling = max_page_size
+        self.growth = growth
+        self.last_accepted = 0
+
+    def accepted(self) -> None:
+        """Record that a page of the current size was accepted"""
+        self.last_accepted = max(self.last_accepted, self.size)
+        self.size = min(self.ceiling, max(self.size + 1, int(self.size * self.growth)))
+
+    def rejected(self) -> bool:
+        """
+        Record that a page of the current size was rejected as too complex
+
+        Returns:
+            True if a smaller page size is available to retry with
+        """
+        if self.size <= 1:
+            return False
+        self.ceiling = self.size - 1
+        self.size = max(1, (self.last_accepted + self.size) // 2)
+        return True
+
+
+class PageIterator(Generic[RowT]):
+    """
+    Iterate rows of a cursor paginated getter, fetching pages lazily.
+
+    At most the page being consumed and the next (prefetched) page are held in
+    memory. While rows of a page are being handed out the next page is fetched in
+    a background thread, so network time overlaps with the caller's processing.
+
+    ``cursor`` is the cursor to resume from: the end cursor of the last page
+    whose rows have all been yielded. Passing it as ``previous_cursor`` to a new
+    iterator continues where this one stopped (rows of a partially consumed page
+    are yielded again).
+
+    With ``adaptive`` the page size starts at ``page_size`` and is tuned with
+    AdaptivePageSize, retrying pages the api rejects as too complex with a
+    smaller size.
+    Args:
+        fetch_page: getter called with the previous cursor and a page size
+        previous_cursor: cursor to start after, None starts at the first page
+        page_size: number of rows per page
+        max_items: stop after yielding this many rows
+        max_pages: stop after fetching this many pages
+        prefetch: fetch the next page in the background
+        adaptive: grow the page size until the api rejects it, then back off
+        max_page_size: largest page size adaptive sizing will try
+    """
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher[RowT],
+        previous_cursor: str | None = None,
+        page_size: int = 10,
+        max_items: int | None = None,
+        max_pages: int | None = None,
+        prefetch: bool = True,
+        adaptive: bool = False,
+        max_page_size: int | None = None,
+    ) -> None:
+        self._fetch_page = fetch_page
+        self.page_size = page_size
+        self.adaptive_page_size = (
+            AdaptivePageSize(page_size, max_page_size or page_size)
+            if adaptive
+            else None
+        )
+        self.cursor = previous_cursor
+        self.max_items = max_items
+        self.max_pages = max_pages
+        self.prefetch = prefetch
+        self.items = 0
+        self.pages = 0
+        self._rows: list[RowT] = []
+        self._index = 0
+        self._page_end_cursor: str | None = previous_cursor
+        self._has_next_page = True
+        self._next_page: Future[tuple[list[RowT], PageInfo]] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __iter__(self) -> PageIterator[RowT]:
+        return self
+
+    def __next__(self) -> RowT:
+        while self.max_items is None or self.items < self.max_items:
+            if self._index < len(self._rows):
+                row = self._rows[self._index]
+                self._index += 1
+                self.items += 1
+                if self._index == len(self._rows):
+                    self.cursor = self._page_end_cursor
+                return row
+            if not self._load_next_page():
+                break
+        self.close()
+        raise StopIteration
+
+    def _can_fetch(self) -> bool:
+        return self._has_next_page and (
+            self.max_pages is None or self.pages < self.max_pages
+        )
+
+    def _load_next_page(self) -> bool:
+        if self._next_page is not None:
+            future, self._next_page = self._next_page, None
+            rows, page_info = future.result()
+        elif self._can_fetch():
+            rows, page_info = self._fetch(self._page_end_cursor)
+        else:
+            return False
+        self.pages += 1
+        self._rows, self._index = rows, 0
+        self._page_end_cursor = page_info.endCursor or self._page_end_cursor
+        if not rows:
+            self.cursor = self._page_end_cursor
+        self._has_next_page = page_info.hasNextPage and page_info.endCursor is not None
+        if self.prefetch and self._can_fetch() and not self._item_budget_spent(rows):
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._next_page = self._executor.submit(self._fetch, self._page_end_cursor)
+        return True
+
+    def _fetch(self, previous_cursor: str | None) -> tuple[list[RowT], PageInfo]:
+        page_sizes = self.adaptive_page_size
+        if page_sizes is None:
+            return self._fetch_page(previous_cursor, self.page_size)
+        while True:
+            try:
+                page = self._fetch_page(previous_cursor, page_sizes.size)
+            except QueryComplexityLimit:
+                if not page_sizes.rejected():
+                    raise
+                continue
+            page_sizes.accepted()
+            return page
+
+    def _item_budget_spent(self, rows: list[RowT]) -> bool:
+        return self.max_items is not None and self.items + len(rows) >= self.max_items
+
+    def close(self) -> None:
+        """Stop iterating and release the background prefetch thread"""
+        self._has_next_page = False
+        self._rows, self._index = [], 0
+        if self._next_page is not None:
+            self._next_page.cancel()
+            self._next_page = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __enter__(self) -> PageIterator[RowT]:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
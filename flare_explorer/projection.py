@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from copy import deepcopy
+from functools import cache, lru_cache
+from typing import Any, TypeVar, cast, get_args
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    OperationDefinitionNode,
+    parse,
+    print_ast,
+)
+from pydantic import BaseModel, create_model
+
+from flare_explorer.exceptions import InvalidFieldSelection
+from flare_explorer.gql_client import PARSED_QUERY_CACHE_SIZE, parse_query
+from flare_explorer.serialization import nested_model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+Fields = Sequence[str]
+"""
+Fields of a row to fetch. Fields of nested objects are selected with a dotted
+path, e.g. ``smartContract.name``; naming a nested object selects all its fields
+"""
+
+_Tree = tuple[tuple[str, Any], ...]
+
+
+def _tree(model: type[BaseModel], fields: Fields) -> _Tree:
+    selected: dict[str, set[str] | None] = {}
+    for field in fields:
+        name, _, rest = field.partition(".")
+        if name not in model.model_fields:
+            raise InvalidFieldSelection(f"{model.__name__} has no field {name!r}")
+        nested = nested_model(model.model_fields[name].annotation)
+        if rest and nested is None:
+            raise InvalidFieldSelection(
+                f"{model.__name__}.{name} has no fields, got {field!r}"
+            )
+        if not rest:
+            selected[name] = None
+        elif (subfields := selected.setdefault(name, set())) is not None:
+            subfields.add(rest)
+
+    tree: list[tuple[str, Any]] = []
+    for name in model.model_fields:
+        if name not in selected:
+            continue
+        nested = nested_model(model.model_fields[name].annotation)
+        subfields = selected[name]
+        if nested is None:
+            tree.append((name, None))
+        elif subfields is None:
+            tree.append((name, _tree(nested, list(nested.model_fields))))
+        else:
+            tree.append((name, _tree(nested, sorted(subfields))))
+    return tuple(tree)
+
+
+def field_tree(model: type[BaseModel], fields: Fields) -> _Tree:
+    """
+    Validate a field selection and normalize it into a hashable tree, with
+    fields in the model's order and nested objects expanded
+    Args:
+        model: pydantic model describing the row
+        fields: fields of the row to fetch
+
+    Returns:
+        Tuple of (field name, tree of its nested fields or None)
+
+    Raises:
+        InvalidFieldSelection: if no fields are given or a field is not on the
+            model
+    """
+    if isinstance(fields, str) or not fields:
+        raise InvalidFieldSelection(
+            f"fields must be a non-empty list of field names, got {fields!r}"
+        )
+    return _tree(model, fields)
+
+
+def _selection(tree: _Tree) -> str:
+    return " ".join(
+        name if nested is None else f"{name} {{ {_selection(nested)} }}"
+        for name, nested in tree
+    )
+
+
+def selection(model: type[BaseModel], fields: Fields | None) -> str:
+    """
+    Graphql selection of the fields of a row
+    Args:
+        model: pydantic model describing the row
+        fields: fields of the row to fetch, None for all of them
+
+    Returns:
+        Selection str, e.g. ``hash smartContract { name }``
+
+    Raises:
+        InvalidFieldSelection: if a field is not on the model
+    """
+    if fields is None:
+        fields = list(model.model_fields)
+    return _selection(field_tree(model, fields))
+
+
+@cache
+def _partial_model(model: type[BaseModel], tree: _Tree) -> type[BaseModel]:
+    if tree == field_tree(model, list(model.model_fields)):
+        return model
+    definitions: dict[str, Any] = {}
+    for name, nested in tree:
+        info = model.model_fields[name]
+        annotation: Any = info.annotation
+        if nested is not None:
+            nested_partial = _partial_model(
+                cast(type[BaseModel], nested_model(annotation)), nested
+            )
+            annotation = (
+                nested_partial | None
+                if type(None) in get_args(annotation)
+                else nested_partial
+            )
+        definitions[name] = (annotation, info.default)
+    return create_model(f"Partial{model.__name__}", **definitions)
+
+
+def partial_model(model: type[ModelT], fields: Fields | None) -> type[ModelT]:
+    """
+    Get the model of rows fetched with a field selection. It has the selected
+    fields of the model, with the same types, and nothing else. Partial models
+    are cached, so each selection builds its model once
+    Args:
+        model: pydantic model describing the row
+        fields: fields of the row to fetch, None for all of them
+
+    Returns:
+        The model itself if fields is None or selects every field, otherwise a
+        model with only the selected fields
+
+    Raises:
+        InvalidFieldSelection: if a field is not on the model
+    """
+    if fields is None:
+        return model
+    return cast(type[ModelT], _partial_model(model, field_tree(model, fields)))
+
+
+@lru_cache(maxsize=PARSED_QUERY_CACHE_SIZE)
+def _project_query(
+    document: DocumentNode, path: tuple[str, ...], selection: str
+) -> DocumentNode:
+    projected = deepcopy(document)
+    node: Any = projected.definitions[0]
+    for name in path:
+        node = next(
+            i
+            for i in node.selection_set.selections
+            if isinstance(i, FieldNode) and i.name.value == name
+        )
+    operation = cast(
+        OperationDefinitionNode, parse(f"{{ {selection} }}").definitions[0]
+    )
+    node.selection_set = operation.selection_set
+    # reparsed so the document's source, which cache keys and streamed requests
+    # are built from, is the projected query rather than the full one
+    return parse_query(print_ast(projected))
+
+
+def project_query(
+    document: DocumentNode,
+    path: tuple[str, ...],
+    model: type[ModelT],
+    fields: Fields | None,
+) -> tuple[DocumentNode, type[ModelT]]:
+    """
+    Narrow a query to the selected fields of its rows. Projected documents are
+    cached, so each selection is only built once
+    Args:
+        document: query selecting every field of its rows
+        path: names of the fields leading to the rows, e.g.
+            ``("address", "transactions", "edges", "node")``
+        model: pydantic model describing each row
+        fields: fields of the rows to fetch, None for all of them
+
+    Returns:
+        Tuple[
+            query selecting only the given fields,
+            model to build the rows with, see partial_model
+        ]
+
+    Raises:
+        InvalidFieldSelection: if a field is not on the model
+    """
+    if fields is None:
+        return document, model
+    projected = _project_query(document, path, selection(model, fields))
+    return projected, partial_model(model, fields)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Collection
+from typing import TypeVar
+
+import requests
+from gql.transport.exceptions import TransportClosed, TransportServerError
+
+from flare_explorer.exceptions import QueryTimeout
+
+try:
+    from aiohttp import ClientConnectionError
+
+    _ASYNC_CONNECTION_ERRORS: tuple[type[Exception], ...] = (ClientConnectionError,)
+except ImportError:  # pragma: no cover
+    _ASYNC_CONNECTION_ERRORS = ()
+
+try:
+    from websockets.exceptions import ConnectionClosed
+
+    _WEBSOCKET_ERRORS: tuple[type[Exception], ...] = (ConnectionClosed,)
+except ImportError:  # pragma: no cover
+    _WEBSOCKET_ERRORS = ()
+
+T = TypeVar("T")
+
+DEFAULT_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_RETRY_EXCEPTIONS: tuple[type[Exception], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    asyncio.TimeoutError,
+    TimeoutError,
+    *_ASYNC_CONNECTION_ERRORS,
+)
+# a dropped or refused websocket connection, or the server not answering the join
+DEFAULT_RECONNECT_EXCEPTIONS: tuple[type[Exception], ...] = (
+    TransportClosed,
+    OSError,
+    asyncio.TimeoutError,
+    *_WEBSOCKET_ERRORS,
+)
+
+
+class RetryPolicy:
+    """
+    When and how often to retry a failed request.
+
+    A request is retried if it failed with a response status in ``statuses`` or
+    raised one of ``exceptions``, up to ``max_attempts`` attempts in total. The
+    wait before retry n is drawn uniformly from 0 to backoff * 2 ** (n - 1),
+    capped at ``max_backoff`` ("full jitter"), so clients failing together do
+    not retry in lockstep.
+    Args:
+        max_attempts: attempts in total, 1 to never retry
+        backoff: base wait in seconds, doubled on each retry
+        max_backoff: longest wait in seconds between attempts
+        jitter: randomise waits, otherwise wait the full backoff
+        statuses: response statuses to retry
+        exceptions: exceptions to retry, such as connection errors and timeouts
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        jitter: bool = True,
+        statuses: Collection[int] = DEFAULT_RETRY_STATUSES,
+        exceptions: tuple[type[Exception], ...] = DEFAULT_RETRY_EXCEPTIONS,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+        self.exceptions = exceptions
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Check if a failed request should be retried
+        Args:
+            error: error the request failed with
+
+        Returns:
+            True if the error is retryable
+        """
+        if isinstance(error, TransportServerError):
+            return error.code in self.statuses
+        return isinstance(error, self.exceptions)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Seconds to wait after a failed attempt
+        Args:
+            attempt: number of the attempt that failed, from 1
+
+        Returns:
+            wait in seconds
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def call(self, fn: Callable[[float | None], T], deadline: float | None = None) -> T:
+        """
+        Call fn, retrying it on retryable errors
+        Args:
+            fn: attempt to make, passed the seconds left until the deadline
+            deadline: seconds all attempts and waits must finish within, None for
+                no deadline
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            QueryTimeout: if the deadline passes
+        """
+        start = time.monotonic()
+        error: Exception | None = None
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = _remaining(start, deadline)
+            if remaining is not None and remaining <= 0:
+                raise QueryTimeout(
+                    f"Query did not finish within {deadline}s"
+                ) from error
+            try:
+                return fn(remaining)
+            except Exception as e:
+                error = e
+                if attempt >= self.max_attempts or not self.is_retryable(e):
+                    self._raise_timeout_if_expired(start, deadline, e)
+                    raise
+            time.sleep(self._wait(attempt, start, deadline))
+
+    async def call_async(
+        self,
+        fn: Callable[[float | None], Awaitable[T]],
+        deadline: float | None = None,
+    ) -> T:
+        """
+        Await fn, retrying it on retryable errors. Attempts still running when
+        the deadline passes are cancelled
+        Args:
+            fn: attempt to make, passed the seconds left until the deadline
+            deadline: seconds all attempts and waits must finish within, None for
+                no deadline
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            QueryTimeout: if the deadline passes
+        """
+        start = time.monotonic()
+        error: Exception | None = None
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = _remaining(start, deadline)
+            if remaining is not None and remaining <= 0:
+                raise QueryTimeout(
+                    f"Query did not finish within {deadline}s"
+                ) from error
+            try:
+                return await asyncio.wait_for(fn(remaining), remaining)
+            except Exception as e:
+                error = e
+                if attempt >= self.max_attempts or not self.is_retryable(e):
+                    self._raise_timeout_if_expired(start, deadline, e)
+                    raise
+            await asyncio.sleep(self._wait(attempt, start, deadline))
+
+    def _wait(self, attempt: int, start: float, deadline: float | None) -> float:
+        remaining = _remaining(start, deadline)
+        delay = self.delay(attempt)
+        return delay if remaining is None else max(0.0, min(delay, remaining))
+
+    @staticmethod
+    def _raise_timeout_if_expired(
+        start: float, deadline: float | None, error: Exception
+    ) -> None:
+        remaining = _remaining(start, deadline)
+        if remaining is not None and remaining <= 0:
+            raise QueryTimeout(f"Query did not finish within {deadline}s") from error
+
+
+def _remaining(start: float, deadline: float | None) -> float | None:
+    return None if deadline is None else deadline - (time.monotonic() - start)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from collections.abc import Callable
+from functools import cache
+from operator import itemgetter
+from typing import Any, Literal, TypeAlias, TypeVar, get_args
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+OutputMode = Literal["model", "dict", "record"]
+"""
+How rows are returned by getters:
+    model: validated pydantic models (default)
+    dict: the decoded json exactly as returned by the api
+    record: lightweight named tuples of the raw json values, built with no validation
+"""
+
+Record = tuple[Any, ...]
+
+Row: TypeAlias = ModelT | Record | dict[str, Any]
+
+
+def nested_model(annotation: Any) -> type[BaseModel] | None:
+    """
+    Get the model of a field holding a nested object
+    Args:
+        annotation: type annotation of the field
+
+    Returns:
+        The pydantic model in the annotation, None if it has none
+    """
+    candidates = get_args(annotation) if get_args(annotation) else (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+@cache
+def record_type(model: type[BaseModel]) -> type[Record]:
+    """
+    Get the record type used for a model in "record" mode.
+    Records are named tuples (so have no per-instance __dict__) with the model's
+    fields in the same order, holding the raw json values
+    Args:
+        model: pydantic model class
+
+    Returns:
+        Named tuple class for the model
+    """
+    return namedtuple(f"{model.__name__}Record", list(model.model_fields))
+
+
+@cache
+def _record_builder(model: type[BaseModel]) -> Callable[[dict[str, Any]], Record]:
+    record = record_type(model)
+    fields = list(model.model_fields)
+    getter: Callable[[dict[str, Any]], Any] = itemgetter(*fields)
+    if len(fields) == 1:
+        # itemgetter of a single name returns the value rather than a tuple
+        (field,) = fields
+
+        def getter(data: dict[str, Any]) -> tuple[Any]:
+            return (data[field],)
+
+    nested = {
+        index: field_model
+        for index, name in enumerate(fields)
+        if (field_model := nested_model(model.model_fields[name].annotation))
+    }
+    new = tuple.__new__
+
+    if not nested:
+
+        def build_flat(data: dict[str, Any]) -> Record:
+            return new(record, getter(data))
+
+        return build_flat
+
+    def build_nested(data: dict[str, Any]) -> Record:
+        values = list(getter(data))
+        for index, field_model in nested.items():
+            if values[index] is not None:
+                values[index] = _record_builder(field_model)(values[index])
+        return new(record, values)
+
+    return build_nested
+
+
+def build(model: type[ModelT], data: dict[str, Any], mode: OutputMode) -> Row[ModelT]:
+    """
+    Build a single row of a response in the requested output mode
+    Args:
+        model: pydantic model describing the row
+        data: decoded json for the row
+        mode: output mode
+
+    Returns:
+        The row as a model, record or dict
+    """
+    if mode == "model":
+        return model(**data)
+    if mode == "record":
+        return _record_builder(model)(data)
+    return data
+
+
+def build_many(
+    model: type[ModelT], data: list[dict[str, Any]], mode: OutputMode
+) -> list[Row[ModelT]]:
+    """
+    Build a list of rows of a response in the requested output mode
+    Args:
+        model: pydantic model describing each row
+        data: decoded json for each row
+        mode: output mode
+
+    Returns:
+        The rows as models, records or dicts
+    """
+    if mode == "model":
+        return [model(**i) for i in data]
+    if mode == "record":
+        builder = _record_builder(model)
+        return [builder(i) for i in data]
+    return data  # type: ignore[return-value]
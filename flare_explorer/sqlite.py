@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+
+
+class SqliteConnections:
+    """
+    Connections to one sqlite database, one per thread and process. sqlite
+    connections cannot be shared between threads or carried over a fork, so
+    each thread opens its own on first use, and again after a fork.
+
+    Connections are in autocommit mode with write ahead logging, so readers
+    are not blocked by a process writing to the same file.
+
+    Args:
+        path: path of the database file, created if missing
+        timeout: seconds to wait for another process holding the write lock
+    """
+
+    def __init__(self, path: str, timeout: float) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Connection for the calling thread, opened if it has none yet"""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Close the calling thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Generator, Iterator
+from types import TracebackType
+from typing import Any, Generic, TypeVar
+
+import requests
+from gql.transport.exceptions import TransportQueryError
+
+from flare_explorer.gql_client import PageInfo, raise_for_complexity_error
+
+RowT = TypeVar("RowT")
+
+_START_EVENTS = {"start_map", "start_array"}
+_END_EVENTS = {"end_map", "end_array"}
+
+
+class ResponseStream(Generic[RowT]):
+    """
+    Iterate rows of a graphql response as its body is read.
+
+    The body is decoded incrementally with ijson, so only the row being built
+    is held in memory rather than the whole response, its parsed json and its
+    rows at once. Each object found at ``prefix``, an ijson prefix such as
+    ``data.addresses.item``, is passed to ``build`` and yielded.
+
+    Errors returned by the api are raised once the body has been read, after the
+    rows decoded before them. ``page_info``, if a ``page_info_prefix`` is given,
+    is set once the page info has been read: at the end for the queries in this
+    package, which select it after the rows.
+    Requires the optional ijson dependency
+    (``pip install flare-explorer-python[streaming]``).
+    Args:
+        open_response: sends the query, returning the response with its body
+            unread
+        prefix: ijson prefix of each row in the response
+        build: turns the decoded json of a row into the row returned
+        page_info_prefix: ijson prefix of the page info of a paginated query
+    """
+
+    def __init__(
+        self,
+        open_response: Callable[[], requests.Response],
+        prefix: str,
+        build: Callable[[Any], RowT],
+        page_info_prefix: str | None = None,
+    ) -> None:
+        try:
+            import ijson
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "ResponseStream requires ijson, "
+                "install it with: pip install flare-explorer-python[streaming]"
+            ) from e
+        self._ijson = ijson
+        self.prefix = prefix
+        self.page_info_prefix = page_info_prefix
+        self.page_info: PageInfo | None = None
+        self._build = build
+        self._response = open_response()
+        self._rows = self._decode()
+
+    def _decode(self) -> Generator[RowT, None, None]:
+        errors: list[dict[str, Any]] = []
+        with self._response:
+            events = self._ijson.parse(self._response.raw, use_float=True)
+            for prefix, event, value in events:
+                if prefix == self.prefix:
+                    yield self._build(self._value(events, prefix, event, value))
+                elif prefix == self.page_info_prefix and event == "start_map":
+                    page_info = self._value(events, prefix, event, value)
+                    self.page_info = PageInfo(**page_info)
+                elif prefix == "errors" and event == "start_array":
+                    errors = self._value(events, prefix, event, value)
+        if errors:
+            error = TransportQueryError(str(errors[0]), errors=errors)
+            raise_for_complexity_error(error)
+            raise error
+
+    def _value(
+        self,
+        events: Iterator[tuple[str, str, Any]],
+        prefix: str,
+        event: str,
+        value: Any,
+    ) -> Any:
+        if event not in _START_EVENTS:
+            return value
+        builder = self._ijson.ObjectBuilder()
+        builder.event(event, value)
+        for inner_prefix, inner_event, inner_value in events:
+            builder.event(inner_event, inner_value)
+            if inner_prefix == prefix and inner_event in _END_EVENTS:
+                break
+        return builder.value
+
+    def __iter__(self) -> ResponseStream[RowT]:
+        return self
+
+    def __next__(self) -> RowT:
+        return next(self._rows)
+
+    def close(self) -> None:
+        """Stop reading and release the connection"""
+        self._rows.close()
+        self._response.close()
+
+    def __enter__(self) -> ResponseStream[RowT]:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from gql.transport.exceptions import TransportServerError
+from requests.exceptions import RetryError
+
+from flare_explorer.exceptions import QueryComplexityLimit
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """
+    Check if a query failed because the api is overloaded or limiting the client:
+    a 429 or 5xx response, retries of those running out, or a complexity error
+    Args:
+        error: error raised by the query
+
+    Returns:
+        True if the client should slow down
+    """
+    if isinstance(error, TransportServerError):
+        return error.code is not None and (error.code == 429 or error.code >= 500)
+    return isinstance(error, QueryComplexityLimit | RetryError)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many requests are started per second. Up to
+    ``burst`` requests can start at once, after which they are spaced out to
+    ``rate`` per second. Safe to share between threads, and between clients to
+    limit them together.
+    Args:
+        rate: requests per second
+        burst: requests that can start at once, defaults to rate
+    """
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # tokens go negative to queue callers behind each other
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Block until a request may start"""
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait until a request may start"""
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AimdLimit:
+    """
+    Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Each successful request raises the limit by 1 / limit, so by about one
+    request per round of ``limit`` successes. A throttling error multiplies it by
+    ``backoff``. Requests started before the last decrease cannot decrease it
+    again, so a burst of failures from one overloaded moment backs off once.
+    Args:
+        initial: limit to start with
+        minimum: lowest the limit can fall to
+        maximum: highest the limit can grow to
+        backoff: factor the limit is multiplied by on a throttling error
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL_CONCURRENCY,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_CONCURRENCY,
+        backoff: float = 0.5,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.in_flight = 0
+        self._epoch = 0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _start(self) -> int:
+        self.in_flight += 1
+        return self._epoch
+
+    def _finish(self, epoch: int, throttled: bool) -> None:
+        self.in_flight -= 1
+        if not throttled:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif epoch == self._epoch:
+            self.limit = max(self.minimum, self.limit * self.backoff)
+            self._epoch += 1
+
+
+class AdaptiveConcurrency(AimdLimit):
+    """
+    AIMD limit on the number of requests in flight from threads. Safe to share
+    between clients to limit them together.
+    """
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL_CONCURRENCY,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_CONCURRENCY,
+        backoff: float = 0.5,
+    ) -> None:
+        super().__init__(initial, minimum, maximum, backoff)
+        self._condition = threading.Condition()
+
+    def acquire(self) -> int:
+        """
+        Block until a request may start
+
+        Returns:
+            token to pass to release
+        """
+        with self._condition:
+            self._condition.wait_for(self._has_capacity)
+            return self._start()
+
+    def release(self, token: int, throttled: bool) -> None:
+        """
+        Record a request finishing
+        Args:
+            token: token returned by acquire
+            throttled: whether the request failed with a throttling error
+        """
+        with self._condition:
+            self._finish(token, throttled)
+            self._condition.notify_all()
+
+
+class AsyncAdaptiveConcurrency(AimdLimit):
+    """AIMD limit on the number of requests in flight from one event loop"""
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_INITIAL_CONCURRENCY,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_CONCURRENCY,
+        backoff: float = 0.5,
+    ) -> None:
+        super().__init__(initial, minimum, maximum, backoff)
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> int:
+        """
+        Wait until a request may start
+
+        Returns:
+            token to pass to release
+        """
+        async with self._condition:
+            await self._condition.wait_for(self._has_capacity)
+            return self._start()
+
+    async def release(self, token: int, throttled: bool) -> None:
+        """
+        Record a request finishing
+        Args:
+            token: token returned by acquire
+            throttled: whether the request failed with a throttling error
+        """
+        async with self._condition:
+            self._finish(token, throttled)
+            self._condition.notify_all()
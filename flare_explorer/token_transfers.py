@@ -1,14 +1,36 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from decimal import Decimal
+from functools import partial
+from typing import Any
 
+from gql import gql
 from pydantic import BaseModel
 
 from flare_explorer.gql_client import (
+    AsyncClient,
     Client,
     PageInfo,
-    generate_after_pagination_query_line,
+    SubscriptionClient,
+    get_default_async_client,
+    get_default_client,
+    get_default_subscription_client,
 )
+from flare_explorer.pagination import PageIterator, validate_page_size
+from flare_explorer.projection import Fields, project_query
+from flare_explorer.serialization import OutputMode, Row, build_many
+from flare_explorer.watch import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    AsyncWatcher,
+    Watcher,
+    WatchPosition,
+)
+
+DEFAULT_PAGE_SIZE = 10
+# estimated from the api's query complexity limit
+MAX_PAGE_SIZE = 100
 
 
 class TokenTransfer(BaseModel):
@@ -23,52 +45,352 @@ class TokenTransfer(BaseModel):
     transactionHash: str
 
 
+_TOKEN_TRANSFERS_QUERY = gql(
+    """
+    query TokenTransfers(
+        $tokenContractAddressHash: AddressHash!, $first: Int!, $after: String
+    ) {
+        tokenTransfers(
+            first: $first
+            after: $after
+            tokenContractAddressHash: $tokenContractAddressHash
+        ) {
+            edges {
+                node {
+                    amount
+                    blockNumber
+                    fromAddressHash
+                    id
+                    logIndex
+                    toAddressHash
+                    tokenContractAddressHash
+                    tokenId
+                    transactionHash
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+                hasPreviousPage
+                startCursor
+            }
+        }
+    }
+    """
+)
+
+
+_TOKEN_TRANSFERS_SUBSCRIPTION = gql(
+    """
+    subscription TokenTransfers($tokenContractAddressHash: AddressHash!) {
+        tokenTransfers(tokenContractAddressHash: $tokenContractAddressHash) {
+            amount
+            blockNumber
+            fromAddressHash
+            id
+            logIndex
+            toAddressHash
+            tokenContractAddressHash
+            tokenId
+            transactionHash
+        }
+    }
+    """
+)
+
+
+def _token_transfers_variables(
+    token_contract_address_hash: str, previous_cursor: str | None, page_size: int
+) -> dict[str, Any]:
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    return {
+        "tokenContractAddressHash": token_contract_address_hash,
+        "first": page_size,
+        "after": previous_cursor,
+    }
+
+
+_TOKEN_TRANSFERS_PATH = ("tokenTransfers", "edges", "node")
+
+
+def _parse_token_transfers(
+    response: dict[str, Any], model: type[TokenTransfer], mode: OutputMode
+) -> tuple[list[Row[TokenTransfer]], PageInfo]:
+    connection = response["tokenTransfers"]
+    nodes = [i["node"] for i in connection["edges"]]
+    return build_many(model, nodes, mode), PageInfo(**connection["pageInfo"])
+
+
 def get_token_transfers(
-    token_contract_address_hash: str, previous_cursor: str | None = None
-) -> tuple[list[TokenTransfer], PageInfo]:
+    token_contract_address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[TokenTransfer]], PageInfo]:
     """
     Get token transfers for a given contract address hash.
-    Returns in pages of size 10
+    Returns in pages of size page_size
     Args:
         token_contract_address_hash: contract address hash
         previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each token transfer to fetch, e.g.
+            ["amount", "toAddressHash"], defaults to all. Rows then hold only
+            those fields
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Tuple[
             list of token transfers,
             pagination page info
         ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
     """
-    query = (
-        "{"
-        "    tokenTransfers("
-        "        first: 10"
-        f"       {generate_after_pagination_query_line(previous_cursor)}"
-        f'       tokenContractAddressHash: "{token_contract_address_hash}"'
-        "    ){"
-        "        edges {"
-        "            node {"
-        "                amount"
-        "                blockNumber"
-        "                fromAddressHash"
-        "                id"
-        "                logIndex"
-        "                toAddressHash"
-        "                tokenContractAddressHash"
-        "                tokenId"
-        "                transactionHash"
-        "            }"
-        "        }"
-        "        pageInfo {"
-        "            endCursor"
-        "            hasNextPage"
-        "            hasPreviousPage"
-        "            startCursor"
-        "        }"
-        "    }"
-        "}"
+    variables = _token_transfers_variables(
+        token_contract_address_hash, previous_cursor, page_size
     )
-    response = Client().query(query)["tokenTransfers"]
-    return [TokenTransfer(**i["node"]) for i in response["edges"]], PageInfo(
-        **response["pageInfo"]
+    client = client or get_default_client()
+    query, model = project_query(
+        _TOKEN_TRANSFERS_QUERY, _TOKEN_TRANSFERS_PATH, TokenTransfer, fields
     )
+    response = client.query(query, variables)
+    return _parse_token_transfers(response, model, mode or client.mode)
+
+
+async def get_token_transfers_async(
+    token_contract_address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[TokenTransfer]], PageInfo]:
+    """
+    Get token transfers for a given contract address hash.
+    Returns in pages of size page_size
+    Args:
+        token_contract_address_hash: contract address hash
+        previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each token transfer to fetch, e.g.
+            ["amount", "toAddressHash"], defaults to all. Rows then hold only
+            those fields
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Tuple[
+            list of token transfers,
+            pagination page info
+        ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _token_transfers_variables(
+        token_contract_address_hash, previous_cursor, page_size
+    )
+    client = client or get_default_async_client()
+    query, model = project_query(
+        _TOKEN_TRANSFERS_QUERY, _TOKEN_TRANSFERS_PATH, TokenTransfer, fields
+    )
+    response = await client.query(query, variables)
+    return _parse_token_transfers(response, model, mode or client.mode)
+
+
+def iter_token_transfers(
+    token_contract_address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_items: int | None = None,
+    max_pages: int | None = None,
+    prefetch: bool = True,
+    adaptive: bool = False,
+    fields: Fields | None = None,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> PageIterator[Row[TokenTransfer]]:
+    """
+    Iterate over token transfers for a given contract address hash,
+    fetching pages lazily
+    Args:
+        token_contract_address_hash: contract address hash
+        previous_cursor: cursor to resume after, None starts at the first page
+        page_size: number of rows per page, the starting size when adaptive
+        max_items: stop after this many rows
+        max_pages: stop after fetching this many pages
+        prefetch: fetch the next page in the background while rows are consumed
+        adaptive: grow the page size up to MAX_PAGE_SIZE, backing off if the api
+            rejects it as too complex
+        fields: fields of each token transfer to fetch, e.g.
+            ["amount", "toAddressHash"], defaults to all. Rows then hold only
+            those fields
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of token transfers, resumable from its cursor attribute
+    """
+    fetch_page = partial(
+        get_token_transfers,
+        token_contract_address_hash,
+        fields=fields,
+        client=client,
+        mode=mode,
+    )
+    return PageIterator(
+        fetch_page,
+        previous_cursor,
+        page_size=page_size,
+        max_items=max_items,
+        max_pages=max_pages,
+        prefetch=prefetch,
+        adaptive=adaptive,
+        max_page_size=MAX_PAGE_SIZE,
+    )
+
+
+def watch_token_transfers(
+    token_contract_address_hashes: list[str],
+    positions: dict[str, WatchPosition | None] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> Watcher[Row[TokenTransfer]]:
+    """
+    Watch contract addresses for new token transfers, fetching only transfers
+    made since the last poll
+    Args:
+        token_contract_address_hashes: contract address hashes to watch
+        positions: newest transfer already seen for each contract, from a
+            previous watcher's positions attribute. Contracts without one start
+            from their newest transfer
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds, reached by backing
+            off while there are no new transfers
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Watcher polling for new token transfers
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    fetchers = {
+        i: partial(get_token_transfers, i, client=client, mode=mode)
+        for i in token_contract_address_hashes
+    }
+    return Watcher(
+        fetchers,
+        positions,
+        page_size=page_size,
+        min_interval=min_interval,
+        max_interval=max_interval,
+    )
+
+
+def watch_token_transfers_async(
+    token_contract_address_hashes: list[str],
+    positions: dict[str, WatchPosition | None] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> AsyncWatcher[Row[TokenTransfer]]:
+    """
+    Watch contract addresses for new token transfers, fetching only transfers
+    made since the last poll. Iterate the watcher with async for
+    Args:
+        token_contract_address_hashes: contract address hashes to watch
+        positions: newest transfer already seen for each contract, from a
+            previous watcher's positions attribute. Contracts without one start
+            from their newest transfer
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds, reached by backing
+            off while there are no new transfers
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Async watcher polling for new token transfers
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    fetchers = {
+        i: partial(get_token_transfers_async, i, client=client, mode=mode)
+        for i in token_contract_address_hashes
+    }
+    return AsyncWatcher(
+        fetchers,
+        positions,
+        page_size=page_size,
+        min_interval=min_interval,
+        max_interval=max_interval,
+    )
+
+
+async def subscribe_token_transfers(
+    token_contract_address_hash: str,
+    position: WatchPosition | None = None,
+    client: SubscriptionClient | None = None,
+    backfill_client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> AsyncIterator[Row[TokenTransfer]]:
+    """
+    Subscribe to new token transfers for a given contract address hash.
+    Transfers made while the websocket was disconnected are fetched over http
+    when it reconnects, as are transfers made since position when given
+    Args:
+        token_contract_address_hash: contract address hash
+        position: newest transfer already seen, to resume from. None starts from
+            transfers made after subscribing
+        client: subscription client to subscribe with, defaults to the shared
+            subscription client
+        backfill_client: async client to fetch missed transfers with, defaults
+            to the shared async client
+        mode: output mode for rows, defaults to the subscription client's mode
+
+    Returns:
+        Async iterator of token transfers, oldest first
+    """
+    client = client or get_default_subscription_client()
+    mode = mode or client.mode
+    watcher = watch_token_transfers_async(
+        [token_contract_address_hash],
+        positions={token_contract_address_hash: position},
+        page_size=MAX_PAGE_SIZE,
+        client=backfill_client,
+        mode="dict",
+    )
+
+    async def backfill() -> list[dict[str, Any]]:
+        return [{"tokenTransfers": await watcher.poll()}]
+
+    # the first backfill also anchors later ones at the newest transfer when no
+    # position was given
+    for data in await backfill():
+        for token_transfer in build_many(TokenTransfer, data["tokenTransfers"], mode):
+            yield token_transfer
+    async for data in client.subscribe(
+        _TOKEN_TRANSFERS_SUBSCRIPTION,
+        {"tokenContractAddressHash": token_contract_address_hash},
+        backfill,
+    ):
+        nodes = data["tokenTransfers"]
+        if nodes:
+            newest = max(nodes, key=lambda i: (i["blockNumber"], i["logIndex"]))
+            watcher.positions[token_contract_address_hash] = WatchPosition(
+                id=newest["id"], blockNumber=newest["blockNumber"]
+            )
+        for token_transfer in build_many(TokenTransfer, nodes, mode):
+            yield token_transfer
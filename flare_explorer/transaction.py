@@ -1,14 +1,47 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import partial
+from typing import Any
 
-from pydantic import BaseModel
+from gql import gql
+from graphql import DocumentNode
+from pydantic import BaseModel, ConfigDict
 
+from flare_explorer.binary import BinaryData
+from flare_explorer.exceptions import QueryComplexityLimit
 from flare_explorer.gql_client import (
+    AsyncClient,
     Client,
     PageInfo,
-    generate_after_pagination_query_line,
+    aliased_query,
+    aliased_variables,
+    chunked,
+    get_default_async_client,
+    get_default_client,
+    unpack_aliased_response,
 )
+from flare_explorer.pagination import PageIterator, validate_page_size
+from flare_explorer.projection import Fields, partial_model, project_query, selection
+from flare_explorer.serialization import OutputMode, Row, build, build_many
+from flare_explorer.streaming import ResponseStream
+from flare_explorer.watch import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    AsyncWatcher,
+    Watcher,
+    WatchPosition,
+)
+
+DEFAULT_PAGE_SIZE = 5
+# estimated from the api's query complexity limit
+MAX_PAGE_SIZE = 50
+MAX_TRANSACTIONS_PER_QUERY = 10
+DEFAULT_TRACE_CONCURRENCY = 8
 
 
 class InternalTransaction(BaseModel):
@@ -55,156 +88,1162 @@ class Transaction(BaseModel):
     value: Decimal
 
 
-def get_transaction(transaction_hash: str) -> Transaction:
+class BinaryInternalTransaction(InternalTransaction):
+    """Internal transaction with its hex encoded fields decoded on first read"""
+
+    createdContractCode: BinaryData | None  # type: ignore[assignment]
+    init: BinaryData | None  # type: ignore[assignment]
+    input: BinaryData  # type: ignore[assignment]
+    output: BinaryData  # type: ignore[assignment]
+
+
+class BinaryTransaction(Transaction):
+    """Transaction with its hex encoded input decoded on first read"""
+
+    input: BinaryData  # type: ignore[assignment]
+
+
+class TraceCall(BaseModel):
+    """A call in a transaction's call tree, with the calls it made in order"""
+
+    traceAddress: list[int]
+    """Position in the call tree, [] for the transaction's own call"""
+    internalTransaction: Any
+    """Internal transaction of the call, in the output mode it was fetched in"""
+    calls: list[TraceCall]
+
+
+class TransactionTrace(BaseModel):
+    """A transaction with all its internal transactions and their call tree"""
+
+    transaction: Any
+    """The transaction, in the output mode it was fetched in"""
+    internalTransactions: list[Any]
+    """Every internal transaction of the transaction, in the order returned"""
+    calls: list[TraceCall]
+    """Top of the call tree, normally just the transaction's own call"""
+
+
+class TransactionTraceFailure(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    transactionHash: str
+    error: Exception
+
+
+class BulkTransactionTraces(BaseModel):
+    traces: list[TransactionTrace | None]
+    failures: list[TransactionTraceFailure]
+
+
+_TRANSACTION_QUERY = gql(
+    """
+    query Transaction($hash: FullHash!) {
+        transaction(hash: $hash) {
+            blockNumber
+            createdContractAddressHash
+            cumulativeGasUsed
+            error
+            fromAddressHash
+            gas
+            gasPrice
+            gasUsed
+            hash
+            id
+            index
+            input
+            nonce
+            r
+            s
+            status
+            toAddressHash
+            v
+            value
+        }
+    }
+    """
+)
+
+
+def _transactions_query(batch_size: int, fields: Fields | None) -> DocumentNode:
+    return aliased_query(
+        "transaction",
+        "hash",
+        "FullHash!",
+        batch_size,
+        selection(Transaction, fields),
+    )
+
+
+def _transaction_model(binary: bool) -> type[Transaction]:
+    return BinaryTransaction if binary else Transaction
+
+
+def _validate_batch_size(batch_size: int) -> None:
+    if not 1 <= batch_size <= MAX_TRANSACTIONS_PER_QUERY:
+        raise QueryComplexityLimit(
+            "Batch size must be between 1 and "
+            f"{MAX_TRANSACTIONS_PER_QUERY}, got {batch_size}"
+        )
+
+
+_INTERNAL_TRANSACTIONS_QUERY = gql(
+    """
+    query InternalTransactions($hash: FullHash!, $first: Int!, $after: String) {
+        transaction(hash: $hash) {
+            internalTransactions(first: $first, after: $after) {
+                edges {
+                    node {
+                        blockNumber
+                        callType
+                        createdContractAddressHash
+                        createdContractCode
+                        error
+                        fromAddressHash
+                        gas
+                        gasUsed
+                        id
+                        index
+                        init
+                        input
+                        output
+                        toAddressHash
+                        traceAddress
+                        transactionHash
+                        transactionIndex
+                        type
+                        value
+                    }
+                }
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                    hasPreviousPage
+                    startCursor
+                }
+            }
+        }
+    }
+    """
+)
+
+
+def _page_variables(
+    previous_cursor: str | None, page_size: int, **variables: Any
+) -> dict[str, Any]:
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    return {**variables, "first": page_size, "after": previous_cursor}
+
+
+_INTERNAL_TRANSACTIONS_PATH = ("transaction", "internalTransactions", "edges", "node")
+
+
+def _parse_internal_transactions(
+    response: dict[str, Any], model: type[InternalTransaction], mode: OutputMode
+) -> tuple[list[Row[InternalTransaction]], PageInfo]:
+    connection = response["transaction"]["internalTransactions"]
+    nodes = [i["node"] for i in connection["edges"]]
+    return build_many(model, nodes, mode), PageInfo(**connection["pageInfo"])
+
+
+_TRANSACTION_WITH_TRACE_QUERY = gql(
+    """
+    query TransactionWithTrace($hash: FullHash!, $first: Int!, $after: String) {
+        transaction(hash: $hash) {
+            blockNumber
+            createdContractAddressHash
+            cumulativeGasUsed
+            error
+            fromAddressHash
+            gas
+            gasPrice
+            gasUsed
+            hash
+            id
+            index
+            input
+            nonce
+            r
+            s
+            status
+            toAddressHash
+            v
+            value
+            internalTransactions(first: $first, after: $after) {
+                edges {
+                    node {
+                        blockNumber
+                        callType
+                        createdContractAddressHash
+                        createdContractCode
+                        error
+                        fromAddressHash
+                        gas
+                        gasUsed
+                        id
+                        index
+                        init
+                        input
+                        output
+                        toAddressHash
+                        traceAddress
+                        transactionHash
+                        transactionIndex
+                        type
+                        value
+                    }
+                }
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                    hasPreviousPage
+                    startCursor
+                }
+            }
+        }
+    }
+    """
+)
+
+
+def _trace_address(row: Any) -> tuple[int, ...]:
+    value = row["traceAddress"] if isinstance(row, dict) else row.traceAddress
+    return tuple(json.loads(value))
+
+
+def build_call_tree(
+    internal_transactions: Iterable[Row[InternalTransaction]],
+) -> list[TraceCall]:
+    """
+    Build the call tree of a transaction from its internal transactions, each
+    call holding the calls it made as placed by their traceAddress
+    Args:
+        internal_transactions: internal transactions of one transaction in any
+            output mode, with at least their traceAddress field
+
+    Returns:
+        Calls whose caller is not among internal_transactions, normally just the
+        transaction's own call at traceAddress []
+    """
+    # sorted so every caller comes before the calls it made
+    rows = sorted(
+        ((_trace_address(i), i) for i in internal_transactions), key=lambda i: i[0]
+    )
+    calls: dict[tuple[int, ...], TraceCall] = {}
+    top: list[TraceCall] = []
+    for address, row in rows:
+        call = TraceCall.model_construct(
+            traceAddress=list(address), internalTransaction=row, calls=[]
+        )
+        calls[address] = call
+        caller = address[:-1]
+        # a missing caller is skipped over to the nearest call above it
+        while caller and caller not in calls:
+            caller = caller[:-1]
+        parent = calls.get(caller) if address else None
+        (top if parent is None else parent.calls).append(call)
+    return top
+
+
+def _parse_transaction_with_trace(
+    response: dict[str, Any], binary: bool, mode: OutputMode
+) -> tuple[Row[Transaction], list[Row[InternalTransaction]], PageInfo]:
+    internal_transactions, page_info = _parse_internal_transactions(
+        response,
+        BinaryInternalTransaction if binary else InternalTransaction,
+        mode,
+    )
+    # copied, as the response may be shared with the cache or other callers
+    node = {
+        key: value
+        for key, value in response["transaction"].items()
+        if key != "internalTransactions"
+    }
+    return (
+        build(_transaction_model(binary), node, mode),
+        internal_transactions,
+        page_info,
+    )
+
+
+_TRANSACTIONS_FROM_ADDRESS_QUERY = gql(
+    """
+    query TransactionsFromAddress($hash: AddressHash!, $first: Int!, $after: String) {
+        address(hash: $hash) {
+            transactions(first: $first, after: $after) {
+                edges {
+                    node {
+                        blockNumber
+                        createdContractAddressHash
+                        cumulativeGasUsed
+                        error
+                        fromAddressHash
+                        gas
+                        gasPrice
+                        gasUsed
+                        hash
+                        id
+                        index
+                        input
+                        nonce
+                        r
+                        s
+                        status
+                        toAddressHash
+                        v
+                        value
+                    }
+                }
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                    hasPreviousPage
+                    startCursor
+                }
+            }
+        }
+    }
+    """
+)
+
+
+_TRANSACTIONS_FROM_ADDRESS_PATH = ("address", "transactions", "edges", "node")
+
+
+def _parse_transactions_from_address(
+    response: dict[str, Any], model: type[Transaction], mode: OutputMode
+) -> tuple[list[Row[Transaction]], PageInfo]:
+    connection = response["address"]["transactions"]
+    nodes = [i["node"] for i in connection["edges"]]
+    return build_many(model, nodes, mode), PageInfo(**connection["pageInfo"])
+
+
+def get_transaction(
+    transaction_hash: str,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Transaction]:
     """
     Get information about a given transaction
     Args:
         transaction_hash: hash of the transaction
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Information about the transaction
     """
-    query = (
-        "{"
-        f'  transaction(hash: "{transaction_hash}") {{'
-        "    blockNumber"
-        "    createdContractAddressHash"
-        "    cumulativeGasUsed"
-        "    error"
-        "    fromAddressHash"
-        "    gas"
-        "    gasPrice"
-        "    gasUsed"
-        "    hash"
-        "    id"
-        "    index"
-        "    input"
-        "    nonce"
-        "    r"
-        "    s"
-        "    status"
-        "    toAddressHash"
-        "    v"
-        "    value"
-        "  }"
-        "}"
-    )
-    response = Client().query(query)
-    return Transaction(**response["transaction"])
+    client = client or get_default_client()
+    query, model = project_query(
+        _TRANSACTION_QUERY, ("transaction",), _transaction_model(binary), fields
+    )
+    response = client.query(query, {"hash": transaction_hash})
+    return build(model, response["transaction"], mode or client.mode)
+
+
+async def get_transaction_async(
+    transaction_hash: str,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> Row[Transaction]:
+    """
+    Get information about a given transaction
+    Args:
+        transaction_hash: hash of the transaction
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about the transaction
+    """
+    client = client or get_default_async_client()
+    query, model = project_query(
+        _TRANSACTION_QUERY, ("transaction",), _transaction_model(binary), fields
+    )
+    response = await client.query(query, {"hash": transaction_hash})
+    return build(model, response["transaction"], mode or client.mode)
+
+
+def get_transactions(
+    transaction_hashes: list[str],
+    batch_size: int = MAX_TRANSACTIONS_PER_QUERY,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Transaction] | None]:
+    """
+    Get information about many transactions, packing up to batch_size lookups
+    into each request
+    Args:
+        transaction_hashes: hashes of the transactions
+        batch_size: number of transactions per request, at most
+            MAX_TRANSACTIONS_PER_QUERY
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about each transaction in the order of transaction_hashes,
+        None for transactions that were not found
+
+    Raises:
+        QueryComplexityLimit: if batch_size is outside 1 to
+            MAX_TRANSACTIONS_PER_QUERY
+        FlareExplorerQueryError: if a lookup failed other than not being found
+    """
+    _validate_batch_size(batch_size)
+    client = client or get_default_client()
+    mode = mode or client.mode
+    model = partial_model(_transaction_model(binary), fields)
+    transactions: dict[str, Row[Transaction] | None] = {}
+    unique_hashes = list(dict.fromkeys(i.lower() for i in transaction_hashes))
+    for batch in chunked(unique_hashes, batch_size):
+        data, errors = client.query_partial(
+            _transactions_query(len(batch), fields), aliased_variables(batch)
+        )
+        for key, transaction in unpack_aliased_response(batch, data, errors).items():
+            transactions[key] = (
+                None if transaction is None else build(model, transaction, mode)
+            )
+    return [transactions[i.lower()] for i in transaction_hashes]
+
+
+async def get_transactions_async(
+    transaction_hashes: list[str],
+    batch_size: int = MAX_TRANSACTIONS_PER_QUERY,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> list[Row[Transaction] | None]:
+    """
+    Get information about many transactions, packing up to batch_size lookups
+    into each request and sending the requests concurrently
+    Args:
+        transaction_hashes: hashes of the transactions
+        batch_size: number of transactions per request, at most
+            MAX_TRANSACTIONS_PER_QUERY
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Information about each transaction in the order of transaction_hashes,
+        None for transactions that were not found
+
+    Raises:
+        QueryComplexityLimit: if batch_size is outside 1 to
+            MAX_TRANSACTIONS_PER_QUERY
+        FlareExplorerQueryError: if a lookup failed other than not being found
+    """
+    _validate_batch_size(batch_size)
+    client = client or get_default_async_client()
+    mode = mode or client.mode
+    model = partial_model(_transaction_model(binary), fields)
+    unique_hashes = list(dict.fromkeys(i.lower() for i in transaction_hashes))
+    batches = chunked(unique_hashes, batch_size)
+    responses = await asyncio.gather(
+        *(
+            client.query_partial(
+                _transactions_query(len(i), fields), aliased_variables(i)
+            )
+            for i in batches
+        )
+    )
+    transactions: dict[str, Row[Transaction] | None] = {}
+    for batch, (data, errors) in zip(batches, responses, strict=True):
+        for key, transaction in unpack_aliased_response(batch, data, errors).items():
+            transactions[key] = (
+                None if transaction is None else build(model, transaction, mode)
+            )
+    return [transactions[i.lower()] for i in transaction_hashes]
 
 
 def get_internal_transactions(
-    transaction_hash: str, previous_cursor: str | None = None
-) -> tuple[list[InternalTransaction], PageInfo]:
+    transaction_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[InternalTransaction]], PageInfo]:
     """
     Get internal transactions for a given transaction.
-    Returns in pages of size 5
+    Returns in pages of size page_size
     Args:
         transaction_hash: hash of the transaction
         previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each internal transaction to fetch, e.g.
+            ["toAddressHash", "value"], defaults to all. Rows then hold only
+            those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Tuple[
             list of internal transactions,
             pagination page info
         ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
     """
-    query = (
-        "{"
-        f'   transaction(hash: "{transaction_hash}"){{'
-        f"        internalTransactions(first: 5 {generate_after_pagination_query_line(previous_cursor)}){{"
-        "            edges{"
-        "                node{"
-        "                    blockNumber"
-        "                    callType"
-        "                    createdContractAddressHash"
-        "                    createdContractCode"
-        "                    error"
-        "                    fromAddressHash"
-        "                    gas"
-        "                    gasUsed"
-        "                    id"
-        "                    index"
-        "                    init"
-        "                    input"
-        "                    output"
-        "                    toAddressHash"
-        "                    traceAddress"
-        "                    transactionHash"
-        "                    transactionIndex"
-        "                    type"
-        "                    value"
-        "                }"
-        "            }"
-        "            pageInfo{"
-        "                endCursor"
-        "                hasNextPage"
-        "                hasPreviousPage"
-        "                startCursor"
-        "            }"
-        "        }"
-        "    }"
-        "}"
-    )
-    response = Client().query(query)["transaction"]["internalTransactions"]
-    return [InternalTransaction(**i["node"]) for i in response["edges"]], PageInfo(
-        **response["pageInfo"]
+    variables = _page_variables(previous_cursor, page_size, hash=transaction_hash)
+    client = client or get_default_client()
+    query, model = project_query(
+        _INTERNAL_TRANSACTIONS_QUERY,
+        _INTERNAL_TRANSACTIONS_PATH,
+        BinaryInternalTransaction if binary else InternalTransaction,
+        fields,
     )
+    response = client.query(query, variables)
+    return _parse_internal_transactions(response, model, mode or client.mode)
+
+
+async def get_internal_transactions_async(
+    transaction_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[InternalTransaction]], PageInfo]:
+    """
+    Get internal transactions for a given transaction.
+    Returns in pages of size page_size
+    Args:
+        transaction_hash: hash of the transaction
+        previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each internal transaction to fetch, e.g.
+            ["toAddressHash", "value"], defaults to all. Rows then hold only
+            those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Tuple[
+            list of internal transactions,
+            pagination page info
+        ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(previous_cursor, page_size, hash=transaction_hash)
+    client = client or get_default_async_client()
+    query, model = project_query(
+        _INTERNAL_TRANSACTIONS_QUERY,
+        _INTERNAL_TRANSACTIONS_PATH,
+        BinaryInternalTransaction if binary else InternalTransaction,
+        fields,
+    )
+    response = await client.query(query, variables)
+    return _parse_internal_transactions(response, model, mode or client.mode)
+
+
+def get_transaction_with_trace(
+    transaction_hash: str,
+    page_size: int = MAX_PAGE_SIZE,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> TransactionTrace:
+    """
+    Get a transaction with all its internal transactions and their call tree.
+    The transaction and the first page of internal transactions are fetched in
+    one request, any further pages follow one request each
+    Args:
+        transaction_hash: hash of the transaction
+        page_size: number of internal transactions per page, at most MAX_PAGE_SIZE
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        The transaction, its internal transactions and their call tree
+
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(None, page_size, hash=transaction_hash)
+    client = client or get_default_client()
+    mode = mode or client.mode
+    response = client.query(_TRANSACTION_WITH_TRACE_QUERY, variables)
+    transaction, internal_transactions, page_info = _parse_transaction_with_trace(
+        response, binary, mode
+    )
+    while page_info.hasNextPage:
+        page, page_info = get_internal_transactions(
+            transaction_hash,
+            page_info.endCursor,
+            page_size,
+            binary=binary,
+            client=client,
+            mode=mode,
+        )
+        internal_transactions.extend(page)
+    return TransactionTrace(
+        transaction=transaction,
+        internalTransactions=internal_transactions,
+        calls=build_call_tree(internal_transactions),
+    )
+
+
+async def get_transaction_with_trace_async(
+    transaction_hash: str,
+    page_size: int = MAX_PAGE_SIZE,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> TransactionTrace:
+    """
+    Get a transaction with all its internal transactions and their call tree.
+    The transaction and the first page of internal transactions are fetched in
+    one request, any further pages follow one request each
+    Args:
+        transaction_hash: hash of the transaction
+        page_size: number of internal transactions per page, at most MAX_PAGE_SIZE
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        The transaction, its internal transactions and their call tree
+
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(None, page_size, hash=transaction_hash)
+    client = client or get_default_async_client()
+    mode = mode or client.mode
+    response = await client.query(_TRANSACTION_WITH_TRACE_QUERY, variables)
+    transaction, internal_transactions, page_info = _parse_transaction_with_trace(
+        response, binary, mode
+    )
+    while page_info.hasNextPage:
+        page, page_info = await get_internal_transactions_async(
+            transaction_hash,
+            page_info.endCursor,
+            page_size,
+            binary=binary,
+            client=client,
+            mode=mode,
+        )
+        internal_transactions.extend(page)
+    return TransactionTrace(
+        transaction=transaction,
+        internalTransactions=internal_transactions,
+        calls=build_call_tree(internal_transactions),
+    )
+
+
+def _collect_traces(
+    transaction_hashes: list[str],
+    unique_hashes: list[str],
+    results: list[TransactionTrace | Exception],
+) -> BulkTransactionTraces:
+    traces: dict[str, TransactionTrace] = {}
+    failures = []
+    for transaction_hash, result in zip(unique_hashes, results, strict=True):
+        if isinstance(result, Exception):
+            failures.append(
+                TransactionTraceFailure(transactionHash=transaction_hash, error=result)
+            )
+        else:
+            traces[transaction_hash] = result
+    return BulkTransactionTraces(
+        traces=[traces.get(i.lower()) for i in transaction_hashes],
+        failures=failures,
+    )
+
+
+def get_transactions_with_trace(
+    transaction_hashes: list[str],
+    concurrency: int = DEFAULT_TRACE_CONCURRENCY,
+    page_size: int = MAX_PAGE_SIZE,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> BulkTransactionTraces:
+    """
+    Get many transactions with all their internal transactions and call trees.
+    Hashes are de-duplicated and traced concurrently on a thread pool. A failing
+    trace does not fail the batch, it is reported in failures instead
+    Args:
+        transaction_hashes: hashes of the transactions
+        concurrency: maximum number of transactions traced at once
+        page_size: number of internal transactions per page, at most MAX_PAGE_SIZE
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Traces in the same order as transaction_hashes, None for transactions
+        whose trace failed, and the failure of each failed trace
+
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    client = client or get_default_client()
+    unique_hashes = list(dict.fromkeys(i.lower() for i in transaction_hashes))
+
+    def trace(transaction_hash: str) -> TransactionTrace | Exception:
+        try:
+            return get_transaction_with_trace(
+                transaction_hash, page_size, binary, client=client, mode=mode
+            )
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(trace, unique_hashes))
+    return _collect_traces(transaction_hashes, unique_hashes, results)
+
+
+async def get_transactions_with_trace_async(
+    transaction_hashes: list[str],
+    concurrency: int = DEFAULT_TRACE_CONCURRENCY,
+    page_size: int = MAX_PAGE_SIZE,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> BulkTransactionTraces:
+    """
+    Get many transactions with all their internal transactions and call trees.
+    Hashes are de-duplicated and traced concurrently. A failing trace does not
+    fail the batch, it is reported in failures instead
+    Args:
+        transaction_hashes: hashes of the transactions
+        concurrency: maximum number of transactions traced at once
+        page_size: number of internal transactions per page, at most MAX_PAGE_SIZE
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Traces in the same order as transaction_hashes, None for transactions
+        whose trace failed, and the failure of each failed trace
+
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    client = client or get_default_async_client()
+    unique_hashes = list(dict.fromkeys(i.lower() for i in transaction_hashes))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def trace(transaction_hash: str) -> TransactionTrace | Exception:
+        async with semaphore:
+            try:
+                return await get_transaction_with_trace_async(
+                    transaction_hash, page_size, binary, client=client, mode=mode
+                )
+            except Exception as e:
+                return e
+
+    results = await asyncio.gather(*(trace(i) for i in unique_hashes))
+    return _collect_traces(transaction_hashes, unique_hashes, list(results))
 
 
 def get_transactions_from_address(
-    address_hash: str, previous_cursor: str | None = None
-) -> tuple[list[Transaction], PageInfo]:
+    address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[Transaction]], PageInfo]:
+    """
+    Get transactions from a given address
+    Args:
+        address_hash: address hash
+        previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Tuple[
+            list of transactions from address,
+            pagination page info
+        ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(previous_cursor, page_size, hash=address_hash)
+    client = client or get_default_client()
+    query, model = project_query(
+        _TRANSACTIONS_FROM_ADDRESS_QUERY,
+        _TRANSACTIONS_FROM_ADDRESS_PATH,
+        _transaction_model(binary),
+        fields,
+    )
+    response = client.query(query, variables)
+    return _parse_transactions_from_address(response, model, mode or client.mode)
+
+
+async def get_transactions_from_address_async(
+    address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> tuple[list[Row[Transaction]], PageInfo]:
     """
     Get transactions from a given address
     Args:
         address_hash: address hash
         previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
 
     Returns:
         Tuple[
             list of transactions from address,
             pagination page info
         ]
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(previous_cursor, page_size, hash=address_hash)
+    client = client or get_default_async_client()
+    query, model = project_query(
+        _TRANSACTIONS_FROM_ADDRESS_QUERY,
+        _TRANSACTIONS_FROM_ADDRESS_PATH,
+        _transaction_model(binary),
+        fields,
+    )
+    response = await client.query(query, variables)
+    return _parse_transactions_from_address(response, model, mode or client.mode)
+
+
+def stream_internal_transactions(
+    transaction_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> ResponseStream[Row[InternalTransaction]]:
+    """
+    Get a page of internal transactions for a given transaction, decoding each
+    internal transaction as the response is read so large inputs and created
+    contract code are not all held in memory at once. Requires the optional
+    ijson dependency
+    Args:
+        transaction_hash: hash of the transaction
+        previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each internal transaction to fetch, e.g.
+            ["toAddressHash", "value"], defaults to all. Rows then hold only
+            those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of internal transactions, with pagination page info in its
+        page_info attribute once exhausted
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(previous_cursor, page_size, hash=transaction_hash)
+    client = client or get_default_client()
+    query, model = project_query(
+        _INTERNAL_TRANSACTIONS_QUERY,
+        _INTERNAL_TRANSACTIONS_PATH,
+        BinaryInternalTransaction if binary else InternalTransaction,
+        fields,
+    )
+    return ResponseStream(
+        partial(client.query_stream, query, variables),
+        "data.transaction.internalTransactions.edges.item.node",
+        partial(build, model, mode=mode or client.mode),
+        page_info_prefix="data.transaction.internalTransactions.pageInfo",
+    )
+
+
+def stream_transactions_from_address(
+    address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> ResponseStream[Row[Transaction]]:
+    """
+    Get a page of transactions from a given address, decoding each transaction
+    as the response is read so large inputs are not all held in memory at once.
+    Requires the optional ijson dependency
+    Args:
+        address_hash: address hash
+        previous_cursor: final cursor of the previous page
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of transactions from address, with pagination page info in its
+        page_info attribute once exhausted
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    variables = _page_variables(previous_cursor, page_size, hash=address_hash)
+    client = client or get_default_client()
+    query, model = project_query(
+        _TRANSACTIONS_FROM_ADDRESS_QUERY,
+        _TRANSACTIONS_FROM_ADDRESS_PATH,
+        _transaction_model(binary),
+        fields,
+    )
+    return ResponseStream(
+        partial(client.query_stream, query, variables),
+        "data.address.transactions.edges.item.node",
+        partial(build, model, mode=mode or client.mode),
+        page_info_prefix="data.address.transactions.pageInfo",
+    )
+
+
+def iter_internal_transactions(
+    transaction_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_items: int | None = None,
+    max_pages: int | None = None,
+    prefetch: bool = True,
+    adaptive: bool = False,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> PageIterator[Row[InternalTransaction]]:
+    """
+    Iterate over internal transactions for a given transaction,
+    fetching pages lazily
+    Args:
+        transaction_hash: hash of the transaction
+        previous_cursor: cursor to resume after, None starts at the first page
+        page_size: number of rows per page, the starting size when adaptive
+        max_items: stop after this many rows
+        max_pages: stop after fetching this many pages
+        prefetch: fetch the next page in the background while rows are consumed
+        adaptive: grow the page size up to MAX_PAGE_SIZE, backing off if the api
+            rejects it as too complex
+        fields: fields of each internal transaction to fetch, e.g.
+            ["toAddressHash", "value"], defaults to all. Rows then hold only
+            those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of internal transactions, resumable from its cursor attribute
+    """
+    fetch_page = partial(
+        get_internal_transactions,
+        transaction_hash,
+        fields=fields,
+        binary=binary,
+        client=client,
+        mode=mode,
+    )
+    return PageIterator(
+        fetch_page,
+        previous_cursor,
+        page_size=page_size,
+        max_items=max_items,
+        max_pages=max_pages,
+        prefetch=prefetch,
+        adaptive=adaptive,
+        max_page_size=MAX_PAGE_SIZE,
+    )
+
+
+def iter_transactions_from_address(
+    address_hash: str,
+    previous_cursor: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_items: int | None = None,
+    max_pages: int | None = None,
+    prefetch: bool = True,
+    adaptive: bool = False,
+    fields: Fields | None = None,
+    binary: bool = False,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> PageIterator[Row[Transaction]]:
+    """
+    Iterate over transactions from a given address, fetching pages lazily
+    Args:
+        address_hash: address hash
+        previous_cursor: cursor to resume after, None starts at the first page
+        page_size: number of rows per page, the starting size when adaptive
+        max_items: stop after this many rows
+        max_pages: stop after fetching this many pages
+        prefetch: fetch the next page in the background while rows are consumed
+        adaptive: grow the page size up to MAX_PAGE_SIZE, backing off if the api
+            rejects it as too complex
+        fields: fields of each transaction to fetch, e.g. ["hash", "value"],
+            defaults to all. Rows then hold only those fields
+        binary: keep hex encoded fields such as input as BinaryData, decoded to
+            bytes on first read rather than held as hex. Only applies to model rows
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Iterator of transactions from address, resumable from its cursor attribute
+    """
+    fetch_page = partial(
+        get_transactions_from_address,
+        address_hash,
+        fields=fields,
+        binary=binary,
+        client=client,
+        mode=mode,
+    )
+    return PageIterator(
+        fetch_page,
+        previous_cursor,
+        page_size=page_size,
+        max_items=max_items,
+        max_pages=max_pages,
+        prefetch=prefetch,
+        adaptive=adaptive,
+        max_page_size=MAX_PAGE_SIZE,
+    )
+
+
+def watch_transactions_from_address(
+    address_hashes: list[str],
+    positions: dict[str, WatchPosition | None] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    client: Client | None = None,
+    mode: OutputMode | None = None,
+) -> Watcher[Row[Transaction]]:
+    """
+    Watch addresses for new transactions, fetching only transactions made since
+    the last poll
+    Args:
+        address_hashes: address hashes to watch
+        positions: newest transaction already seen for each address, from a
+            previous watcher's positions attribute. Addresses without one start
+            from their newest transaction
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds, reached by backing
+            off while there are no new transactions
+        client: client to query with, defaults to the shared client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Watcher polling for new transactions
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+    """
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    fetchers = {
+        i: partial(get_transactions_from_address, i, client=client, mode=mode)
+        for i in address_hashes
+    }
+    return Watcher(
+        fetchers,
+        positions,
+        page_size=page_size,
+        min_interval=min_interval,
+        max_interval=max_interval,
+    )
+
+
+def watch_transactions_from_address_async(
+    address_hashes: list[str],
+    positions: dict[str, WatchPosition | None] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    client: AsyncClient | None = None,
+    mode: OutputMode | None = None,
+) -> AsyncWatcher[Row[Transaction]]:
+    """
+    Watch addresses for new transactions, fetching only transactions made since
+    the last poll. Iterate the watcher with async for
+    Args:
+        address_hashes: address hashes to watch
+        positions: newest transaction already seen for each address, from a
+            previous watcher's positions attribute. Addresses without one start
+            from their newest transaction
+        page_size: number of rows per page, at most MAX_PAGE_SIZE
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds, reached by backing
+            off while there are no new transactions
+        client: async client to query with, defaults to the shared async client
+        mode: output mode for rows, defaults to the client's mode
+
+    Returns:
+        Async watcher polling for new transactions
+    Raises:
+        QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
     """
-    query = (
-        "{"
-        f'   address(hash: "{address_hash}"){{'
-        f"        transactions(first: 5 {generate_after_pagination_query_line(previous_cursor)}) {{"
-        "            edges {"
-        "                node {"
-        "                    blockNumber"
-        "                    createdContractAddressHash"
-        "                    cumulativeGasUsed"
-        "                    error"
-        "                    fromAddressHash"
-        "                    gas"
-        "                    gasPrice"
-        "                    gasUsed"
-        "                    hash"
-        "                    id"
-        "                    index"
-        "                    input"
-        "                    nonce"
-        "                    r"
-        "                    s"
-        "                    status"
-        "                    toAddressHash"
-        "                    v"
-        "                    value"
-        "                }"
-        "            }"
-        "            pageInfo{"
-        "                endCursor"
-        "                hasNextPage"
-        "                hasPreviousPage"
-        "                startCursor"
-        "            }"
-        "        }"
-        "    }"
-        "}"
-    )
-    response = Client().query(query)["address"]["transactions"]
-    return [Transaction(**i["node"]) for i in response["edges"]], PageInfo(
-        **response["pageInfo"]
+    validate_page_size(page_size, MAX_PAGE_SIZE)
+    fetchers = {
+        i: partial(get_transactions_from_address_async, i, client=client, mode=mode)
+        for i in address_hashes
+    }
+    return AsyncWatcher(
+        fetchers,
+        positions,
+        page_size=page_size,
+        min_interval=min_interval,
+        max_interval=max_interval,
     )
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections.abc import Sequence
+from functools import partial
+from types import TracebackType
+from typing import Any, cast
+
+from pydantic import BaseModel
+
+from flare_explorer.gql_client import Client
+from flare_explorer.serialization import OutputMode, Row, build
+from flare_explorer.sqlite import SqliteConnections
+from flare_explorer.token_transfers import (
+    MAX_PAGE_SIZE,
+    TokenTransfer,
+    get_token_transfers,
+)
+from flare_explorer.watch import Watcher, WatchPosition
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_transfers (
+    id TEXT PRIMARY KEY,
+    tokenContractAddressHash BLOB NOT NULL,
+    blockNumber INTEGER NOT NULL,
+    logIndex INTEGER NOT NULL,
+    fromAddressHash BLOB NOT NULL,
+    toAddressHash BLOB NOT NULL,
+    amount TEXT NOT NULL,
+    tokenId TEXT,
+    transactionHash BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS token_transfers_token
+    ON token_transfers (tokenContractAddressHash, blockNumber);
+CREATE INDEX IF NOT EXISTS token_transfers_from
+    ON token_transfers (fromAddressHash, blockNumber);
+CREATE INDEX IF NOT EXISTS token_transfers_to
+    ON token_transfers (toAddressHash, blockNumber);
+CREATE INDEX IF NOT EXISTS token_transfers_block ON token_transfers (blockNumber);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tokenContractAddressHash BLOB PRIMARY KEY,
+    headId TEXT,
+    headBlockNumber INTEGER,
+    cursor TEXT,
+    complete INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "amount, blockNumber, fromAddressHash, id, logIndex, toAddressHash, "
+    "tokenContractAddressHash, tokenId, transactionHash"
+)
+_HASH_COLUMNS = (
+    "fromAddressHash",
+    "toAddressHash",
+    "tokenContractAddressHash",
+    "transactionHash",
+)
+
+
+def _pack(hash: str) -> bytes:
+    return bytes.fromhex(hash.lower().removeprefix("0x"))
+
+
+def _unpack(value: bytes) -> str:
+    return f"0x{value.hex()}"
+
+
+class SyncState(BaseModel):
+    """How far the transfers of a token contract have been synced"""
+
+    head: WatchPosition | None
+    """Newest transfer stored, new transfers are fetched back to it"""
+    cursor: str | None
+    """Cursor of the oldest page stored, older pages are fetched after it"""
+    complete: bool
+    """True once every page older than head has been stored"""
+
+
+class TokenTransferIndex:
+    """
+    Local index of token transfers stored in a SQLite file, answering lookups
+    by address and block range that the api can not filter by.
+
+    ``sync`` fetches the transfers of a token contract into the index. The first
+    sync pages back through history, storing the cursor with each page so an
+    interrupted sync resumes where it stopped. Later syncs fetch only transfers
+    newer than the newest one stored, then carry on with history if it is not
+    complete yet.
+
+    Hashes are stored as bytes and lookups by token contract, address and block
+    number are indexed. Safe to share between threads and processes.
+    Args:
+        path: path of the database file, created if missing
+        client: client to sync with, defaults to the shared client
+        timeout: seconds to wait for another process holding the write lock
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        client: Client | None = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.client = client
+        self.timeout = timeout
+        self._connections = SqliteConnections(self.path, timeout)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def sync_state(self, token_contract_address_hash: str) -> SyncState:
+        """
+        Get how far the transfers of a token contract have been synced
+        Args:
+            token_contract_address_hash: contract address hash
+
+        Returns:
+            Sync state of the contract, empty if it has never been synced
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT headId, headBlockNumber, cursor, complete FROM sync_state "
+                "WHERE tokenContractAddressHash = ?",
+                (_pack(token_contract_address_hash),),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return SyncState(head=None, cursor=None, complete=False)
+        head_id, head_block_number, cursor, complete = row
+        head = (
+            None
+            if head_id is None
+            else WatchPosition(id=head_id, blockNumber=head_block_number)
+        )
+        return SyncState(head=head, cursor=cursor, complete=bool(complete))
+
+    def _store(
+        self,
+        token_contract_address_hash: str,
+        rows: Sequence[Any],
+        state: SyncState,
+    ) -> int:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            stored = connection.executemany(
+                f"INSERT OR IGNORE INTO token_transfers ({_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        i["amount"],
+                        i["blockNumber"],
+                        _pack(i["fromAddressHash"]),
+                        i["id"],
+                        i["logIndex"],
+                        _pack(i["toAddressHash"]),
+                        _pack(i["tokenContractAddressHash"]),
+                        i["tokenId"],
+                        _pack(i["transactionHash"]),
+                    )
+                    for i in rows
+                ],
+            ).rowcount
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                (
+                    _pack(token_contract_address_hash),
+                    state.head and state.head.id,
+                    state.head and state.head.blockNumber,
+                    state.cursor,
+                    state.complete,
+                ),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return stored
+
+    def sync(
+        self,
+        token_contract_address_hash: str,
+        page_size: int = MAX_PAGE_SIZE,
+        max_pages: int | None = None,
+    ) -> int:
+        """
+        Fetch transfers of a token contract not yet in the index. Transfers newer
+        than the newest stored are fetched first, then older pages of history
+        until it is complete or max_pages have been fetched
+        Args:
+            token_contract_address_hash: contract address hash
+            page_size: number of rows per page, at most MAX_PAGE_SIZE
+            max_pages: most pages of history to fetch in this sync, None for all
+
+        Returns:
+            Number of transfers added to the index
+
+        Raises:
+            QueryComplexityLimit: if page_size is outside 1 to MAX_PAGE_SIZE
+        """
+        fetch_page = partial(
+            get_token_transfers,
+            token_contract_address_hash,
+            client=self.client,
+            mode="dict",
+        )
+        state = self.sync_state(token_contract_address_hash)
+        added = 0
+        if state.head is not None:
+            watcher = Watcher(
+                {token_contract_address_hash: fetch_page},
+                {token_contract_address_hash: state.head},
+                page_size=page_size,
+            )
+            rows = watcher.poll()
+            state.head = watcher.positions[token_contract_address_hash]
+            added += self._store(token_contract_address_hash, rows, state)
+
+        pages = 0
+        while not state.complete and (max_pages is None or pages < max_pages):
+            rows, page_info = fetch_page(state.cursor, page_size)
+            pages += 1
+            if state.head is None and rows:
+                newest = cast(dict[str, Any], rows[0])
+                state.head = WatchPosition(
+                    id=newest["id"], blockNumber=newest["blockNumber"]
+                )
+            state.cursor = page_info.endCursor
+            state.complete = not page_info.hasNextPage
+            added += self._store(token_contract_address_hash, rows, state)
+        return added
+
+    def token_transfers(
+        self,
+        token_contract_address_hash: str | None = None,
+        address_hash: str | None = None,
+        from_block: int | None = None,
+        to_block: int | None = None,
+        limit: int | None = None,
+        mode: OutputMode = "model",
+    ) -> list[Row[TokenTransfer]]:
+        """
+        Look up token transfers in the index, newest first
+        Args:
+            token_contract_address_hash: only transfers of this token contract
+            address_hash: only transfers from or to this address
+            from_block: only transfers in this block or later
+            to_block: only transfers in this block or earlier
+            limit: most transfers to return, None for all
+            mode: output mode for rows
+
+        Returns:
+            Matching token transfers, with hashes in lower case
+        """
+        conditions = []
+        parameters: list[Any] = []
+        if token_contract_address_hash is not None:
+            conditions.append("tokenContractAddressHash = ?")
+            parameters.append(_pack(token_contract_address_hash))
+        if address_hash is not None:
+            conditions.append("(fromAddressHash = ? OR toAddressHash = ?)")
+            parameters.extend([_pack(address_hash)] * 2)
+        if from_block is not None:
+            conditions.append("blockNumber >= ?")
+            parameters.append(from_block)
+        if to_block is not None:
+            conditions.append("blockNumber <= ?")
+            parameters.append(to_block)
+        query = f"SELECT {_COLUMNS} FROM token_transfers"  # nosec B608
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY blockNumber DESC, logIndex DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        cursor = self._connection().execute(query, parameters)
+        names = [i[0] for i in cursor.description]
+        rows = []
+        for values in cursor:
+            row = dict(zip(names, values, strict=True))
+            for name in _HASH_COLUMNS:
+                row[name] = _unpack(row[name])
+            rows.append(build(TokenTransfer, row, mode))
+        return rows
+
+    def __len__(self) -> int:
+        row = (
+            self._connection()
+            .execute("SELECT count(*) FROM token_transfers")
+            .fetchone()
+        )
+        return int(row[0])
+
+    def close(self) -> None:
+        """Close this thread's connection to the database"""
+        self._connections.close()
+
+    def __enter__(self) -> TokenTransferIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
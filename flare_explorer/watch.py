@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from flare_explorer.gql_client import PageInfo
+from flare_explorer.pagination import PageFetcher
+
+RowT = TypeVar("RowT")
+
+AsyncPageFetcher = Callable[[str | None, int], Awaitable[tuple[list[RowT], PageInfo]]]
+
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 60.0
+
+
+class WatchPosition(BaseModel):
+    """Newest row seen for a watched key"""
+
+    id: str
+    blockNumber: int
+
+
+def _field(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _position(row: Any) -> WatchPosition:
+    return WatchPosition(id=_field(row, "id"), blockNumber=_field(row, "blockNumber"))
+
+
+class _BaseWatcher(Generic[RowT]):
+    def __init__(
+        self,
+        positions: Mapping[str, WatchPosition | None],
+        page_size: int,
+        min_interval: float,
+        max_interval: float,
+        backoff: float,
+    ) -> None:
+        self.positions = dict(positions)
+        self.page_size = page_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def _scan(self, key: str, rows: list[RowT], new: list[RowT]) -> bool:
+        """Collect rows newer than the position of key, True once one is reached"""
+        position = self.positions[key]
+        if position is None:
+            return True
+        for row in rows:
+            if (
+                _field(row, "id") == position.id
+                or _field(row, "blockNumber") < position.blockNumber
+            ):
+                return True
+            new.append(row)
+        return False
+
+    def _polled(self, found: bool) -> None:
+        if found:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+
+class Watcher(_BaseWatcher[RowT]):
+    """
+    Poll paginated getters for rows added since the last poll.
+
+    The api returns newest rows first. For each watched key the watcher keeps
+    the newest row it has seen in ``positions`` and each poll pages from the
+    newest row back until it reaches it, so a poll costs one request per key
+    unless more than a page of rows arrived. Keys without a position start from
+    the newest existing row, yielding nothing for history. Saving ``positions``
+    and passing them to a new watcher resumes watching without gaps.
+
+    The wait between polls starts at ``min_interval``, is multiplied by
+    ``backoff`` after each poll finding nothing new, up to ``max_interval``, and
+    drops back to ``min_interval`` when new rows are found.
+    Args:
+        fetchers: getter for each watched key, called with the previous cursor
+            and a page size
+        positions: newest row already seen for each key
+        page_size: number of rows per page
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds
+        backoff: factor the wait grows by after a poll finding nothing new
+    """
+
+    def __init__(
+        self,
+        fetchers: Mapping[str, PageFetcher[RowT]],
+        positions: Mapping[str, WatchPosition | None] | None = None,
+        page_size: int = 10,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = 2.0,
+    ) -> None:
+        positions = positions or {}
+        super().__init__(
+            {key: positions.get(key) for key in fetchers},
+            page_size,
+            min_interval,
+            max_interval,
+            backoff,
+        )
+        self._fetchers = dict(fetchers)
+
+    def _poll_key(self, key: str) -> list[RowT]:
+        new: list[RowT] = []
+        cursor: str | None = None
+        newest: WatchPosition | None = None
+        while True:
+            rows, page_info = self._fetchers[key](cursor, self.page_size)
+            if cursor is None and rows:
+                newest = _position(rows[0])
+            if (
+                self._scan(key, rows, new)
+                or not page_info.hasNextPage
+                or page_info.endCursor is None
+            ):
+                break
+            cursor = page_info.endCursor
+        if newest is not None:
+            self.positions[key] = newest
+        new.reverse()
+        return new
+
+    def poll(self) -> list[RowT]:
+        """
+        Fetch rows added since the last poll and adjust the polling interval
+
+        Returns:
+            New rows for each key, oldest first
+        """
+        new = [row for key in self._fetchers for row in self._poll_key(key)]
+        self._polled(bool(new))
+        return new
+
+    def run(
+        self, callback: Callable[[RowT], Any], stop: threading.Event | None = None
+    ) -> None:
+        """
+        Poll until stopped, passing each new row to callback
+        Args:
+            callback: called with each new row, oldest first
+            stop: event that stops watching when set, None to watch forever
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            for row in self.poll():
+                callback(row)
+            stop.wait(self.interval)
+
+
+class AsyncWatcher(_BaseWatcher[RowT]):
+    """
+    Poll async paginated getters for rows added since the last poll, yielding
+    new rows when iterated with ``async for``. See Watcher for how positions and
+    the polling interval are kept
+    Args:
+        fetchers: async getter for each watched key, called with the previous
+            cursor and a page size
+        positions: newest row already seen for each key
+        page_size: number of rows per page
+        min_interval: shortest wait between polls in seconds
+        max_interval: longest wait between polls in seconds
+        backoff: factor the wait grows by after a poll finding nothing new
+    """
+
+    def __init__(
+        self,
+        fetchers: Mapping[str, AsyncPageFetcher[RowT]],
+        positions: Mapping[str, WatchPosition | None] | None = None,
+        page_size: int = 10,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = 2.0,
+    ) -> None:
+        positions = positions or {}
+        super().__init__(
+            {key: positions.get(key) for key in fetchers},
+            page_size,
+            min_interval,
+            max_interval,
+            backoff,
+        )
+        self._fetchers = dict(fetchers)
+
+    async def _poll_key(self, key: str) -> list[RowT]:
+        new: list[RowT] = []
+        cursor: str | None = None
+        newest: WatchPosition | None = None
+        while True:
+            rows, page_info = await self._fetchers[key](cursor, self.page_size)
+            if cursor is None and rows:
+                newest = _position(rows[0])
+            if (
+                self._scan(key, rows, new)
+                or not page_info.hasNextPage
+                or page_info.endCursor is None
+            ):
+                break
+            cursor = page_info.endCursor
+        if newest is not None:
+            self.positions[key] = newest
+        new.reverse()
+        return new
+
+    async def poll(self) -> list[RowT]:
+        """
+        Fetch rows added since the last poll, polling keys concurrently, and
+        adjust the polling interval
+
+        Returns:
+            New rows for each key, oldest first
+        """
+        pages = await asyncio.gather(*(self._poll_key(key) for key in self._fetchers))
+        new = [row for page in pages for row in page]
+        self._polled(bool(new))
+        return new
+
+    async def __aiter__(self) -> AsyncIterator[RowT]:
+        while True:
+            for row in await self.poll():
+                yield row
+            await asyncio.sleep(self.interval)
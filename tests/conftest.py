@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+
+
+class GraphQLServer:
+    """
+    Local stand-in for the explorer api that records requests. respond returns
+    the json body to answer with, already encoded if bytes, or a (status code,
+    body) tuple to inject faults
+    """
+
+    def __init__(self) -> None:
+        self.url = ""
+        self.requests: list[dict[str, Any]] = []
+        self.respond: Callable[[dict[str, Any]], Any] = lambda payload: {"data": {}}
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+@pytest.fixture
+def graphql_server() -> Iterator[GraphQLServer]:
+    state = GraphQLServer()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with state.lock:
+                state.requests.append(payload)
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.delay)
+                response = state.respond(payload)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+            status, response = (
+                response if isinstance(response, tuple) else (200, response)
+            )
+            if isinstance(response, bytes):
+                body = response
+            elif isinstance(response, str):
+                body = response.encode()
+            else:
+                body = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}/graphql"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+class WebsocketServer:
+    """
+    Local stand-in for the api's websocket endpoint, speaking Absinthe's
+    subscription protocol over Phoenix channels. push sends a result to every
+    subscription and drop closes every connection
+    """
+
+    def __init__(self) -> None:
+        self.url = ""
+        self.subscriptions: dict[str, Any] = {}
+        self.documents: list[dict[str, Any]] = []
+        self.connections: set[Any] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def _run(self, coroutine: Any) -> Any:
+        assert self.loop is not None
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def push(self, data: dict[str, Any]) -> None:
+        async def send() -> None:
+            for subscription_id, connection in list(self.subscriptions.items()):
+                await connection.send(
+                    json.dumps(
+                        {
+                            "topic": subscription_id,
+                            "event": "subscription:data",
+                            "payload": {
+                                "subscriptionId": subscription_id,
+                                "result": {"data": data},
+                            },
+                            "ref": None,
+                        }
+                    )
+                )
+
+        self._run(send())
+
+    def drop(self) -> None:
+        async def close() -> None:
+            self.subscriptions.clear()
+            for connection in list(self.connections):
+                connection.transport.abort()
+
+        self._run(close())
+
+    async def wait_for_subscriptions(self, count: int, timeout: float = 5.0) -> None:
+        """Wait until count subscriptions have been made in total"""
+        deadline = time.monotonic() + timeout
+        while len(self.documents) < count:
+            assert time.monotonic() < deadline, "subscription was not made"
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def websocket_server() -> Iterator[WebsocketServer]:
+    pytest.importorskip("websockets")
+    from websockets.exceptions import ConnectionClosed
+    from websockets.server import serve as serve_websockets
+
+    state = WebsocketServer()
+    started = threading.Event()
+    stopped: asyncio.Future[None] | None = None
+
+    async def handle(connection: Any) -> None:
+        state.connections.add(connection)
+        try:
+            async for message in connection:
+                request = json.loads(message)
+                response: dict[str, Any] = {}
+                if request["event"] == "doc":
+                    subscription_id = f"sub{len(state.documents)}"
+                    state.documents.append(request["payload"])
+                    state.subscriptions[subscription_id] = connection
+                    response = {"subscriptionId": subscription_id}
+                elif request["event"] == "unsubscribe":
+                    response = request["payload"]
+                    state.subscriptions.pop(response["subscriptionId"], None)
+                await connection.send(
+                    json.dumps(
+                        {
+                            "topic": request["topic"],
+                            "event": "phx_reply",
+                            "payload": {"status": "ok", "response": response},
+                            "ref": request["ref"],
+                        }
+                    )
+                )
+        except ConnectionClosed:
+            pass
+        finally:
+            state.connections.discard(connection)
+
+    async def serve() -> None:
+        nonlocal stopped
+        state.loop = asyncio.get_running_loop()
+        stopped = state.loop.create_future()
+        async with serve_websockets(handle, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            state.url = f"ws://127.0.0.1:{port}/socket/websocket"
+            started.set()
+            await stopped
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait()
+    yield state
+    assert state.loop is not None and stopped is not None
+    state.loop.call_soon_threadsafe(stopped.set_result, None)
+    thread.join()
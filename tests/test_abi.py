@@ -0,0 +1,257 @@
+import json
+
+import pytest
+from gql.transport.exceptions import TransportQueryError
+
+from flare_explorer.abi import AbiRegistry, ContractAbi, keccak256, parse_abi
+from flare_explorer.binary import BinaryData
+from flare_explorer.exceptions import AbiDecodingError
+from flare_explorer.gql_client import Client
+from flare_explorer.serialization import build
+from flare_explorer.transaction import (
+    BinaryTransaction,
+    InternalTransaction,
+    Transaction,
+)
+from tests.test_transaction import INTERNAL_TRANSACTION_NODE, TRANSACTION_NODE
+
+TOKEN = "0x258e20bdbb2d891521308d2af381b1bd962b67b5"
+RECIPIENT = "0x4668b6ec17d7e6a0cbf600b68ec4f04ae45d225e"
+
+ABI = [
+    {
+        "type": "function",
+        "name": "transfer",
+        "inputs": [
+            {"name": "to", "type": "address"},
+            {"name": "amount", "type": "uint256"},
+        ],
+    },
+    {"type": "function", "name": "setName", "inputs": [{"name": "", "type": "string"}]},
+    {
+        "type": "function",
+        "name": "submit",
+        "inputs": [
+            {
+                "name": "order",
+                "type": "tuple",
+                "components": [
+                    {"name": "amount", "type": "uint256"},
+                    {"name": "memo", "type": "string"},
+                ],
+            },
+            {"name": "to", "type": "address[]"},
+        ],
+    },
+    {
+        "type": "event",
+        "name": "Transfer",
+        "inputs": [
+            {"name": "from", "type": "address", "indexed": True},
+            {"name": "to", "type": "address", "indexed": True},
+            {"name": "value", "type": "uint256", "indexed": False},
+        ],
+    },
+    {"type": "constructor", "inputs": []},
+]
+
+
+def word(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:]).rjust(32, b"\0")
+    if isinstance(value, bytes):
+        return value.ljust(32, b"\0")
+    return value.to_bytes(32, "big")
+
+
+def transfer_input(amount=10**18):
+    return "0x" + (bytes.fromhex("a9059cbb") + word(RECIPIENT) + word(amount)).hex()
+
+
+class TestKeccak256:
+    def test_known_digests(self):
+        assert keccak256(b"").hex() == (
+            "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+        )
+        assert keccak256(b"transfer(address,uint256)")[:4].hex() == "a9059cbb"
+
+    def test_input_longer_than_one_block(self):
+        assert keccak256(b"a" * 200).hex() == (
+            "96ea54061def936c4be90b518992fdc6f12f535068a256229aca54267b4d084d"
+        )
+
+
+class TestContractAbi:
+    def test_selectors_are_precomputed(self):
+        abi = ContractAbi(json.dumps(ABI))
+
+        assert {i.signature for i in abi.functions.values()} == {
+            "transfer(address,uint256)",
+            "setName(string)",
+            "submit((uint256,string),address[])",
+        }
+        assert abi.functions[bytes.fromhex("a9059cbb")].name == "transfer"
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            transfer_input(),
+            bytes.fromhex(transfer_input()[2:]),
+            BinaryData(transfer_input()),
+        ],
+    )
+    def test_static_arguments_are_decoded(self, data):
+        call = ContractAbi(ABI).decode_input(data)
+
+        assert call.name == "transfer"
+        assert call.selector == "0xa9059cbb"
+        assert call.arguments == {"to": RECIPIENT, "amount": 10**18}
+
+    def test_dynamic_arguments_tuples_and_arrays(self):
+        selector = keccak256(b"submit((uint256,string),address[])")[:4]
+        arguments = [0x40, 0xC0, 5, 0x40, 3, b"abc", 2, TOKEN, RECIPIENT]
+        call = ContractAbi(ABI).decode_input(
+            selector + b"".join(word(i) for i in arguments)
+        )
+
+        assert call.arguments == {
+            "order": {"amount": 5, "memo": "abc"},
+            "to": [TOKEN, RECIPIENT],
+        }
+
+    def test_unnamed_arguments_are_numbered(self):
+        selector = keccak256(b"setName(string)")[:4]
+        call = ContractAbi(ABI).decode_input(
+            selector + word(0x20) + word(2) + word(b"hi")
+        )
+
+        assert call.arguments == {"arg0": "hi"}
+
+    def test_unknown_selector_and_empty_input_give_none(self):
+        abi = ContractAbi(ABI)
+
+        assert abi.decode_input("0xdeadbeef") is None
+        assert abi.decode_input("0x") is None
+
+    def test_truncated_input_raises_exception(self):
+        with pytest.raises(AbiDecodingError):
+            ContractAbi(ABI).decode_input(transfer_input()[:-2])
+
+    def test_hex_without_prefix_raises_exception(self):
+        with pytest.raises(AbiDecodingError, match="not 0x prefixed"):
+            ContractAbi(ABI).decode_input(transfer_input()[2:])
+
+    def test_invalid_json_raises_exception(self):
+        with pytest.raises(AbiDecodingError, match="not valid json"):
+            ContractAbi("not json")
+
+    def test_logs_are_decoded(self):
+        abi = ContractAbi(ABI)
+        topic = keccak256(b"Transfer(address,address,uint256)")
+
+        log = abi.decode_log(
+            [f"0x{topic.hex()}", f"0x{word(TOKEN).hex()}", word(RECIPIENT)],
+            f"0x{word(7).hex()}",
+        )
+
+        assert log.name == "Transfer"
+        assert log.arguments == {"from": TOKEN, "to": RECIPIENT, "value": 7}
+        assert abi.decode_log([word(1)], "0x") is None
+        with pytest.raises(AbiDecodingError, match="2 indexed arguments"):
+            abi.decode_log([topic], word(7))
+
+    def test_parsed_abis_are_shared(self):
+        assert parse_abi(json.dumps(ABI)) is parse_abi(json.dumps(ABI))
+
+
+@pytest.fixture
+def abi_server(graphql_server):
+    """Serves the abi for TOKEN, other addresses have no verified contract"""
+
+    def respond(payload):
+        return {
+            "data": {
+                "addresses": [
+                    {
+                        "hash": i,
+                        "smartContract": (
+                            {"abi": json.dumps(ABI)} if i == TOKEN else None
+                        ),
+                    }
+                    for i in payload["variables"]["hashes"]
+                ]
+            }
+        }
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestAbiRegistry:
+    def test_abis_are_fetched_once_per_contract(self, abi_server):
+        registry = AbiRegistry(client=Client(url=abi_server.url))
+
+        assert registry.decode_input(TOKEN, transfer_input()).name == "transfer"
+        assert registry.decode_input(TOKEN.upper().replace("0X", "0x"), "0x") is None
+        assert registry.get(RECIPIENT) is None
+        assert registry.get(RECIPIENT) is None
+
+        assert len(abi_server.requests) == 2
+        assert "smartContract" in abi_server.requests[0]["query"]
+        assert "contractCode" not in abi_server.requests[0]["query"]
+
+    def test_transactions_are_decoded_in_bulk(self, abi_server):
+        transactions = [
+            build(
+                Transaction, {**TRANSACTION_NODE, "input": transfer_input(1)}, "model"
+            ),
+            BinaryTransaction(**{**TRANSACTION_NODE, "input": transfer_input(2)}),
+            build(
+                InternalTransaction,
+                {**INTERNAL_TRANSACTION_NODE, "input": transfer_input(3)},
+                "record",
+            ),
+            {**INTERNAL_TRANSACTION_NODE, "input": transfer_input(4)},
+            {**TRANSACTION_NODE, "input": transfer_input()[:-2]},
+            {**TRANSACTION_NODE, "toAddressHash": RECIPIENT},
+            {**TRANSACTION_NODE, "toAddressHash": None},
+        ]
+        registry = AbiRegistry(client=Client(url=abi_server.url))
+
+        calls = registry.decode_transactions(transactions)
+
+        assert [i and i.arguments["amount"] for i in calls] == [
+            1,
+            2,
+            3,
+            4,
+            None,
+            None,
+            None,
+        ]
+        assert len(abi_server.requests) == 1
+        assert abi_server.requests[0]["variables"]["hashes"] == [TOKEN, RECIPIENT]
+
+    def test_invalid_abis_and_failed_fetches_decode_to_none(self, graphql_server):
+        def respond(payload):
+            if RECIPIENT in payload["variables"]["hashes"]:
+                return {"data": None, "errors": [{"message": "Internal error"}]}
+            return {
+                "data": {
+                    "addresses": [
+                        {"hash": i, "smartContract": {"abi": "not json"}}
+                        for i in payload["variables"]["hashes"]
+                    ]
+                }
+            }
+
+        graphql_server.respond = respond
+        client = Client(url=graphql_server.url)
+        registry = AbiRegistry(client=client)
+
+        assert registry.get(TOKEN) is None
+        assert registry.decode_transactions(
+            [{**TRANSACTION_NODE, "toAddressHash": RECIPIENT}]
+        ) == [None]
+        with pytest.raises(TransportQueryError, match="Internal error"):
+            AbiRegistry(client=client, raise_failures=True).prefetch([RECIPIENT])
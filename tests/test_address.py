@@ -1,12 +1,28 @@
+import asyncio
 import contextlib
 from decimal import Decimal
 
 import pytest
 import requests_mock
+from gql.transport.exceptions import TransportQueryError
 
-from flare_explorer.address import Address, SmartContract, get_address, get_addresses
-from flare_explorer.exceptions import QueryComplexityLimit
-from flare_explorer.gql_client import API_URL
+from flare_explorer.address import (
+    Address,
+    BinaryAddress,
+    LazyAddress,
+    LazyBinaryAddress,
+    SmartContract,
+    get_address,
+    get_address_async,
+    get_addresses,
+    get_addresses_async,
+    get_addresses_bulk,
+    get_addresses_bulk_async,
+    get_smart_contract,
+)
+from flare_explorer.cache import MemoryCache
+from flare_explorer.exceptions import InvalidFieldSelection, QueryComplexityLimit
+from flare_explorer.gql_client import API_URL, AsyncClient, Client
 
 
 class TestGetAddress:
@@ -23,8 +39,9 @@ class TestGetAddress:
             with contextlib.suppress(KeyError):
                 get_address("test_hash_123")
 
-            query = m.last_request.json()["query"]
-            assert 'address(hash: "test_hash_123") {' in query
+            request = m.last_request.json()
+            assert "address(hash: $hash) {" in request["query"]
+            assert request["variables"] == {"hash": "test_hash_123"}
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -69,6 +86,36 @@ class TestGetAddress:
             )
 
 
+class TestGetAddressesFields:
+    def test_only_selected_fields_are_queried_and_returned(self):
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                json={"data": {"addresses": [{"fetchedCoinBalance": "1.5"}]}},
+            )
+
+            addresses = get_addresses(["0x1"], fields=["fetchedCoinBalance"])
+
+            query = m.last_request.json()["query"]
+        assert "fetchedCoinBalance" in query
+        assert "smartContract" not in query
+        assert addresses[0].fetchedCoinBalance == Decimal("1.5")
+        assert list(type(addresses[0]).model_fields) == ["fetchedCoinBalance"]
+
+    def test_bulk_addresses_always_fetch_hash(self, addresses_server):
+        result = get_addresses_bulk(
+            ["0x1", "0x2"],
+            fields=["fetchedCoinBalance"],
+            client=Client(url=addresses_server.url),
+            mode="record",
+        )
+
+        query = addresses_server.requests[0]["query"]
+        assert "hash" in query
+        assert "contractCode" not in query
+        assert [tuple(i) for i in result.addresses] == [("1", "0x1"), ("2", "0x2")]
+
+
 class TestGetAddresses:
     def test_more_than_15_addresses_given_raises_exception(self):
         with pytest.raises(
@@ -95,8 +142,9 @@ class TestGetAddresses:
                     ]
                 )
 
-            query = m.last_request.json()["query"]
-            assert 'addresses(hashes: ["hash_1", "hash_2", "hash_3"]) {' in query
+            request = m.last_request.json()
+            assert "addresses(hashes: $hashes) {" in request["query"]
+            assert request["variables"] == {"hashes": ["hash_1", "hash_2", "hash_3"]}
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -146,12 +194,14 @@ class TestGetAddresses:
                     contractCode=None,
                     fetchedCoinBalance=Decimal("296941861326935666031"),
                     fetchedCoinBalanceBlockNumber=4686942,
+                    hash="0x7736748e4b61b574d452100efbc69c140ff430cf",
                     smartContract=None,
                 ),
                 Address(
                     contractCode="contract_code",
                     fetchedCoinBalance=Decimal("0"),
                     fetchedCoinBalanceBlockNumber=4685648,
+                    hash="0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
                     smartContract=SmartContract(
                         abi="abi",
                         addressHash="0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
@@ -162,3 +212,305 @@ class TestGetAddresses:
                     ),
                 ),
             ]
+
+
+class TestGetAddressAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "address": {
+                    "contractCode": None,
+                    "fetchedCoinBalance": "1457768374895067448",
+                    "fetchedCoinBalanceBlockNumber": 4497096,
+                    "smartContract": None,
+                }
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_address_async("test_hash_123", client=client)
+
+        response = asyncio.run(run())
+
+        assert graphql_server.requests[0]["variables"] == {"hash": "test_hash_123"}
+        assert response == Address(
+            contractCode=None,
+            fetchedCoinBalance=Decimal("1457768374895067448"),
+            fetchedCoinBalanceBlockNumber=4497096,
+            smartContract=None,
+        )
+
+
+class TestGetAddressesAsync:
+    def test_more_than_15_addresses_given_raises_exception(self):
+        with pytest.raises(
+            QueryComplexityLimit, match="Limit of 15 addresses breached"
+        ):
+            asyncio.run(get_addresses_async([f"{i}" for i in range(16)]))
+
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "addresses": [
+                    {
+                        "contractCode": None,
+                        "fetchedCoinBalance": "0",
+                        "fetchedCoinBalanceBlockNumber": 4686942,
+                        "smartContract": None,
+                    }
+                ]
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_addresses_async(["hash_1"], client=client)
+
+        response = asyncio.run(run())
+
+        assert response == [
+            Address(
+                contractCode=None,
+                fetchedCoinBalance=Decimal("0"),
+                fetchedCoinBalanceBlockNumber=4686942,
+                smartContract=None,
+            )
+        ]
+
+
+def address_node(address_hash):
+    return {
+        "contractCode": None,
+        "fetchedCoinBalance": str(int(address_hash, 16)),
+        "fetchedCoinBalanceBlockNumber": 4686942,
+        "hash": address_hash,
+        "smartContract": None,
+    }
+
+
+@pytest.fixture
+def addresses_server(graphql_server):
+    """Serves every requested address except 0x...dead, fails chunks with 0x...bad"""
+
+    def respond(payload):
+        hashes = payload["variables"]["hashes"]
+        if "0xbad" in hashes:
+            return {"data": None, "errors": [{"message": "Internal server error"}]}
+        return {
+            "data": {"addresses": [address_node(i) for i in hashes if i != "0xdead"]}
+        }
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestGetAddressesBulk:
+    def test_hashes_are_chunked_deduplicated_and_kept_in_order(self, addresses_server):
+        hashes = [f"0x{i:x}" for i in range(40, 0, -1)]
+
+        result = get_addresses_bulk(
+            [*hashes, "0X28", "0xdead"],
+            client=Client(url=addresses_server.url),
+        )
+
+        assert len(addresses_server.requests) == 3
+        assert [i.fetchedCoinBalance for i in result.addresses[:40]] == [
+            Decimal(i) for i in range(40, 0, -1)
+        ]
+        assert result.addresses[40] is result.addresses[0]
+        assert result.addresses[41] is None
+        assert result.failures == []
+
+    def test_failed_chunks_are_reported_without_failing_batch(self, addresses_server):
+        hashes = ["0xbad", *(f"0x{i:x}" for i in range(1, 20))]
+
+        result = get_addresses_bulk(
+            hashes, concurrency=2, client=Client(url=addresses_server.url)
+        )
+
+        assert result.addresses[:15] == [None] * 15
+        assert [i.hash for i in result.addresses[15:]] == hashes[15:]
+        assert len(result.failures) == 1
+        assert result.failures[0].addressHashes == hashes[:15]
+        assert isinstance(result.failures[0].error, TransportQueryError)
+
+    def test_chunks_are_queried_concurrently(self, addresses_server):
+        addresses_server.delay = 0.05
+
+        get_addresses_bulk(
+            [f"0x{i:x}" for i in range(1, 61)],
+            concurrency=4,
+            client=Client(url=addresses_server.url),
+        )
+
+        assert addresses_server.max_in_flight == 4
+
+
+class TestGetAddressesBulkAsync:
+    def test_hashes_are_chunked_and_failures_reported(self, addresses_server):
+        hashes = [*(f"0x{i:x}" for i in range(1, 20)), "0xbad"]
+
+        async def run():
+            async with AsyncClient(url=addresses_server.url) as client:
+                return await get_addresses_bulk_async(
+                    hashes, concurrency=2, client=client, mode="dict"
+                )
+
+        result = asyncio.run(run())
+
+        assert result.addresses[:15] == [address_node(i) for i in hashes[:15]]
+        assert result.addresses[15:] == [None] * 5
+        assert result.failures[0].addressHashes == hashes[15:]
+
+
+CONTRACT = {
+    "abi": "[]",
+    "addressHash": "0x1",
+    "compilerVersion": "v0.8.17",
+    "contractSourceCode": "contract A {}",
+    "name": "A",
+    "optimization": True,
+}
+
+
+@pytest.fixture
+def contracts_server(graphql_server):
+    """Serves address 0x1 with a contract, narrowed to the selected fields"""
+
+    def respond(payload):
+        contract = {
+            key: value for key, value in CONTRACT.items() if key in payload["query"]
+        }
+        if "fetchedCoinBalance" not in payload["query"]:
+            return {"data": {"address": {"smartContract": contract}}}
+        node = {**address_node("0x1"), "smartContract": contract}
+        if "hashes" in payload["variables"]:
+            return {"data": {"addresses": [node]}}
+        return {"data": {"address": node}}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestLazyContracts:
+    def test_heavy_fields_are_fetched_once_on_first_access(self, contracts_server):
+        address = get_address(
+            "0x1", lazy_contracts=True, client=Client(url=contracts_server.url)
+        )
+
+        assert isinstance(address, LazyAddress)
+        assert "abi" not in contracts_server.requests[0]["query"]
+        assert address.smartContract.name == "A"
+        assert len(contracts_server.requests) == 1
+
+        assert address.smartContract.abi == "[]"
+        assert address.smartContract.contractSourceCode == "contract A {}"
+        assert len(contracts_server.requests) == 2
+        assert address.smartContract.load() == SmartContract(**CONTRACT)
+
+    def test_addresses_fetch_contracts_with_their_client(self, contracts_server):
+        client = Client(url=contracts_server.url)
+
+        addresses = get_addresses(["0x1"], lazy_contracts=True, client=client)
+        bulk = get_addresses_bulk(["0x1"], lazy_contracts=True, client=client)
+
+        assert addresses[0].smartContract.abi == "[]"
+        assert bulk.addresses[0].smartContract.abi == "[]"
+        assert len(contracts_server.requests) == 4
+
+    def test_record_rows_leave_heavy_fields_out(self, contracts_server):
+        address = get_address(
+            "0x1",
+            lazy_contracts=True,
+            client=Client(url=contracts_server.url),
+            mode="record",
+        )
+
+        assert address.smartContract._fields == (
+            "addressHash",
+            "compilerVersion",
+            "name",
+            "optimization",
+        )
+
+    def test_contracts_are_fetched_through_the_cache(self, contracts_server):
+        client = Client(url=contracts_server.url, cache=MemoryCache())
+
+        lazy = get_address("0x1", lazy_contracts=True, client=client)
+        full = get_address("0x1", client=client)
+
+        assert lazy.smartContract.abi == "[]"
+        assert full.smartContract == SmartContract(**CONTRACT)
+        assert len(contracts_server.requests) == 3
+
+    def test_async_getters_load_contracts_with_their_client(self, contracts_server):
+        async def run():
+            async with AsyncClient(url=contracts_server.url) as client:
+                address = await get_address_async(
+                    "0x1", lazy_contracts=True, client=client
+                )
+                (listed,) = await get_addresses_async(
+                    ["0x1"], lazy_contracts=True, client=client
+                )
+                bulk = await get_addresses_bulk_async(
+                    ["0x1"], lazy_contracts=True, client=client
+                )
+                return [
+                    await i.smartContract.load_async()
+                    for i in [address, listed, *bulk.addresses]
+                ], address
+
+        contracts, address = asyncio.run(run())
+
+        assert contracts == [SmartContract(**CONTRACT)] * 3
+        assert isinstance(address, LazyAddress)
+        assert address.smartContract.abi == "[]"
+        assert len(contracts_server.requests) == 6
+
+    def test_fields_can_not_be_combined_with_lazy_contracts(self):
+        with pytest.raises(InvalidFieldSelection):
+            get_address("0x1", fields=["hash"], lazy_contracts=True)
+
+
+class TestGetSmartContract:
+    def test_contract_is_returned_with_heavy_fields(self, contracts_server):
+        contract = get_smart_contract("0x1", client=Client(url=contracts_server.url))
+
+        assert contract == SmartContract(**CONTRACT)
+        assert "fetchedCoinBalance" not in contracts_server.requests[0]["query"]
+
+    def test_address_without_contract_returns_none(self):
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, json={"data": {"address": {"smartContract": None}}})
+
+            assert get_smart_contract("0x2") is None
+
+
+class TestBinaryContractCode:
+    def test_contract_code_is_decoded_on_first_read(self, graphql_server):
+        node = {**address_node("0x1"), "contractCode": "0x6080"}
+        graphql_server.respond = lambda payload: {"data": {"addresses": [node]}}
+
+        (address,) = get_addresses(
+            ["0x1"], binary=True, client=Client(url=graphql_server.url)
+        )
+
+        assert isinstance(address, BinaryAddress)
+        assert address.contractCode.tobytes() == b"\x60\x80"
+
+    def test_binary_combines_with_lazy_contracts(self, contracts_server):
+        address = get_address(
+            "0x1",
+            lazy_contracts=True,
+            binary=True,
+            client=Client(url=contracts_server.url),
+        )
+
+        assert isinstance(address, LazyBinaryAddress)
+        assert address.contractCode is None
+        assert address.smartContract.abi == "[]"
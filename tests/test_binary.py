@@ -0,0 +1,64 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from flare_explorer.binary import BinaryData
+
+
+class Row(BaseModel):
+    input: BinaryData
+    code: BinaryData | None = None
+
+
+class TestBinaryData:
+    def test_hex_is_decoded_once_on_first_read(self):
+        data = BinaryData("0xA9059CBB")
+
+        assert not data.decoded
+        assert len(data) == 4
+        assert data.hex() == "0xA9059CBB"
+
+        assert data.tobytes() == bytes.fromhex("a9059cbb")
+        assert data.decoded
+        assert data.tobytes() is data.tobytes()
+        assert data.view()[:2] == b"\xa9\x05"
+        assert data.hex() == "0xa9059cbb"
+
+    def test_empty_data(self):
+        assert BinaryData("0x").tobytes() == b""
+        assert len(BinaryData("0x")) == 0
+
+    def test_equality_with_hex_bytes_and_binary_data(self):
+        data = BinaryData("0xa9059cbb")
+
+        assert data == "0xA9059CBB"
+        assert data == bytes.fromhex("a9059cbb")
+        assert data == BinaryData(bytes.fromhex("a9059cbb"))
+        assert data != "0x00"
+        assert hash(data) == hash(BinaryData("0xa9059cbb"))
+
+    def test_invalid_hex_raises_exception_on_first_read(self):
+        data = BinaryData("0xzz")
+
+        with pytest.raises(ValueError):
+            data.tobytes()
+
+
+class TestBinaryDataFields:
+    def test_models_validate_hex_lazily(self):
+        row = Row(input="0x1234")
+
+        assert isinstance(row.input, BinaryData)
+        assert not row.input.decoded
+        assert bytes(row.input) == b"\x12\x34"
+        assert Row(input=b"\x12\x34") == row
+
+    def test_models_serialize_to_hex(self):
+        row = Row(input=b"\x12\x34", code="0x")
+
+        assert row.model_dump(mode="json") == {"input": "0x1234", "code": "0x"}
+        assert Row.model_validate_json(row.model_dump_json()) == row
+
+    @pytest.mark.parametrize("value", ["1234", 1234])
+    def test_values_that_are_not_hex_or_bytes_raise_exception(self, value):
+        with pytest.raises(ValidationError):
+            Row(input=value)
@@ -1,11 +1,22 @@
+import asyncio
 import contextlib
 from datetime import datetime, timezone
 from decimal import Decimal
 
+import pytest
 import requests_mock
 
-from flare_explorer.block import Block, get_block
-from flare_explorer.gql_client import API_URL
+from flare_explorer.block import (
+    MAX_BLOCKS_PER_QUERY,
+    Block,
+    follow_blocks,
+    get_block,
+    get_block_async,
+    get_blocks,
+    get_blocks_async,
+)
+from flare_explorer.exceptions import FlareExplorerQueryError, QueryComplexityLimit
+from flare_explorer.gql_client import API_URL, AsyncClient, Client
 
 
 class TestGetBlock:
@@ -22,8 +33,22 @@ class TestGetBlock:
             with contextlib.suppress(KeyError):
                 get_block(123)
 
-            query = m.last_request.json()["query"]
-            assert "block(number: 123)" in query
+            request = m.last_request.json()
+            assert "block(number: $number)" in request["query"]
+            assert request["variables"] == {"number": 123}
+
+    def test_given_client_is_used(self):
+        client = Client(url="http://localhost:8000/graphql")
+        with requests_mock.Mocker() as m:
+            m.post(
+                "http://localhost:8000/graphql",
+                status_code=200,
+                json={"data": {"transaction": ["test"]}},
+            )
+            with contextlib.suppress(KeyError):
+                get_block(123, client=client)
+
+            assert m.last_request.url == "http://localhost:8000/graphql"
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -70,3 +95,168 @@ class TestGetBlock:
                 timestamp=datetime(2023, 1, 22, 15, 54, 20, tzinfo=timezone.utc),
                 totalDifficulty=Decimal("4463469"),
             )
+
+
+class TestGetBlockAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "block": {
+                    "consensus": True,
+                    "difficulty": "1",
+                    "gasLimit": "8000000",
+                    "gasUsed": "85427",
+                    "hash": "0x39935d7674e2f031fb69e617fc4a409960378a8953f346517a6124c26be86fee",
+                    "minerHash": "0x0100000000000000000000000000000000000000",
+                    "nonce": "0x0000000000000000",
+                    "number": 4463469,
+                    "parentHash": "0xaf474d4cf6ceaf5d1aa69b4789c3bfca337395968ccd1f9a85ca6927479cd467",
+                    "size": 814,
+                    "timestamp": "2023-01-22T15:54:20.000000Z",
+                    "totalDifficulty": "4463469",
+                }
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_block_async(4463469, client=client)
+
+        response = asyncio.run(run())
+
+        assert graphql_server.requests[0]["variables"] == {"number": 4463469}
+        assert response.number == 4463469
+        assert response.gasUsed == Decimal("85427")
+
+
+def block_node(number):
+    return {
+        "consensus": True,
+        "difficulty": "1",
+        "gasLimit": "8000000",
+        "gasUsed": "85427",
+        "hash": f"0x{number:064x}",
+        "minerHash": "0x0100000000000000000000000000000000000000",
+        "nonce": "0x0000000000000000",
+        "number": number,
+        "parentHash": f"0x{number - 1:064x}",
+        "size": 814,
+        "timestamp": "2023-01-22T15:54:20.000000Z",
+        "totalDifficulty": str(number),
+    }
+
+
+@pytest.fixture
+def blocks_server(graphql_server):
+    """Serves blocks 1 to 1000, fails lookups of block 666"""
+
+    def respond(payload):
+        data, errors = {}, []
+        for variable, number in payload["variables"].items():
+            alias = variable.replace("v", "a")
+            if int(number) > 1000 or int(number) == 666:
+                data[alias] = None
+                reason = "not found" if int(number) > 1000 else "timed out"
+                errors.append(
+                    {"message": f"Block number {number} {reason}.", "path": [alias]}
+                )
+            else:
+                data[alias] = block_node(int(number))
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestGetBlocks:
+    def test_blocks_are_batched_into_aliased_queries(self, blocks_server):
+        blocks = get_blocks(list(range(1, 201)), client=Client(url=blocks_server.url))
+
+        assert len(blocks_server.requests) == 200 // MAX_BLOCKS_PER_QUERY
+        assert [i.number for i in blocks] == list(range(1, 201))
+        assert blocks[0] == Block(**block_node(1))
+
+    def test_results_keep_input_order_and_duplicates(self, blocks_server):
+        blocks = get_blocks(
+            [9, 3, 9, 1001], batch_size=2, client=Client(url=blocks_server.url)
+        )
+
+        assert len(blocks_server.requests) == 2
+        assert [i and i.number for i in blocks] == [9, 3, 9, None]
+
+    def test_fields_narrow_each_aliased_lookup(self, blocks_server):
+        blocks = get_blocks(
+            [1, 2], fields=["number", "hash"], client=Client(url=blocks_server.url)
+        )
+
+        assert (
+            "a1: block(number: $v1) {\n    hash\n    number\n  }"
+            in (blocks_server.requests[0]["query"])
+        )
+        assert [(i.number, i.hash) for i in blocks] == [
+            (1, block_node(1)["hash"]),
+            (2, block_node(2)["hash"]),
+        ]
+
+    def test_failed_lookup_raises_exception(self, blocks_server):
+        with pytest.raises(FlareExplorerQueryError, match="666 timed out"):
+            get_blocks([665, 666], client=Client(url=blocks_server.url))
+
+    @pytest.mark.parametrize("batch_size", [0, MAX_BLOCKS_PER_QUERY + 1])
+    def test_batch_size_outside_complexity_limit_raises_exception(self, batch_size):
+        with pytest.raises(QueryComplexityLimit):
+            get_blocks([1], batch_size=batch_size)
+
+
+class TestGetBlocksAsync:
+    def test_blocks_are_batched_into_concurrent_queries(self, blocks_server):
+        async def run():
+            async with AsyncClient(url=blocks_server.url) as client:
+                return await get_blocks_async(
+                    [*range(1, 51), 1001], batch_size=10, client=client, mode="dict"
+                )
+
+        blocks = asyncio.run(run())
+
+        assert len(blocks_server.requests) == 6
+        assert blocks == [*(block_node(i) for i in range(1, 51)), None]
+
+
+class TestFollowBlocks:
+    def test_new_blocks_are_yielded_as_they_are_produced(self, graphql_server):
+        """Each request produces one more block, starting with blocks 1 to 3"""
+        head = 3
+
+        def respond(payload):
+            nonlocal head
+            head += 1
+            numbers = {
+                k.replace("v", "a"): int(v) for k, v in payload["variables"].items()
+            }
+            return {
+                "data": {
+                    alias: block_node(number) if number <= head else None
+                    for alias, number in numbers.items()
+                },
+                "errors": [
+                    {"message": f"Block number {number} not found.", "path": [alias]}
+                    for alias, number in numbers.items()
+                    if number > head
+                ],
+            }
+
+        graphql_server.respond = respond
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                blocks = follow_blocks(
+                    2, batch_size=5, min_interval=0.01, client=client
+                )
+                numbers = [(await anext(blocks)).number for _ in range(5)]
+                await blocks.aclose()
+                return numbers
+
+        assert asyncio.run(run()) == [2, 3, 4, 5, 6]
+        assert [i["variables"]["v0"] for i in graphql_server.requests] == [2, 5, 6]
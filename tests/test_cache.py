@@ -0,0 +1,309 @@
+import asyncio
+import multiprocessing
+
+import pytest
+import requests_mock
+from gql.transport.exceptions import TransportQueryError
+
+from flare_explorer import cache as cache_module
+from flare_explorer.address import get_address
+from flare_explorer.block import get_block, get_block_async
+from flare_explorer.cache import MemoryCache, SqliteCache, cache_key, root_fields
+from flare_explorer.gql_client import API_URL, AsyncClient, Client, parse_query
+from flare_explorer.transaction import get_transaction
+from tests.test_transaction import TRANSACTION_NODE
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+BLOCK_NODE = {
+    "consensus": True,
+    "difficulty": "1",
+    "gasLimit": "8000000",
+    "gasUsed": "85427",
+    "hash": "0x5",
+    "minerHash": "0x0100000000000000000000000000000000000000",
+    "nonce": "0x0000000000000000",
+    "number": 5,
+    "parentHash": "0x4",
+    "size": 814,
+    "timestamp": "2023-01-22T15:54:20.000000Z",
+    "totalDifficulty": "5",
+}
+ADDRESS_NODE = {
+    "contractCode": None,
+    "fetchedCoinBalance": "1",
+    "fetchedCoinBalanceBlockNumber": 4497096,
+    "hash": "0x1",
+    "smartContract": None,
+}
+
+
+def test_root_fields_include_every_aliased_selection():
+    document = parse_query("{ a0: block(number: 1) { hash } a1: address { hash } }")
+
+    assert root_fields(document) == ["block", "address"]
+
+
+def test_cache_key_does_not_depend_on_variable_order():
+    document = parse_query("{ block(number: 1) { hash } }")
+
+    assert cache_key(document, {"a": 1, "b": 2}) == cache_key(
+        document, {"b": 2, "a": 1}
+    )
+
+
+class TestMemoryCache:
+    @pytest.mark.parametrize(
+        "query,expected_ttl",
+        [
+            ("{ block(number: 1) { hash } }", None),
+            ('{ transaction(hash: "0x1") { hash } }', None),
+            ('{ address(hash: "0x1") { hash } }', 15.0),
+            ('{ block(number: 1) { hash } address(hash: "0x1") { hash } }', 15.0),
+            ("{ unknown { hash } }", 0),
+        ],
+    )
+    def test_ttl_is_taken_from_root_fields(self, query, expected_ttl):
+        assert MemoryCache().ttl_for(parse_query(query)) == expected_ttl
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", {"a": 1}, None)
+        cache.set("b", {"b": 1}, None)
+        cache.get("a")
+        cache.set("c", {"c": 1}, None)
+
+        assert cache.get("a") == {"a": 1}
+        assert cache.get("b") is None
+        assert cache.get("c") == {"c": 1}
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
+
+    def test_entries_expire_after_ttl(self, clock):
+        cache = MemoryCache()
+        cache.set("a", {"a": 1}, 15.0)
+
+        clock.now += 14.9
+        assert cache.get("a") == {"a": 1}
+        clock.now += 0.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_clear_removes_every_entry(self):
+        cache = MemoryCache()
+        cache.set("a", {"a": 1}, None)
+        cache.clear()
+
+        assert cache.get("a") is None
+
+
+def write_entries(path, worker):
+    cache = SqliteCache(path, timeout=60)
+    for i in range(50):
+        cache.set(f"{worker}-{i}", {"worker": worker, "i": i}, None)
+        assert cache.get(f"{worker}-{i}") == {"worker": worker, "i": i}
+
+
+class TestSqliteCache:
+    @pytest.fixture
+    def wall_clock(self, monkeypatch):
+        class Clock:
+            now = 1_700_000_000.0
+
+        monkeypatch.setattr(cache_module.time, "time", lambda: Clock.now)
+        return Clock
+
+    def test_entries_persist_across_instances(self, tmp_path):
+        SqliteCache(tmp_path / "cache.db").set("a", {"block": {"number": 1}}, None)
+
+        cache = SqliteCache(tmp_path / "cache.db")
+
+        assert cache.get("a") == {"block": {"number": 1}}
+        assert cache.get("b") is None
+        assert len(cache) == 1
+
+    def test_entries_expire_after_ttl(self, tmp_path, wall_clock):
+        cache = SqliteCache(tmp_path / "cache.db")
+        cache.set("a", {"a": 1}, 15.0)
+
+        wall_clock.now += 14.9
+        assert cache.get("a") == {"a": 1}
+        wall_clock.now += 0.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_replacing_entry_keeps_size_accurate(self, tmp_path):
+        cache = SqliteCache(tmp_path / "cache.db")
+        cache.set("a", {"a": "x" * 100}, None)
+        cache.set("a", {"a": "x"}, None)
+
+        assert cache.size == len('{"a":"x"}')
+
+    def test_least_recently_used_entries_are_evicted_over_size_cap(
+        self, tmp_path, wall_clock
+    ):
+        cache = SqliteCache(tmp_path / "cache.db", max_bytes=1000)
+        for i in range(4):
+            wall_clock.now += 100
+            cache.set(str(i), {"data": "x" * 190}, None)
+        wall_clock.now += 100
+        cache.get("0")
+        cache.set("4", {"data": "x" * 190}, None)
+
+        assert cache.size <= 1000
+        assert [cache.get(str(i)) is not None for i in range(5)] == [
+            True,
+            False,
+            True,
+            True,
+            True,
+        ]
+        assert cache.stats.evictions == 1
+
+    def test_processes_can_share_cache(self, tmp_path):
+        path = tmp_path / "cache.db"
+        SqliteCache(path)
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=write_entries, args=(path, i)) for i in range(4)
+        ]
+        for i in processes:
+            i.start()
+        for i in processes:
+            i.join()
+
+        assert [i.exitcode for i in processes] == [0] * 4
+        assert len(SqliteCache(path)) == 200
+
+    def test_client_is_answered_from_cache_after_restart(self, tmp_path):
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"block": BLOCK_NODE}})
+            get_block(5, client=Client(cache=SqliteCache(tmp_path / "cache.db")))
+            block = get_block(
+                5, client=Client(cache=SqliteCache(tmp_path / "cache.db"))
+            )
+
+            assert m.call_count == 1
+        assert block.number == 5
+
+
+class TestClientCache:
+    def test_immutable_queries_are_answered_from_cache(self):
+        client = Client(cache=MemoryCache())
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"block": BLOCK_NODE}})
+            first = get_block(5, client=client)
+            second = get_block(5, client=client)
+            get_block(4, client=client)
+
+            assert m.call_count == 2
+        assert first == second
+        assert client.cache.stats.hits == 1
+        assert client.cache.stats.misses == 2
+        assert client.cache.stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_mutable_queries_are_refetched_after_ttl(self, clock):
+        client = Client(cache=MemoryCache())
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"address": ADDRESS_NODE}})
+            get_address("0x1", client=client)
+            get_address("0x1", client=client)
+            clock.now += 15
+            get_address("0x1", client=client)
+
+            assert m.call_count == 2
+
+    def test_pending_transactions_are_not_pinned(self, clock):
+        pending = {**TRANSACTION_NODE, "blockNumber": None, "status": None}
+        client = Client(cache=MemoryCache())
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                [
+                    {"json": {"data": {"transaction": pending}}},
+                    {"json": {"data": {"transaction": TRANSACTION_NODE}}},
+                ],
+            )
+            for _ in range(2):
+                assert (
+                    get_transaction("0x1", client=client, mode="dict")["status"] is None
+                )
+            clock.now += 15
+
+            assert get_transaction("0x1", client=client, mode="dict")["status"] == "OK"
+            assert m.call_count == 2
+
+    def test_recent_blocks_are_refetched_until_final(self, clock):
+        head = {**BLOCK_NODE, "timestamp": "2999-01-01T00:00:00.000000Z"}
+        client = Client(cache=MemoryCache())
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                [
+                    {"json": {"data": {"block": head}}},
+                    {"json": {"data": {"block": {**head, "number": 37}}}},
+                    {"json": {"data": {"block": head}}},
+                ],
+            )
+            get_block(5, client=client)
+            clock.now += 15
+            get_block(37, client=client)
+            get_block(5, client=client)
+            clock.now += 15
+            get_block(5, client=client)
+
+            assert m.call_count == 3
+
+    def test_projected_queries_are_cached_apart(self, graphql_server):
+        def respond(payload):
+            if "gasPrice" in payload["query"]:
+                return {"data": {"transaction": TRANSACTION_NODE}}
+            return {"data": {"transaction": {"hash": TRANSACTION_NODE["hash"]}}}
+
+        graphql_server.respond = respond
+        client = Client(url=graphql_server.url, cache=MemoryCache())
+
+        projected = get_transaction("0x1", fields=["hash"], client=client)
+        transaction = get_transaction("0x1", client=client)
+        get_transaction("0x1", fields=["hash"], client=client)
+
+        assert projected.hash == transaction.hash
+        assert transaction.gasPrice == 157368749629
+        assert len(graphql_server.requests) == 2
+
+    def test_failed_queries_are_not_cached(self):
+        client = Client(cache=MemoryCache())
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                [
+                    {"json": {"data": None, "errors": [{"message": "Timed out"}]}},
+                    {"json": {"data": {"block": BLOCK_NODE}}},
+                ],
+            )
+            with pytest.raises(TransportQueryError, match="Timed out"):
+                get_block(5, client=client)
+            assert get_block(5, client=client).number == 5
+            assert m.call_count == 2
+
+    def test_async_client_uses_cache(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": BLOCK_NODE}}
+        cache = MemoryCache()
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url, cache=cache) as client:
+                return [await get_block_async(5, client=client) for _ in range(3)]
+
+        blocks = asyncio.run(run())
+
+        assert len(graphql_server.requests) == 1
+        assert [i.number for i in blocks] == [5, 5, 5]
+        assert cache.stats.hits == 2
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from flare_explorer.coalescing import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_result(self):
+        single_flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"block": 1}
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(single_flight.do, "key", fn)]
+            started.wait(5)
+            futures += [executor.submit(single_flight.do, "key", fn) for _ in range(7)]
+            # give the followers time to start waiting on the running call
+            time.sleep(0.05)
+            release.set()
+            results = [i.result() for i in futures]
+
+        assert len(calls) == 1
+        assert all(i is results[0] for i in results)
+
+    def test_exception_is_raised_for_every_caller(self):
+        single_flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise ValueError("failed")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", fn)
+            started.wait(5)
+            follower = executor.submit(single_flight.do, "key", fn)
+            release.set()
+
+            for future in leader, follower:
+                with pytest.raises(ValueError, match="failed"):
+                    future.result()
+
+    def test_calls_after_completion_run_again(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        for _ in range(3):
+            single_flight.do("key", lambda: calls.append(1))
+
+        assert len(calls) == 3
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_calls_share_one_result(self):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"block": 1}
+
+        async def run():
+            single_flight = AsyncSingleFlight()
+            return await asyncio.gather(
+                *(single_flight.do("key", fn) for _ in range(10)),
+                single_flight.do("other", fn),
+            )
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 2
+        assert results == [{"block": 1}] * 11
+
+    def test_cancelling_one_caller_does_not_cancel_others(self):
+        async def fn():
+            await asyncio.sleep(0.02)
+            return 1
+
+        async def run():
+            single_flight = AsyncSingleFlight()
+            first = asyncio.ensure_future(single_flight.do("key", fn))
+            second = asyncio.ensure_future(single_flight.do("key", fn))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second, first.cancelled()
+
+        assert asyncio.run(run()) == (1, True)
@@ -0,0 +1,192 @@
+import base64
+from decimal import Decimal
+
+import pytest
+
+from flare_explorer.address import Address
+from flare_explorer.columnar import ColumnBatch
+from flare_explorer.serialization import build
+from flare_explorer.token_transfers import TokenTransfer
+from flare_explorer.transaction import (
+    BinaryTransaction,
+    InternalTransaction,
+    Transaction,
+)
+from tests.test_serialization import ADDRESS, TOKEN_TRANSFER
+from tests.test_transaction import INTERNAL_TRANSACTION_NODE, TRANSACTION_NODE
+
+ALICE = "0x" + "a" * 40
+BOB = "0x" + "b" * 40
+
+# relay id of TOKEN_TRANSFER, as returned by the api
+TOKEN_TRANSFER_ID = (
+    "VG9rZW5UcmFuc2Zlcjp7ImxvZ19pbmRleCI6MCwidHJhbnNhY3Rpb25faGFzaCI6IjB4NjY5N2Mx"
+    "OTc4MzU3YmE5MDIyNzdjN2U2NDNiNTY2OGNlOWMwZTExMzE5ZGE5MmY3ODg0MTM4Mjg4MWQ0NjJm"
+    "YyJ9"
+)
+
+
+def transfer(number, sender=ALICE, recipient=BOB, amount=1):
+    return {
+        **TOKEN_TRANSFER,
+        "amount": str(amount),
+        "blockNumber": number,
+        "fromAddressHash": sender,
+        "id": f"id_{number}",
+        "toAddressHash": recipient,
+        "transactionHash": f"0x{number:064x}",
+    }
+
+
+class TestColumnBatch:
+    @pytest.mark.parametrize("mode", ["model", "dict", "record"])
+    def test_rows_in_every_mode_are_stored_exactly(self, mode):
+        nodes = [TOKEN_TRANSFER, {**TOKEN_TRANSFER, "id": TOKEN_TRANSFER_ID}]
+
+        batch = ColumnBatch(
+            TokenTransfer, [build(TokenTransfer, i, mode) for i in nodes]
+        )
+
+        assert list(batch.rows("dict")) == nodes
+        assert batch[1] == TokenTransfer(**nodes[1])
+        assert batch.row(-1, "record") == build(TokenTransfer, nodes[1], "record")
+
+    def test_transactions_are_stored_exactly(self):
+        nodes = [TRANSACTION_NODE, {**TRANSACTION_NODE, "error": "Reverted"}]
+
+        batch = ColumnBatch(Transaction, nodes)
+
+        assert list(batch.rows("dict")) == nodes
+        assert list(ColumnBatch(InternalTransaction, [INTERNAL_TRANSACTION_NODE])) == [
+            InternalTransaction(**INTERNAL_TRANSACTION_NODE)
+        ]
+
+    def test_binary_data_is_held_decoded(self):
+        node = {**TRANSACTION_NODE, "input": "0xa9059cbb"}
+
+        batch = ColumnBatch(BinaryTransaction, [BinaryTransaction(**node)])
+
+        assert batch.row(0, "dict") == node
+        assert batch[0].input.tobytes() == bytes.fromhex("a9059cbb")
+
+    def test_rows_take_a_fraction_of_model_memory(self):
+        nodes = [transfer(i, amount=10**24 + i) for i in range(1000)]
+        for node in nodes:
+            local_id = (
+                f'{{"log_index":0,"transaction_hash":"{node["transactionHash"]}"}}'
+            )
+            node["id"] = base64.b64encode(f"TokenTransfer:{local_id}".encode()).decode()
+
+        batch = ColumnBatch(TokenTransfer, nodes)
+
+        # ids matching their relay id are derived rather than stored
+        assert batch.nbytes < 100 * len(batch)
+        assert batch.row(999, "dict") == nodes[999]
+
+    def test_signature_values_are_packed_in_words(self):
+        nodes = [
+            {**TRANSACTION_NODE, "r": str(2**256 - 1 - i), "s": str(2**255 + i)}
+            for i in range(100)
+        ]
+
+        batch = ColumnBatch(Transaction, nodes)
+
+        # 6 amounts of two words, and r and s of four
+        assert batch.nbytes < len(batch) * (6 * 16 + 2 * 32 + 150)
+        assert batch.column("r")[-1] == Decimal(2**256 - 100)
+        assert batch.row(50, "dict") == nodes[50]
+        assert batch.filter(s=str(2**255 + 7)).column("s") == [Decimal(2**255 + 7)]
+
+    def test_rows_are_appended(self):
+        batch = ColumnBatch(TokenTransfer)
+        batch.append(transfer(1))
+        batch.extend(iter([transfer(2), transfer(3)]))
+
+        assert len(batch) == 3
+        assert batch.column("blockNumber") == [1, 2, 3]
+        with pytest.raises(IndexError):
+            batch.row(3)
+
+    def test_wide_integers_are_stored(self):
+        batch = ColumnBatch(
+            TokenTransfer, [transfer(1), transfer(2**40, amount=2**300)]
+        )
+
+        assert batch.column("blockNumber") == [1, 2**40]
+        assert batch.column("amount") == [Decimal(1), Decimal(2**300)]
+        assert batch.column("tokenId") == [None, None]
+
+    @pytest.mark.parametrize(
+        "node",
+        [
+            transfer(1, amount=-1),
+            {**transfer(1), "amount": "1.5"},
+            {**transfer(1), "transactionHash": "0x12"},
+        ],
+    )
+    def test_values_that_can_not_be_stored_raise_exception(self, node):
+        with pytest.raises(ValueError):
+            ColumnBatch(TokenTransfer, [node])
+
+    def test_nested_models_raise_exception(self):
+        with pytest.raises(TypeError, match="smartContract holds nested objects"):
+            ColumnBatch(Address, [ADDRESS])
+
+
+class TestFiltersAndAggregates:
+    @pytest.fixture
+    def batch(self):
+        return ColumnBatch(
+            TokenTransfer,
+            [
+                transfer(1, ALICE, BOB, amount=5),
+                transfer(2, BOB, ALICE, amount=2),
+                transfer(3, ALICE, BOB, amount=10**30),
+                {**transfer(4, BOB, ALICE), "tokenId": "7"},
+            ],
+        )
+
+    def test_filter_by_equal_values_and_functions(self, batch):
+        received = batch.filter(toAddressHash=BOB, blockNumber=lambda i: i > 1)
+
+        assert received.column("blockNumber") == [3]
+        assert batch.filter(tokenId=None).column("blockNumber") == [1, 2, 3]
+        assert batch.filter(transactionHash=f"0x{2:064x}").column("id") == ["id_2"]
+        assert len(batch.filter(fromAddressHash="0x" + "c" * 40)) == 0
+
+    def test_filter_by_derived_id(self):
+        batch = ColumnBatch(
+            TokenTransfer, [{**TOKEN_TRANSFER, "id": TOKEN_TRANSFER_ID}, transfer(1)]
+        )
+
+        assert batch.filter(id=TOKEN_TRANSFER_ID).column("id") == [TOKEN_TRANSFER_ID]
+
+    def test_filtered_batches_can_be_extended(self, batch):
+        filtered = batch.filter(fromAddressHash=ALICE)
+        filtered.append(transfer(5, "0x" + "c" * 40, ALICE))
+
+        assert filtered.column("fromAddressHash") == [ALICE, ALICE, "0x" + "c" * 40]
+        assert batch.column("fromAddressHash") == [ALICE, BOB, ALICE, BOB]
+
+    def test_sums(self, batch):
+        assert batch.sum("amount") == Decimal(10**30 + 8)
+        assert batch.sum("blockNumber") == 10
+        assert batch.sum("tokenId") == Decimal(7)
+        with pytest.raises(TypeError):
+            batch.sum("id")
+
+    def test_sums_by_address(self, batch):
+        assert batch.sum_by("amount", by="toAddressHash") == {
+            BOB: Decimal(10**30 + 5),
+            ALICE: Decimal(3),
+        }
+        assert batch.sum_by("amount", by="blockNumber")[3] == Decimal(10**30)
+
+    def test_wide_amounts_are_added_up(self):
+        batch = ColumnBatch(
+            TokenTransfer,
+            [transfer(1, amount=2**255), transfer(2, amount=2**255), transfer(3)],
+        )
+
+        assert batch.sum("amount") == Decimal(2**256 + 1)
+        assert batch.sum_by("amount", by="toAddressHash") == {BOB: Decimal(2**256 + 1)}
@@ -0,0 +1,111 @@
+import json
+import random
+import time
+
+import pytest
+
+from flare_explorer.crawler import crawl_blocks
+from flare_explorer.exceptions import FlareExplorerQueryError
+from flare_explorer.gql_client import Client
+from tests.test_block import block_node
+
+
+@pytest.fixture
+def chain_server(graphql_server):
+    """
+    Serves blocks 1 to 500 with random latency, so batches complete out of
+    order. Block 404 is missing and lookups of block 666 fail
+    """
+
+    def respond(payload):
+        time.sleep(random.uniform(0, 0.02))
+        data, errors = {}, []
+        for variable, number in payload["variables"].items():
+            alias = variable.replace("v", "a")
+            if int(number) > 500 or int(number) in (404, 666):
+                data[alias] = None
+                reason = "timed out" if int(number) == 666 else "not found"
+                errors.append(
+                    {"message": f"Block number {number} {reason}.", "path": [alias]}
+                )
+            else:
+                data[alias] = block_node(int(number))
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestCrawlBlocks:
+    def test_blocks_are_yielded_in_order(self, chain_server):
+        crawl = crawl_blocks(
+            1, 201, batch_size=10, workers=4, client=Client(url=chain_server.url)
+        )
+
+        assert [i.number for i in crawl] == list(range(1, 201))
+        assert len(chain_server.requests) == 20
+        assert crawl.next_block == 201
+
+    def test_unordered_crawl_yields_every_block(self, chain_server):
+        crawl = crawl_blocks(
+            1,
+            201,
+            batch_size=10,
+            workers=4,
+            ordered=False,
+            client=Client(url=chain_server.url),
+        )
+
+        assert sorted(i.number for i in crawl) == list(range(1, 201))
+        assert crawl.next_block == 201
+
+    def test_last_batch_stops_at_end(self, chain_server):
+        crawl = crawl_blocks(
+            1, 26, batch_size=10, client=Client(url=chain_server.url), mode="dict"
+        )
+
+        assert [i["number"] for i in crawl] == list(range(1, 26))
+        assert {f"v{i}": 21 + i for i in range(5)} in [
+            i["variables"] for i in chain_server.requests
+        ]
+
+    def test_missing_blocks_are_skipped_and_counted(self, chain_server):
+        crawl = crawl_blocks(401, 411, client=Client(url=chain_server.url))
+
+        assert [i.number for i in crawl] == [*range(401, 404), *range(405, 411)]
+        assert crawl.stats.blocks == 9
+        assert crawl.stats.missing == 1
+        assert crawl.stats.elapsed > 0
+        assert crawl.stats.blocks_per_second == pytest.approx(9 / crawl.stats.elapsed)
+
+    def test_failed_batch_raises_exception(self, chain_server):
+        crawl = crawl_blocks(481, 701, workers=2, client=Client(url=chain_server.url))
+
+        with pytest.raises(FlareExplorerQueryError, match="666 timed out"):
+            list(crawl)
+
+    def test_crawl_resumes_from_checkpoint(self, chain_server, tmp_path):
+        checkpoint = tmp_path / "crawl.json"
+        client = Client(url=chain_server.url)
+        with crawl_blocks(
+            1, 101, batch_size=10, checkpoint=checkpoint, client=client
+        ) as crawl:
+            first = [next(crawl).number for _ in range(35)]
+
+        assert json.loads(checkpoint.read_text()) == {"next_block": 31}
+
+        rest = [
+            i.number
+            for i in crawl_blocks(
+                1, 101, batch_size=10, checkpoint=checkpoint, client=client
+            )
+        ]
+
+        assert first == list(range(1, 36))
+        assert rest == list(range(31, 101))
+        assert json.loads(checkpoint.read_text()) == {"next_block": 101}
+
+    def test_close_before_iterating_makes_no_requests(self, chain_server):
+        crawl_blocks(1, 101, client=Client(url=chain_server.url)).close()
+
+        assert chain_server.requests == []
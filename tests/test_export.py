@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from flare_explorer.address import Address
+from flare_explorer.block import Block
+from flare_explorer.export import (
+    arrow_schema,
+    iter_record_batches,
+    to_arrow,
+    write_csv,
+    write_parquet,
+)
+from flare_explorer.serialization import build
+from flare_explorer.token_transfers import TokenTransfer
+from flare_explorer.transaction import BinaryTransaction, Transaction
+from tests.test_block import block_node
+from tests.test_serialization import ADDRESS, TOKEN_TRANSFER
+from tests.test_transaction import TRANSACTION_NODE
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def transfers(count):
+    return [{**TOKEN_TRANSFER, "id": f"id_{i}", "blockNumber": i} for i in range(count)]
+
+
+class TestArrowSchema:
+    def test_amounts_are_fixed_width_columns(self):
+        schema = arrow_schema(TokenTransfer)
+
+        assert schema.field("amount").type == pa.decimal128(38, 0)
+        assert schema.field("blockNumber").type == pa.int64()
+        assert not schema.field("amount").nullable
+        assert schema.field("tokenId").nullable
+
+    def test_timestamps_and_nested_objects(self):
+        assert arrow_schema(Block).field("timestamp").type == pa.timestamp(
+            "us", tz="UTC"
+        )
+        assert pa.types.is_struct(arrow_schema(Address).field("smartContract").type)
+
+    def test_signature_values_are_strings(self):
+        schema = arrow_schema(Transaction)
+
+        assert schema.field("r").type == pa.string()
+        assert schema.field("value").type == pa.decimal128(38, 0)
+
+    def test_binary_data_is_written_as_hex(self):
+        rows = [BinaryTransaction(**TRANSACTION_NODE)]
+
+        assert arrow_schema(BinaryTransaction).field("input").type == pa.string()
+        assert to_arrow(rows, BinaryTransaction).column("input").to_pylist() == ["0x"]
+
+    def test_types_replace_default_types(self):
+        schema = arrow_schema(TokenTransfer, types={"amount": pa.decimal256(76, 0)})
+
+        assert schema.field("amount").type == pa.decimal256(76, 0)
+
+
+class TestIterRecordBatches:
+    def test_batches_hold_at_most_batch_size_rows(self):
+        batches = list(iter_record_batches(transfers(5), TokenTransfer, batch_size=2))
+
+        assert [i.num_rows for i in batches] == [2, 2, 1]
+        assert batches[2].column("blockNumber").to_pylist() == [4]
+
+    @pytest.mark.parametrize("mode", ["model", "dict", "record"])
+    def test_rows_in_every_mode_give_same_table(self, mode):
+        rows = [build(TokenTransfer, i, mode) for i in transfers(3)]
+
+        assert to_arrow(rows, TokenTransfer).equals(
+            to_arrow(transfers(3), TokenTransfer)
+        )
+
+    def test_values_are_converted_exactly(self):
+        block = to_arrow([block_node(7)], Block).to_pylist()[0]
+        address = to_arrow([build(Address, ADDRESS, "record")], Address).to_pylist()[0]
+        transaction = to_arrow([TRANSACTION_NODE], Transaction).to_pylist()[0]
+
+        assert block["timestamp"] == datetime(
+            2023, 1, 22, 15, 54, 20, tzinfo=timezone.utc
+        )
+        assert block["totalDifficulty"] == Decimal(7)
+        assert address["smartContract"]["name"] == "PoodleCoin"
+        assert transaction["gasPrice"] == Decimal("157368749629")
+        assert transaction["r"] == "1"
+
+    def test_values_too_wide_for_decimal_raise_exception(self):
+        rows = [{**TOKEN_TRANSFER, "amount": "1" * 39}]
+
+        with pytest.raises(ValueError, match="amount has values of 39 digits"):
+            to_arrow(rows, TokenTransfer)
+
+        table = to_arrow(rows, TokenTransfer, types={"amount": pa.decimal256(76, 0)})
+        assert table.column("amount")[0].as_py() == Decimal("1" * 39)
+
+
+class TestWriteFiles:
+    def test_parquet_is_written_in_row_groups(self, tmp_path):
+        path = tmp_path / "transfers.parquet"
+
+        written = write_parquet(iter(transfers(5)), TokenTransfer, path, batch_size=2)
+
+        assert written == 5
+        assert pq.ParquetFile(path).num_row_groups == 3
+        assert pq.read_table(path).equals(to_arrow(transfers(5), TokenTransfer))
+
+    def test_csv_is_written_with_header(self, tmp_path):
+        path = tmp_path / "transfers.csv"
+
+        assert write_csv(transfers(2), TokenTransfer, path, batch_size=1) == 2
+
+        lines = path.read_text().splitlines()
+        assert lines[0].split(",")[:2] == ['"amount"', '"blockNumber"']
+        assert lines[1].startswith("495000000000000000000000000,0,")
+        assert len(lines) == 3
@@ -1,26 +1,75 @@
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import requests_mock
 from gql.transport.exceptions import TransportQueryError
+from graphql import print_ast
 
-from flare_explorer.exceptions import FlareExplorerQueryError
+from flare_explorer.exceptions import FlareExplorerQueryError, QueryComplexityLimit
 from flare_explorer.gql_client import (
     API_URL,
+    AsyncClient,
     Client,
-    generate_after_pagination_query_line,
+    SubscriptionClient,
+    aliased_query,
+    aliased_variables,
+    chunked,
+    get_default_async_client,
+    get_default_client,
+    parse_query,
+    set_default_client,
+    unpack_aliased_response,
 )
+from flare_explorer.retry import DEFAULT_RECONNECT_EXCEPTIONS, RetryPolicy
 
 
-@pytest.mark.parametrize(
-    "previous_cursor,expected_query_line",
-    [
-        ("", ""),
-        (None, ""),
-        ("prev_cursor", 'after: "prev_cursor"'),
-    ],
-)
-def test_generate_after_pagination_query_line(previous_cursor, expected_query_line):
-    result = generate_after_pagination_query_line(previous_cursor)
-    assert result == expected_query_line
+def test_chunked_splits_items_in_order():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+
+def test_parse_query_parses_each_query_once():
+    query = "{ block(number: 1) { hash } }"
+
+    assert parse_query(query) is parse_query(query)
+
+
+def test_aliased_query_selects_root_once_per_variable():
+    query = aliased_query("block", "number", "Int!", 2, "hash number")
+
+    assert print_ast(query) == print_ast(
+        parse_query(
+            "query ($v0: Int!, $v1: Int!) {"
+            " a0: block(number: $v0) { hash number }"
+            " a1: block(number: $v1) { hash number } }"
+        )
+    )
+    assert aliased_query("block", "number", "Int!", 2, "hash number") is query
+    assert aliased_variables([7, 9]) == {"v0": 7, "v1": 9}
+
+
+class TestUnpackAliasedResponse:
+    def test_results_are_mapped_to_keys(self):
+        data = {"a0": {"number": 5}, "a1": None}
+        errors = [{"message": "Block number 6 was not found.", "path": ["a1"]}]
+
+        assert unpack_aliased_response([5, 6], data, errors) == {
+            5: {"number": 5},
+            6: None,
+        }
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            {"message": "Internal server error", "path": ["a1"]},
+            {"message": "Syntax error"},
+        ],
+    )
+    def test_errors_other_than_not_found_raise_exception(self, error):
+        with pytest.raises(FlareExplorerQueryError, match=error["message"]):
+            unpack_aliased_response([5, 6], {"a0": {}, "a1": None}, [error])
 
 
 class TestClient:
@@ -50,6 +99,42 @@ class TestClient:
                 ):
                     client.query("{address {contractCode}}")
 
+        def test_complexity_error_raises_query_complexity_limit(self, client):
+            with requests_mock.Mocker() as m:
+                m.post(
+                    API_URL,
+                    status_code=200,
+                    json={
+                        "data": None,
+                        "errors": [
+                            {
+                                "message": "Operation is too complex: complexity "
+                                "is 1210 and maximum is 1000",
+                            },
+                        ],
+                    },
+                )
+                with pytest.raises(QueryComplexityLimit, match="too complex"):
+                    client.query("{address {contractCode}}")
+
+        def test_query_partial_returns_data_and_errors(self, client):
+            errors = [{"message": "Block not found.", "path": ["a1"]}]
+            with requests_mock.Mocker() as m:
+                m.post(
+                    API_URL,
+                    status_code=200,
+                    json={
+                        "data": {"a0": {"hash": "0x1"}, "a1": None},
+                        "errors": errors,
+                    },
+                )
+                data, query_errors = client.query_partial(
+                    "{a0: block(number: 1){hash}}"
+                )
+
+            assert data == {"a0": {"hash": "0x1"}, "a1": None}
+            assert query_errors == errors
+
         def test_empty_response_raises_exception(self, client):
             with requests_mock.Mocker() as m:
                 m.post(
@@ -79,3 +164,272 @@ class TestClient:
                 response = client.query("{transaction(hash: asdf){id}}")
 
                 assert response == {"address": ["test"]}
+
+    class TestConnectionPooling:
+        def test_session_is_reused_between_queries(self, client):
+            with requests_mock.Mocker() as m:
+                m.post(API_URL, status_code=200, json={"data": {"block": {}}})
+                client.query("{block(number: 1){hash}}")
+                session = client._transport.session
+                client.query("{block(number: 2){hash}}")
+
+                assert client._transport.session is session
+                assert m.call_count == 2
+
+        def test_adapter_is_sized_by_pool_settings(self):
+            client = Client(pool_connections=2, pool_maxsize=7)
+            with requests_mock.Mocker() as m:
+                m.post(API_URL, status_code=200, json={"data": {"block": {}}})
+                client.query("{block(number: 1){hash}}")
+
+            adapter = client._transport.session.get_adapter(API_URL)
+            assert adapter._pool_connections == 2
+            assert adapter._pool_maxsize == 7
+            # retries are made by the client's retry policy, not the adapter
+            assert adapter.max_retries.total == 0
+
+        def test_close_releases_session_and_client_reconnects(self):
+            with Client() as client, requests_mock.Mocker() as m:
+                m.post(API_URL, status_code=200, json={"data": {"block": {}}})
+                client.query("{block(number: 1){hash}}")
+                client.close()
+                assert client._transport.session is None
+
+                client.query("{block(number: 1){hash}}")
+                assert client._transport.session is not None
+            assert client._transport.session is None
+
+        def test_query_is_sent_to_configured_url(self):
+            client = Client(url="http://localhost:8000/graphql")
+            with requests_mock.Mocker() as m:
+                m.post(
+                    "http://localhost:8000/graphql",
+                    status_code=200,
+                    json={"data": {"block": {}}},
+                )
+                assert client.query("{block(number: 1){hash}}") == {"block": {}}
+
+
+class TestDefaultClient:
+    @pytest.fixture(autouse=True)
+    def reset_default_client(self):
+        set_default_client(None)
+        yield
+        set_default_client(None)
+
+    def test_default_client_is_shared(self):
+        assert get_default_client() is get_default_client()
+
+    def test_set_default_client_replaces_and_closes_previous(self):
+        previous = get_default_client()
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"block": {}}})
+            previous.query("{block(number: 1){hash}}")
+
+        replacement = Client()
+        set_default_client(replacement)
+
+        assert get_default_client() is replacement
+        assert previous._transport.session is None
+
+
+class TestAsyncClient:
+    def test_json_is_returned_for_successful_request(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"address": ["test"]}}
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await client.query("{transaction(hash: asdf){id}}")
+
+        assert asyncio.run(run()) == {"address": ["test"]}
+        assert "transaction(hash: asdf)" in graphql_server.requests[0]["query"]
+
+    def test_empty_response_raises_exception(self, graphql_server):
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                await client.query("{address {contractCode}}")
+
+        with pytest.raises(
+            FlareExplorerQueryError,
+            match="No response received from GraphQL API",
+        ):
+            asyncio.run(run())
+
+    def test_concurrent_queries_are_limited(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {}}}
+        graphql_server.delay = 0.02
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url, max_concurrency=3) as client:
+                await asyncio.gather(
+                    *(
+                        client.query(
+                            "query ($n: Int!) {block(number: $n){hash}}", {"n": i}
+                        )
+                        for i in range(12)
+                    )
+                )
+
+        asyncio.run(run())
+
+        assert len(graphql_server.requests) == 12
+        assert graphql_server.max_in_flight == 3
+
+    def test_client_reconnects_after_close(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {}}}
+
+        async def run():
+            client = AsyncClient(url=graphql_server.url)
+            await client.query("{block(number: 1){hash}}")
+            await client.close()
+            result = await client.query("{block(number: 1){hash}}")
+            await client.close()
+            return result
+
+        assert asyncio.run(run()) == {"block": {}}
+
+    def test_default_client_is_shared_within_event_loop(self):
+        async def run():
+            return get_default_async_client(), get_default_async_client()
+
+        first, second = asyncio.run(run())
+        other, _ = asyncio.run(run())
+
+        assert first is second
+        assert first is not other
+
+
+class TestQueryCoalescing:
+    @staticmethod
+    def query_from_threads(client, threads):
+        barrier = threading.Barrier(threads)
+
+        def query(_):
+            barrier.wait()
+            return client.query("{block(number: 1){hash}}")
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(query, range(threads)))
+
+    def test_identical_concurrent_queries_share_one_request(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {"hash": "0x1"}}}
+        graphql_server.delay = 0.1
+
+        with Client(url=graphql_server.url) as client:
+            responses = self.query_from_threads(client, 16)
+
+        assert len(graphql_server.requests) == 1
+        assert responses == [{"block": {"hash": "0x1"}}] * 16
+
+    def test_queries_are_not_shared_when_coalescing_disabled(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {"hash": "0x1"}}}
+        graphql_server.delay = 0.1
+
+        with Client(url=graphql_server.url, coalesce=False) as client:
+            self.query_from_threads(client, 4)
+
+        assert len(graphql_server.requests) == 4
+
+    def test_errors_are_shared_with_waiting_callers(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": None,
+            "errors": [{"message": "Internal server error"}],
+        }
+        graphql_server.delay = 0.1
+
+        with (
+            Client(url=graphql_server.url) as client,
+            pytest.raises(TransportQueryError, match="Internal server error"),
+        ):
+            self.query_from_threads(client, 8)
+
+        assert len(graphql_server.requests) == 1
+
+    def test_identical_concurrent_async_queries_share_one_request(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {"hash": "0x1"}}}
+        graphql_server.delay = 0.05
+        query = "query ($n: Int!) {block(number: $n){hash}}"
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await asyncio.gather(
+                    *(client.query(query, {"n": i % 2}) for i in range(20))
+                )
+
+        responses = asyncio.run(run())
+
+        assert sorted(i["variables"]["n"] for i in graphql_server.requests) == [0, 1]
+        assert len(responses) == 20
+
+
+SUBSCRIPTION = "subscription ($h: AddressHash!) { tokenTransfers(tokenContractAddressHash: $h) { id } }"
+
+
+def fast_reconnect(max_attempts=3):
+    return RetryPolicy(
+        max_attempts=max_attempts, backoff=0.01, exceptions=DEFAULT_RECONNECT_EXCEPTIONS
+    )
+
+
+class TestSubscriptionClient:
+    def test_results_are_received(self, websocket_server):
+        async def run():
+            async with SubscriptionClient(url=websocket_server.url) as client:
+                results = client.subscribe(SUBSCRIPTION, {"h": "0x1"})
+                first = asyncio.ensure_future(anext(results))
+                await websocket_server.wait_for_subscriptions(1)
+                await asyncio.to_thread(
+                    websocket_server.push, {"tokenTransfers": [{"id": "a"}]}
+                )
+                result = await first
+                await results.aclose()
+                return result
+
+        assert asyncio.run(run()) == {"tokenTransfers": [{"id": "a"}]}
+        assert websocket_server.documents[0]["variables"] == {"h": "0x1"}
+
+    def test_subscription_is_made_again_after_reconnecting(self, websocket_server):
+        backfills = []
+
+        async def backfill():
+            backfills.append(len(websocket_server.documents))
+            return [{"tokenTransfers": [{"id": "missed"}]}]
+
+        async def run():
+            async with SubscriptionClient(
+                url=websocket_server.url, retry=fast_reconnect()
+            ) as client:
+                results = client.subscribe(SUBSCRIPTION, {"h": "0x1"}, backfill)
+                received = asyncio.ensure_future(anext(results))
+                await websocket_server.wait_for_subscriptions(1)
+                await asyncio.to_thread(websocket_server.drop)
+                missed = await received
+                received = asyncio.ensure_future(anext(results))
+                await websocket_server.wait_for_subscriptions(2)
+                await asyncio.to_thread(
+                    websocket_server.push, {"tokenTransfers": [{"id": "new"}]}
+                )
+                new = await received
+                await results.aclose()
+                return [missed, new]
+
+        assert asyncio.run(run()) == [
+            {"tokenTransfers": [{"id": "missed"}]},
+            {"tokenTransfers": [{"id": "new"}]},
+        ]
+        assert backfills == [1]
+
+    def test_reconnecting_gives_up_after_max_attempts(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+
+        async def run():
+            client = SubscriptionClient(
+                url=f"ws://127.0.0.1:{port}/socket/websocket",
+                retry=fast_reconnect(max_attempts=2),
+            )
+            return [i async for i in client.subscribe(SUBSCRIPTION, {"h": "0x1"})]
+
+        with pytest.raises(ConnectionRefusedError):
+            asyncio.run(run())
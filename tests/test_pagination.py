@@ -0,0 +1,217 @@
+import threading
+
+import pytest
+
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import PageInfo
+from flare_explorer.pagination import (
+    AdaptivePageSize,
+    PageIterator,
+    validate_page_size,
+)
+
+
+class FakePages:
+    """Pages of consecutive integers, cursors are the page numbers"""
+
+    def __init__(self, pages, page_size=3):
+        self.pages = pages
+        self.page_size = page_size
+        self.calls = []
+        self.threads = set()
+
+    def __call__(self, previous_cursor, page_size):
+        self.calls.append(previous_cursor)
+        self.threads.add(threading.get_ident())
+        page = 0 if previous_cursor is None else int(previous_cursor) + 1
+        start = page * self.page_size
+        return list(range(start, start + self.page_size)), PageInfo(
+            endCursor=str(page),
+            hasNextPage=page + 1 < self.pages,
+            hasPreviousPage=page > 0,
+            startCursor=str(page),
+        )
+
+
+class SizedPages:
+    """Offset cursors into 1000 rows, pages larger than limit are too complex"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.sizes = []
+
+    def __call__(self, previous_cursor, page_size):
+        self.sizes.append(page_size)
+        if page_size > self.limit:
+            raise QueryComplexityLimit("Operation is too complex")
+        start = 0 if previous_cursor is None else int(previous_cursor)
+        end = min(start + page_size, 1000)
+        return list(range(start, end)), PageInfo(
+            endCursor=str(end),
+            hasNextPage=end < 1000,
+            hasPreviousPage=start > 0,
+            startCursor=str(start),
+        )
+
+
+@pytest.mark.parametrize("page_size", [0, -1, 51])
+def test_validate_page_size_rejects_out_of_range_sizes(page_size):
+    with pytest.raises(QueryComplexityLimit, match="between 1 and 50"):
+        validate_page_size(page_size, 50)
+
+
+def test_validate_page_size_accepts_sizes_in_range():
+    validate_page_size(1, 50)
+    validate_page_size(50, 50)
+
+
+class TestAdaptivePageSize:
+    def test_size_grows_up_to_max_page_size(self):
+        page_sizes = AdaptivePageSize(10, 50)
+        sizes = []
+        for _ in range(4):
+            sizes.append(page_sizes.size)
+            page_sizes.accepted()
+
+        assert sizes == [10, 20, 40, 50]
+
+    def test_rejected_size_backs_off_and_caps_growth(self):
+        page_sizes = AdaptivePageSize(10, 100)
+        page_sizes.accepted()
+        page_sizes.accepted()
+
+        assert page_sizes.size == 40
+        assert page_sizes.rejected() is True
+        assert page_sizes.size == 30
+        page_sizes.accepted()
+        assert page_sizes.size == 39
+
+    def test_rejected_smallest_size_cannot_back_off(self):
+        assert AdaptivePageSize(1, 10).rejected() is False
+
+
+class TestPageIterator:
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_all_rows_are_yielded_across_pages(self, prefetch):
+        fetch_page = FakePages(pages=3)
+
+        rows = list(PageIterator(fetch_page, prefetch=prefetch))
+
+        assert rows == list(range(9))
+        assert fetch_page.calls == [None, "0", "1"]
+
+    def test_next_page_is_fetched_in_background(self):
+        fetch_page = FakePages(pages=3)
+
+        list(PageIterator(fetch_page, prefetch=True))
+
+        assert threading.get_ident() in fetch_page.threads
+        assert len(fetch_page.threads) == 2
+
+    def test_rows_are_fetched_lazily(self):
+        fetch_page = FakePages(pages=5)
+        iterator = PageIterator(fetch_page, prefetch=False)
+
+        assert fetch_page.calls == []
+        next(iterator)
+        assert fetch_page.calls == [None]
+
+    def test_max_items_stops_iteration(self):
+        fetch_page = FakePages(pages=5)
+        iterator = PageIterator(fetch_page, max_items=4)
+
+        assert list(iterator) == [0, 1, 2, 3]
+        assert iterator.items == 4
+        assert len(fetch_page.calls) == 2
+
+    def test_max_pages_stops_fetching(self):
+        fetch_page = FakePages(pages=5)
+        iterator = PageIterator(fetch_page, max_pages=2)
+
+        assert list(iterator) == list(range(6))
+        assert iterator.pages == 2
+        assert fetch_page.calls == [None, "0"]
+
+    def test_iteration_starts_after_previous_cursor(self):
+        fetch_page = FakePages(pages=3)
+
+        assert list(PageIterator(fetch_page, previous_cursor="0")) == list(range(3, 9))
+
+    def test_cursor_advances_when_page_is_fully_consumed(self):
+        iterator = PageIterator(FakePages(pages=3), prefetch=False)
+
+        assert [next(iterator) for _ in range(2)] == [0, 1]
+        assert iterator.cursor is None
+        next(iterator)
+        assert iterator.cursor == "0"
+
+    def test_resuming_from_cursor_continues_iteration(self):
+        fetch_page = FakePages(pages=3)
+        first = PageIterator(fetch_page, max_items=3)
+        consumed = list(first)
+
+        resumed = list(PageIterator(fetch_page, previous_cursor=first.cursor))
+
+        assert consumed + resumed == list(range(9))
+
+    def test_empty_last_page_keeps_cursor(self):
+        pages = iter(
+            [
+                (
+                    [1],
+                    PageInfo(
+                        endCursor="a",
+                        hasNextPage=True,
+                        hasPreviousPage=False,
+                        startCursor="a",
+                    ),
+                ),
+                (
+                    [],
+                    PageInfo(
+                        endCursor=None,
+                        hasNextPage=False,
+                        hasPreviousPage=True,
+                        startCursor=None,
+                    ),
+                ),
+            ]
+        )
+        iterator = PageIterator(lambda cursor, page_size: next(pages))
+
+        assert list(iterator) == [1]
+        assert iterator.cursor == "a"
+
+    def test_close_stops_iteration(self):
+        with PageIterator(FakePages(pages=5)) as iterator:
+            next(iterator)
+        assert list(iterator) == []
+
+    def test_fixed_page_size_is_passed_to_fetcher(self):
+        fetch_page = SizedPages(limit=100)
+
+        list(PageIterator(fetch_page, page_size=25, max_pages=3))
+
+        assert fetch_page.sizes == [25, 25, 25]
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_adaptive_page_size_grows_then_backs_off(self, prefetch):
+        fetch_page = SizedPages(limit=70)
+        iterator = PageIterator(
+            fetch_page,
+            page_size=10,
+            adaptive=True,
+            max_page_size=200,
+            prefetch=prefetch,
+        )
+
+        assert list(iterator) == list(range(1000))
+        assert fetch_page.sizes[:6] == [10, 20, 40, 80, 60, 79]
+        assert fetch_page.sizes[-1] == 70
+        assert len(fetch_page.sizes) < 1000 // 10 // 2
+
+    def test_adaptive_page_size_raises_when_smallest_page_is_rejected(self):
+        iterator = PageIterator(SizedPages(limit=0), page_size=4, adaptive=True)
+
+        with pytest.raises(QueryComplexityLimit):
+            list(iterator)
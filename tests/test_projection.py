@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+from graphql import print_ast
+
+from flare_explorer.address import _ADDRESSES_QUERY, Address, SmartContract
+from flare_explorer.cache import query_text
+from flare_explorer.exceptions import InvalidFieldSelection
+from flare_explorer.projection import partial_model, project_query, selection
+from flare_explorer.serialization import build
+from tests.test_serialization import ADDRESS
+
+
+class TestSelection:
+    def test_fields_are_selected_in_model_order(self):
+        assert selection(Address, ["hash", "fetchedCoinBalance"]) == (
+            "fetchedCoinBalance hash"
+        )
+
+    def test_nested_fields_are_selected_with_dotted_paths(self):
+        assert selection(Address, ["smartContract.name", "smartContract.abi"]) == (
+            "smartContract { abi name }"
+        )
+
+    def test_nested_object_selects_all_its_fields(self):
+        assert selection(Address, ["smartContract.name", "smartContract"]) == (
+            f"smartContract {{ {' '.join(SmartContract.model_fields)} }}"
+        )
+
+    def test_none_selects_every_field(self):
+        assert selection(SmartContract, None) == " ".join(SmartContract.model_fields)
+
+    @pytest.mark.parametrize(
+        "fields", [[], "hash", ["balance"], ["hash.name"], ["smartContract.source"]]
+    )
+    def test_invalid_fields_raise_exception(self, fields):
+        with pytest.raises(InvalidFieldSelection):
+            selection(Address, fields)
+
+
+class TestPartialModel:
+    def test_partial_model_has_only_selected_fields(self):
+        model = partial_model(Address, ["fetchedCoinBalance", "smartContract.name"])
+
+        row = model(fetchedCoinBalance="1.5", smartContract={"name": "A"})
+
+        assert list(model.model_fields) == ["fetchedCoinBalance", "smartContract"]
+        assert row.fetchedCoinBalance == Decimal("1.5")
+        assert row.smartContract.name == "A"
+        assert model(fetchedCoinBalance="1", smartContract=None).smartContract is None
+
+    def test_partial_models_are_cached(self):
+        assert partial_model(Address, ["hash"]) is partial_model(Address, ("hash",))
+
+    def test_selecting_every_field_returns_model(self):
+        assert partial_model(Address, list(Address.model_fields)) is Address
+        assert partial_model(Address, None) is Address
+
+    def test_single_field_records_hold_a_tuple(self):
+        row = build(partial_model(Address, ["hash"]), ADDRESS, "record")
+
+        assert tuple(row) == (ADDRESS["hash"],)
+
+
+class TestProjectQuery:
+    def test_rows_select_only_given_fields(self):
+        query, model = project_query(
+            _ADDRESSES_QUERY, ("addresses",), Address, ["fetchedCoinBalance"]
+        )
+
+        assert "addresses(hashes: $hashes) {\n    fetchedCoinBalance\n  }" in (
+            print_ast(query)
+        )
+        assert "contractCode" in print_ast(_ADDRESSES_QUERY)
+        assert model is partial_model(Address, ["fetchedCoinBalance"])
+
+    def test_projected_query_text_is_the_projection(self):
+        query, _ = project_query(
+            _ADDRESSES_QUERY, ("addresses",), Address, ["fetchedCoinBalance"]
+        )
+
+        assert query_text(query) == print_ast(query)
+        assert "contractCode" not in query_text(query)
+
+    def test_projected_queries_are_cached(self):
+        first, _ = project_query(_ADDRESSES_QUERY, ("addresses",), Address, ["hash"])
+        second, _ = project_query(_ADDRESSES_QUERY, ("addresses",), Address, ["hash"])
+
+        assert first is second
+
+    def test_no_fields_returns_query_unchanged(self):
+        assert project_query(_ADDRESSES_QUERY, ("addresses",), Address, None) == (
+            _ADDRESSES_QUERY,
+            Address,
+        )
@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from flare_explorer import retry as retry_module
+from flare_explorer.exceptions import QueryTimeout
+from flare_explorer.gql_client import AsyncClient, Client
+from flare_explorer.retry import RetryPolicy
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns ok"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, remaining):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(retry_module.time, "sleep", sleeps.append)
+    return sleeps
+
+
+class TestRetryPolicy:
+    @pytest.mark.parametrize(
+        "error,expected",
+        [
+            (TransportServerError("Service unavailable", 503), True),
+            (TransportServerError("Too many requests", 429), True),
+            (TransportServerError("Bad request", 400), False),
+            (requests.ConnectionError("Connection reset"), True),
+            (requests.ReadTimeout("Read timed out"), True),
+            (asyncio.TimeoutError(), True),
+            (TransportQueryError("Block not found"), False),
+        ],
+    )
+    def test_is_retryable(self, error, expected):
+        assert RetryPolicy().is_retryable(error) is expected
+
+    def test_delay_doubles_up_to_max_backoff(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+
+        assert [policy.delay(i) for i in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+    def test_jittered_delay_is_within_backoff(self):
+        policy = RetryPolicy(backoff=1)
+
+        delays = [policy.delay(3) for _ in range(100)]
+
+        assert all(0 <= i <= 4 for i in delays)
+        assert len(set(delays)) > 1
+
+    def test_retryable_errors_are_retried(self, sleeps):
+        fn = Flaky(requests.ConnectionError(), TransportServerError("", 503))
+
+        result = RetryPolicy(backoff=1, jitter=False).call(fn)
+
+        assert result == "ok"
+        assert fn.calls == 3
+        assert sleeps == [1, 2]
+
+    def test_last_error_is_raised_after_max_attempts(self, sleeps):
+        fn = Flaky(*(TransportServerError(f"{i}", 503) for i in range(3)))
+
+        with pytest.raises(TransportServerError, match="1"):
+            RetryPolicy(max_attempts=2).call(fn)
+        assert fn.calls == 2
+
+    def test_other_errors_are_raised_immediately(self, sleeps):
+        fn = Flaky(TransportQueryError("Block not found"))
+
+        with pytest.raises(TransportQueryError):
+            RetryPolicy().call(fn)
+        assert fn.calls == 1
+
+    def test_waits_are_cut_short_by_deadline(self):
+        fn = Flaky(requests.ConnectionError(), requests.ConnectionError())
+
+        start = time.perf_counter()
+        with pytest.raises(QueryTimeout):
+            RetryPolicy(backoff=60, jitter=False).call(fn, deadline=0.05)
+
+        assert time.perf_counter() - start < 1
+        assert fn.calls == 1
+
+    def test_slow_async_attempt_is_cancelled_at_deadline(self):
+        async def fn(remaining):
+            await asyncio.sleep(1)
+
+        async def run():
+            start = time.perf_counter()
+            with pytest.raises(QueryTimeout):
+                await RetryPolicy().call_async(fn, deadline=0.05)
+            return time.perf_counter() - start
+
+        assert asyncio.run(run()) < 0.5
+
+
+@pytest.fixture
+def flaky_server(graphql_server):
+    """Answers the first two requests with 503, then with a block"""
+
+    def respond(payload):
+        with graphql_server.lock:
+            if len(graphql_server.requests) <= 2:
+                return 503, "Service unavailable"
+        return {"data": {"block": {"hash": "0x1"}}}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestClientRetries:
+    def test_server_errors_are_retried(self, flaky_server):
+        policy = RetryPolicy(backoff=0.001)
+
+        with Client(url=flaky_server.url, retry=policy) as client:
+            response = client.query("{block(number: 1){hash}}")
+
+        assert response == {"block": {"hash": "0x1"}}
+        assert len(flaky_server.requests) == 3
+
+    def test_server_errors_are_retried_by_async_client(self, flaky_server):
+        async def run():
+            policy = RetryPolicy(backoff=0.001)
+            async with AsyncClient(url=flaky_server.url, retry=policy) as client:
+                return await client.query("{block(number: 1){hash}}")
+
+        assert asyncio.run(run()) == {"block": {"hash": "0x1"}}
+        assert len(flaky_server.requests) == 3
+
+    def test_stalled_response_times_out(self, graphql_server):
+        graphql_server.delay = 0.5
+        policy = RetryPolicy(max_attempts=2, backoff=0.001)
+
+        with (
+            Client(url=graphql_server.url, retry=policy, read_timeout=0.05) as client,
+            pytest.raises(requests.ReadTimeout),
+        ):
+            client.query("{block(number: 1){hash}}")
+
+        assert len(graphql_server.requests) == 2
+
+    def test_deadline_bounds_query_including_retries(self, graphql_server):
+        graphql_server.delay = 0.5
+
+        with Client(url=graphql_server.url, deadline=0.1) as client:
+            start = time.perf_counter()
+            with pytest.raises(QueryTimeout):
+                client.query("{block(number: 1){hash}}")
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4
+
+    def test_deadline_bounds_async_query(self, graphql_server):
+        graphql_server.delay = 0.5
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url, deadline=0.1) as client:
+                start = time.perf_counter()
+                with pytest.raises(QueryTimeout):
+                    await client.query("{block(number: 1){hash}}")
+                return time.perf_counter() - start
+
+        assert asyncio.run(run()) < 0.4
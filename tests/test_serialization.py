@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from flare_explorer.address import Address, SmartContract
+from flare_explorer.serialization import build, build_many, record_type
+from flare_explorer.token_transfers import TokenTransfer
+
+TOKEN_TRANSFER = {
+    "amount": "495000000000000000000000000",
+    "blockNumber": 4645423,
+    "fromAddressHash": "0x85bbbe7c96e1060965b139c335c685860619189e",
+    "id": "id_1",
+    "logIndex": 0,
+    "toAddressHash": "0x79241595ea6d3ec3ba0603027b51f5230ce265d0",
+    "tokenContractAddressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+    "tokenId": None,
+    "transactionHash": "0x6697c1978357ba902277c7e643b5668ce9c0e11319da92f78841382881d462fc",
+}
+
+ADDRESS = {
+    "contractCode": "0x00",
+    "fetchedCoinBalance": "0",
+    "fetchedCoinBalanceBlockNumber": 4685648,
+    "hash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+    "smartContract": {
+        "abi": "abi",
+        "addressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+        "compilerVersion": "v0.5.17+commit.d19bba13",
+        "contractSourceCode": "source_code",
+        "name": "PoodleCoin",
+        "optimization": False,
+    },
+}
+
+
+class TestRecordType:
+    def test_record_type_has_model_fields_in_order(self):
+        record = record_type(TokenTransfer)
+
+        assert record.__name__ == "TokenTransferRecord"
+        assert record._fields == tuple(TokenTransfer.model_fields)
+
+    def test_record_type_is_cached(self):
+        assert record_type(TokenTransfer) is record_type(TokenTransfer)
+
+    def test_records_have_no_instance_dict(self):
+        record = build(TokenTransfer, TOKEN_TRANSFER, "record")
+
+        assert not hasattr(record, "__dict__")
+
+
+class TestBuild:
+    def test_model_mode_validates(self):
+        token_transfer = build(TokenTransfer, TOKEN_TRANSFER, "model")
+
+        assert token_transfer == TokenTransfer(**TOKEN_TRANSFER)
+        assert token_transfer.amount == Decimal("495000000000000000000000000")
+
+    def test_dict_mode_returns_json_unchanged(self):
+        assert build(TokenTransfer, TOKEN_TRANSFER, "dict") is TOKEN_TRANSFER
+
+    def test_record_mode_keeps_raw_values(self):
+        token_transfer = build(TokenTransfer, TOKEN_TRANSFER, "record")
+
+        assert token_transfer.amount == "495000000000000000000000000"
+        assert token_transfer.logIndex == 0
+        assert token_transfer._asdict() == TOKEN_TRANSFER
+
+    @pytest.mark.parametrize("smart_contract", [ADDRESS["smartContract"], None])
+    def test_record_mode_builds_nested_records(self, smart_contract):
+        address = build(Address, {**ADDRESS, "smartContract": smart_contract}, "record")
+
+        if smart_contract is None:
+            assert address.smartContract is None
+        else:
+            assert isinstance(address.smartContract, record_type(SmartContract))
+            assert address.smartContract.name == "PoodleCoin"
+
+
+class TestBuildMany:
+    @pytest.mark.parametrize("mode", ["model", "dict", "record"])
+    def test_rows_are_built_in_mode(self, mode):
+        rows = build_many(TokenTransfer, [TOKEN_TRANSFER, TOKEN_TRANSFER], mode)
+
+        assert rows == [build(TokenTransfer, TOKEN_TRANSFER, mode)] * 2
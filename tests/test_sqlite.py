@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from flare_explorer.sqlite import SqliteConnections
+
+
+class TestSqliteConnections:
+    def test_connections_are_per_thread(self, tmp_path):
+        connections = SqliteConnections(str(tmp_path / "db.sqlite"), timeout=1.0)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(connections.get).result()
+
+        assert connections.get() is connections.get()
+        assert connections.get() is not other
+        assert connections.get().execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    def test_closed_connection_is_reopened(self, tmp_path):
+        connections = SqliteConnections(str(tmp_path / "db.sqlite"), timeout=1.0)
+        first = connections.get()
+        first.execute("CREATE TABLE t (x INTEGER)")
+
+        connections.close()
+        connections.close()
+
+        assert connections.get() is not first
+        assert connections.get().execute("SELECT count(*) FROM t").fetchone() == (0,)
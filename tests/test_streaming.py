@@ -0,0 +1,158 @@
+import json
+import tracemalloc
+
+import pytest
+from gql.transport.exceptions import TransportQueryError
+
+from flare_explorer.address import Address, stream_addresses
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import Client, PageInfo
+from flare_explorer.retry import RetryPolicy
+from flare_explorer.transaction import (
+    InternalTransaction,
+    stream_internal_transactions,
+    stream_transactions_from_address,
+)
+from tests.test_transaction import (
+    INTERNAL_TRANSACTION_NODE,
+    PAGE_INFO,
+    TRANSACTION_NODE,
+)
+
+pytest.importorskip("ijson")
+
+
+def address_node(number, code_size=10):
+    return {
+        "contractCode": "0x" + "60" * code_size,
+        "fetchedCoinBalance": "1.5",
+        "fetchedCoinBalanceBlockNumber": 4497096,
+        "hash": f"0x{number:040x}",
+        "smartContract": {
+            "abi": "[]",
+            "addressHash": f"0x{number:040x}",
+            "compilerVersion": "v0.8.17",
+            "contractSourceCode": "contract A {}",
+            "name": "A",
+            "optimization": True,
+        },
+    }
+
+
+class TestStreamAddresses:
+    def test_rows_are_built_in_requested_mode(self, graphql_server):
+        nodes = [address_node(i) for i in range(3)]
+        graphql_server.respond = lambda payload: {"data": {"addresses": nodes}}
+
+        client = Client(url=graphql_server.url)
+        models = list(stream_addresses(["0x1", "0x2", "0x3"], client=client))
+        records = list(stream_addresses(["0x1"], client=client, mode="record"))
+        dicts = list(stream_addresses(["0x1"], client=client, mode="dict"))
+
+        assert models == [Address(**i) for i in nodes]
+        assert records[1].smartContract.name == "A"
+        assert dicts == nodes
+        assert graphql_server.requests[0]["variables"] == {
+            "hashes": ["0x1", "0x2", "0x3"]
+        }
+
+    def test_errors_are_raised_after_rows_before_them(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": {"addresses": [address_node(1)]},
+            "errors": [{"message": "Something went wrong"}],
+        }
+
+        rows = stream_addresses(["0x1"], client=Client(url=graphql_server.url))
+
+        assert next(rows).hash == address_node(1)["hash"]
+        with pytest.raises(TransportQueryError, match="Something went wrong"):
+            next(rows)
+
+    def test_complexity_error_raises_complexity_limit(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": None,
+            "errors": [{"message": "Operation is too complex to complete"}],
+        }
+
+        with pytest.raises(QueryComplexityLimit):
+            list(stream_addresses(["0x1"], client=Client(url=graphql_server.url)))
+
+    def test_error_status_is_retried(self, graphql_server):
+        responses = iter([(503, "busy"), {"data": {"addresses": [address_node(1)]}}])
+        graphql_server.respond = lambda payload: next(responses)
+        client = Client(url=graphql_server.url, retry=RetryPolicy(backoff=0.01))
+
+        assert len(list(stream_addresses(["0x1"], client=client))) == 1
+        assert len(graphql_server.requests) == 2
+
+    def test_peak_memory_is_bounded_by_largest_row(self, graphql_server):
+        code_size = 1024**2
+        body = json.dumps(
+            {"data": {"addresses": [address_node(i, code_size) for i in range(15)]}}
+        ).encode()
+        graphql_server.respond = lambda payload: body
+        client = Client(url=graphql_server.url, mode="dict")
+        list(stream_addresses(["0x1"], client=client))
+
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in stream_addresses(["0x1"], client=client))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert count == 15
+        assert peak < len(body) / 3
+
+
+class TestStreamInternalTransactions:
+    def test_rows_and_page_info_are_decoded(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "transaction": {
+                    "internalTransactions": {
+                        "edges": [{"node": INTERNAL_TRANSACTION_NODE}] * 2,
+                        "pageInfo": {**PAGE_INFO, "hasNextPage": True},
+                    }
+                }
+            }
+        }
+
+        with stream_internal_transactions(
+            "0x1", page_size=2, client=Client(url=graphql_server.url)
+        ) as rows:
+            assert rows.page_info is None
+            internal_transactions = list(rows)
+
+        assert (
+            internal_transactions
+            == [InternalTransaction(**INTERNAL_TRANSACTION_NODE)] * 2
+        )
+        assert rows.page_info == PageInfo(**{**PAGE_INFO, "hasNextPage": True})
+        assert graphql_server.requests[0]["variables"] == {
+            "hash": "0x1",
+            "first": 2,
+            "after": None,
+        }
+
+
+class TestStreamTransactionsFromAddress:
+    def test_only_selected_fields_are_requested(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "address": {
+                    "transactions": {
+                        "edges": [{"node": {"hash": TRANSACTION_NODE["hash"]}}],
+                        "pageInfo": PAGE_INFO,
+                    }
+                }
+            }
+        }
+
+        with stream_transactions_from_address(
+            "0x1", fields=["hash"], client=Client(url=graphql_server.url)
+        ) as rows:
+            (transaction,) = rows
+
+        assert transaction.hash == TRANSACTION_NODE["hash"]
+        assert "gasPrice" not in graphql_server.requests[0]["query"]
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+from requests.exceptions import RetryError
+
+from flare_explorer import throttling
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import AsyncClient, Client
+from flare_explorer.retry import RetryPolicy
+from flare_explorer.throttling import (
+    AdaptiveConcurrency,
+    AimdLimit,
+    AsyncAdaptiveConcurrency,
+    RateLimiter,
+    is_throttling_error,
+)
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (TransportServerError("Too many requests", 429), True),
+        (TransportServerError("Bad gateway", 502), True),
+        (TransportServerError("Not found", 404), False),
+        (QueryComplexityLimit("too complex"), True),
+        (RetryError("too many 503 error responses"), True),
+        (TransportQueryError("Block not found"), False),
+    ],
+)
+def test_is_throttling_error(error, expected):
+    assert is_throttling_error(error) is expected
+
+
+class TestRateLimiter:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        class Clock:
+            now = 1000.0
+            sleeps = []
+
+        def sleep(seconds):
+            Clock.sleeps.append(round(seconds, 6))
+
+        monkeypatch.setattr(throttling.time, "monotonic", lambda: Clock.now)
+        monkeypatch.setattr(throttling.time, "sleep", sleep)
+        return Clock
+
+    def test_burst_starts_at_once_then_requests_are_spaced_out(self, clock):
+        limiter = RateLimiter(rate=10, burst=3)
+
+        for _ in range(5):
+            limiter.acquire()
+
+        assert clock.sleeps == [0.1, 0.2]
+
+    def test_tokens_refill_over_time(self, clock):
+        limiter = RateLimiter(rate=10, burst=3)
+        for _ in range(3):
+            limiter.acquire()
+
+        clock.now += 0.2
+        for _ in range(3):
+            limiter.acquire()
+
+        assert clock.sleeps == [0.1]
+
+    def test_async_acquire_waits_for_token(self):
+        limiter = RateLimiter(rate=50, burst=1)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(3):
+                await limiter.acquire_async()
+            return loop.time() - start
+
+        assert asyncio.run(run()) >= 0.035
+
+
+class TestAimdLimit:
+    def test_limit_grows_by_about_one_per_round_of_successes(self):
+        limit = AimdLimit(initial=4)
+        for _ in range(4):
+            limit._finish(limit._start(), throttled=False)
+
+        assert 4.9 < limit.limit < 5
+
+    def test_limit_halves_once_per_throttling_event(self):
+        limit = AimdLimit(initial=8)
+        tokens = [limit._start() for _ in range(4)]
+        for i in tokens:
+            limit._finish(i, throttled=True)
+
+        assert limit.limit == 4
+        limit._finish(limit._start(), throttled=True)
+        assert limit.limit == 2
+
+    def test_limit_stays_within_bounds(self):
+        limit = AimdLimit(initial=2, minimum=2, maximum=3)
+        limit._finish(limit._start(), throttled=True)
+        assert limit.limit == 2
+        for _ in range(10):
+            limit._finish(limit._start(), throttled=False)
+        assert limit.limit == 3
+
+
+class TestAdaptiveConcurrency:
+    def test_acquire_blocks_at_limit_until_release(self):
+        concurrency = AdaptiveConcurrency(initial=1)
+        token = concurrency.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            concurrency.acquire()
+            acquired.set()
+
+        threading.Thread(target=acquire, daemon=True).start()
+        assert not acquired.wait(0.05)
+        concurrency.release(token, throttled=False)
+        assert acquired.wait(1)
+
+
+class TestClientThrottling:
+    def test_complexity_errors_reduce_concurrency(self, graphql_server):
+        graphql_server.respond = lambda payload: {
+            "data": None,
+            "errors": [{"message": "Operation is too complex"}],
+        }
+        concurrency = AdaptiveConcurrency(initial=8)
+
+        with Client(url=graphql_server.url, concurrency=concurrency) as client:
+            with pytest.raises(QueryComplexityLimit):
+                client.query("{block(number: 1){hash}}")
+            with pytest.raises(QueryComplexityLimit):
+                client.query("{block(number: 2){hash}}")
+
+        assert concurrency.limit == 2
+        assert concurrency.in_flight == 0
+
+    def test_rate_limiter_spaces_out_requests(self, graphql_server):
+        graphql_server.respond = lambda payload: {"data": {"block": {}}}
+        limiter = RateLimiter(rate=100, burst=1)
+        query = "query ($n: Int!) {block(number: $n){hash}}"
+
+        with Client(url=graphql_server.url, rate_limiter=limiter) as client:
+            start = time.perf_counter()
+            for i in range(3):
+                client.query(query, {"n": i})
+            elapsed = time.perf_counter() - start
+
+        assert elapsed >= 0.019
+
+    def test_async_client_backs_off_on_overload_and_recovers(self, graphql_server):
+        overloaded = {"until": 6}
+
+        def respond(payload):
+            with graphql_server.lock:
+                overloaded["until"] -= 1
+                if overloaded["until"] >= 0:
+                    return 503, "Service unavailable"
+            return {"data": {"block": {}}}
+
+        graphql_server.respond = respond
+        graphql_server.delay = 0.01
+        query = "query ($n: Int!) {block(number: $n){hash}}"
+
+        async def run():
+            concurrency = AsyncAdaptiveConcurrency(initial=8, maximum=8)
+            async with AsyncClient(
+                url=graphql_server.url,
+                concurrency=concurrency,
+                retry=RetryPolicy(max_attempts=1),
+            ) as client:
+                results = await asyncio.gather(
+                    *(client.query(query, {"n": i}) for i in range(6)),
+                    return_exceptions=True,
+                )
+                backed_off = concurrency.limit
+                for i in range(40):
+                    await client.query(query, {"n": 100 + i})
+                return results, backed_off, concurrency.limit
+
+        results, backed_off, recovered = asyncio.run(run())
+
+        assert all(isinstance(i, TransportServerError) for i in results)
+        assert backed_off == 4
+        assert recovered == 8
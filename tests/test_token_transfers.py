@@ -1,10 +1,30 @@
+import asyncio
 import contextlib
 from decimal import Decimal
 
+import pytest
 import requests_mock
 
-from flare_explorer.gql_client import API_URL, PageInfo
-from flare_explorer.token_transfers import TokenTransfer, get_token_transfers
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import (
+    API_URL,
+    AsyncClient,
+    Client,
+    PageInfo,
+    SubscriptionClient,
+)
+from flare_explorer.retry import DEFAULT_RECONNECT_EXCEPTIONS, RetryPolicy
+from flare_explorer.token_transfers import (
+    MAX_PAGE_SIZE,
+    TokenTransfer,
+    get_token_transfers,
+    get_token_transfers_async,
+    iter_token_transfers,
+    subscribe_token_transfers,
+    watch_token_transfers,
+    watch_token_transfers_async,
+)
+from flare_explorer.watch import WatchPosition
 
 
 class TestGetTokenTransfers:
@@ -21,11 +41,28 @@ class TestGetTokenTransfers:
             with contextlib.suppress(KeyError):
                 get_token_transfers("hash", previous_cursor="prev")
 
-            query = m.last_request.json()["query"]
-            assert (
-                'tokenTransfers(first: 10, after: "prev", tokenContractAddressHash: "hash")'
-                in query
-            )
+            request = m.last_request.json()
+            assert "tokenTransfers(" in request["query"]
+            assert request["variables"] == {
+                "tokenContractAddressHash": "hash",
+                "first": 10,
+                "after": "prev",
+            }
+
+    def test_page_size_is_used_in_query(self):
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"transaction": []}})
+            with contextlib.suppress(KeyError):
+                get_token_transfers("hash", page_size=100)
+
+            variables = m.last_request.json()["variables"]
+            assert variables["first"] == 100
+            assert variables["after"] is None
+
+    @pytest.mark.parametrize("page_size", [0, MAX_PAGE_SIZE + 1])
+    def test_page_size_outside_complexity_limit_raises_exception(self, page_size):
+        with pytest.raises(QueryComplexityLimit):
+            get_token_transfers("hash", page_size=page_size)
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -125,3 +162,390 @@ class TestGetTokenTransfers:
                 hasPreviousPage=False,
                 startCursor="YXJyYXljb25uZWN0aW9uOjA=",
             )
+
+
+class TestGetTokenTransfersModes:
+    @pytest.fixture
+    def node(self):
+        return {
+            "amount": "5000000000000000000000000",
+            "blockNumber": 4645423,
+            "fromAddressHash": "0x85bbbe7c96e1060965b139c335c685860619189e",
+            "id": "id_1",
+            "logIndex": 1,
+            "toAddressHash": "0x0000000000000000000000000000000000000000",
+            "tokenContractAddressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+            "tokenId": None,
+            "transactionHash": "0x6697c1978357ba902277c7e643b5668ce9c0e11319da92f78841382881d462fc",
+        }
+
+    @pytest.fixture
+    def mocker(self, node):
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                status_code=200,
+                json={
+                    "data": {
+                        "tokenTransfers": {
+                            "edges": [{"node": node}],
+                            "pageInfo": {
+                                "endCursor": None,
+                                "hasNextPage": False,
+                                "hasPreviousPage": False,
+                                "startCursor": None,
+                            },
+                        }
+                    }
+                },
+            )
+            yield m
+
+    def test_rows_are_returned_in_client_mode(self, mocker, node):
+        token_transfers, _ = get_token_transfers("hash", client=Client(mode="dict"))
+
+        assert token_transfers == [node]
+
+    def test_mode_argument_overrides_client_mode(self, mocker, node):
+        token_transfers, _ = get_token_transfers(
+            "hash", client=Client(mode="dict"), mode="record"
+        )
+
+        assert token_transfers[0].amount == "5000000000000000000000000"
+        assert token_transfers[0]._asdict() == node
+
+
+class TestGetTokenTransfersAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "tokenTransfers": {
+                    "edges": [
+                        {
+                            "node": {
+                                "amount": "495000000000000000000000000",
+                                "blockNumber": 4645423,
+                                "fromAddressHash": "0x85bbbe7c96e1060965b139c335c685860619189e",
+                                "id": "id_1",
+                                "logIndex": 0,
+                                "toAddressHash": "0x79241595ea6d3ec3ba0603027b51f5230ce265d0",
+                                "tokenContractAddressHash": "0xc18f99ce6dd6278be2d3f1e738ed11623444ae33",
+                                "tokenId": None,
+                                "transactionHash": "0x6697c1978357ba902277c7e643b5668ce9c0e11319da92f78841382881d462fc",
+                            }
+                        }
+                    ],
+                    "pageInfo": {
+                        "endCursor": "YXJyYXljb25uZWN0aW9uOjA=",
+                        "hasNextPage": False,
+                        "hasPreviousPage": False,
+                        "startCursor": "YXJyYXljb25uZWN0aW9uOjA=",
+                    },
+                }
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_token_transfers_async(
+                    "hash", previous_cursor="prev", client=client
+                )
+
+        token_transfers, page_info = asyncio.run(run())
+
+        assert graphql_server.requests[0]["variables"] == {
+            "tokenContractAddressHash": "hash",
+            "first": 10,
+            "after": "prev",
+        }
+        assert [i.amount for i in token_transfers] == [
+            Decimal("495000000000000000000000000")
+        ]
+        assert page_info.hasNextPage is False
+
+
+class TestIterTokenTransfers:
+    def test_rows_are_streamed_across_pages(self):
+        def page(ids, end_cursor, has_next_page):
+            return {
+                "json": {
+                    "data": {
+                        "tokenTransfers": {
+                            "edges": [
+                                {
+                                    "node": {
+                                        "amount": "1",
+                                        "blockNumber": 1,
+                                        "fromAddressHash": "0x1",
+                                        "id": i,
+                                        "logIndex": 0,
+                                        "toAddressHash": "0x2",
+                                        "tokenContractAddressHash": "0x3",
+                                        "tokenId": None,
+                                        "transactionHash": "0x4",
+                                    }
+                                }
+                                for i in ids
+                            ],
+                            "pageInfo": {
+                                "endCursor": end_cursor,
+                                "hasNextPage": has_next_page,
+                                "hasPreviousPage": False,
+                                "startCursor": None,
+                            },
+                        }
+                    }
+                }
+            }
+
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                [page(["a", "b"], "c1", True), page(["c"], "c2", False)],
+            )
+            iterator = iter_token_transfers("hash", previous_cursor="c0")
+            token_transfers = list(iterator)
+
+            variables = [r.json()["variables"] for r in m.request_history]
+
+        assert [i.id for i in token_transfers] == ["a", "b", "c"]
+        assert iterator.cursor == "c2"
+        assert [i["after"] for i in variables] == ["c0", "c1"]
+
+    def test_adaptive_page_size_backs_off_on_complexity_error(self):
+        complexity_error = {
+            "json": {"data": None, "errors": [{"message": "Operation is too complex"}]}
+        }
+        empty_page = {
+            "json": {
+                "data": {
+                    "tokenTransfers": {
+                        "edges": [],
+                        "pageInfo": {
+                            "endCursor": None,
+                            "hasNextPage": False,
+                            "hasPreviousPage": False,
+                            "startCursor": None,
+                        },
+                    }
+                }
+            }
+        }
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, [complexity_error, empty_page])
+            assert list(iter_token_transfers("hash", page_size=40, adaptive=True)) == []
+
+            variables = [r.json()["variables"] for r in m.request_history]
+
+        assert [i["first"] for i in variables] == [40, 20]
+
+
+def transfer_node(number):
+    return {
+        "amount": "1",
+        "blockNumber": number,
+        "fromAddressHash": "0x1",
+        "id": f"id_{number}",
+        "logIndex": 0,
+        "toAddressHash": "0x2",
+        "tokenContractAddressHash": "0xc",
+        "tokenId": None,
+        "transactionHash": f"0x{number:064x}",
+    }
+
+
+@pytest.fixture
+def transfers_server(graphql_server):
+    """Serves the token transfers in its transfers list, newest first"""
+    graphql_server.transfers = []
+
+    def respond(payload):
+        variables = payload["variables"]
+        start = int(variables["after"] or 0)
+        end = start + variables["first"]
+        nodes = graphql_server.transfers[start:end]
+        return {
+            "data": {
+                "tokenTransfers": {
+                    "edges": [{"node": i} for i in nodes],
+                    "pageInfo": {
+                        "endCursor": str(start + len(nodes)),
+                        "hasNextPage": end < len(graphql_server.transfers),
+                        "hasPreviousPage": start > 0,
+                        "startCursor": str(start),
+                    },
+                }
+            }
+        }
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestIterTokenTransfersFields:
+    def test_every_page_selects_only_given_fields(self, transfers_server):
+        transfers_server.transfers = [transfer_node(i) for i in range(5, 0, -1)]
+
+        token_transfers = list(
+            iter_token_transfers(
+                "0xc",
+                page_size=2,
+                fields=["blockNumber", "amount"],
+                client=Client(url=transfers_server.url),
+                mode="record",
+            )
+        )
+
+        assert [tuple(i) for i in token_transfers] == [
+            ("1", i) for i in range(5, 0, -1)
+        ]
+        assert len(transfers_server.requests) == 3
+        assert all(
+            "node {\n        amount\n        blockNumber\n      }" in i["query"]
+            for i in transfers_server.requests
+        )
+
+
+class TestWatchTokenTransfers:
+    def test_only_new_transfers_are_fetched(self, transfers_server):
+        transfers_server.transfers = [transfer_node(i) for i in range(20, 0, -1)]
+        watcher = watch_token_transfers(
+            ["0xc"], client=Client(url=transfers_server.url), mode="record"
+        )
+        watcher.poll()
+        transfers_server.transfers[:0] = [transfer_node(22), transfer_node(21)]
+
+        assert [i.blockNumber for i in watcher.poll()] == [21, 22]
+        assert len(transfers_server.requests) == 2
+        assert transfers_server.requests[-1]["variables"] == {
+            "tokenContractAddressHash": "0xc",
+            "first": 10,
+            "after": None,
+        }
+
+    def test_async_watcher_yields_new_transfers(self, transfers_server):
+        transfers_server.transfers = [transfer_node(1)]
+
+        async def run():
+            async with AsyncClient(url=transfers_server.url) as client:
+                watcher = watch_token_transfers_async(
+                    ["0xc"], min_interval=0.01, client=client
+                )
+                await watcher.poll()
+                transfers_server.transfers.insert(0, transfer_node(2))
+                async for token_transfer in watcher:
+                    return token_transfer
+
+        assert asyncio.run(run()) == TokenTransfer(**transfer_node(2))
+
+    @pytest.mark.parametrize("page_size", [0, MAX_PAGE_SIZE + 1])
+    def test_page_size_outside_complexity_limit_raises_exception(self, page_size):
+        with pytest.raises(QueryComplexityLimit):
+            watch_token_transfers(["0xc"], page_size=page_size)
+
+
+class TestSubscribeTokenTransfers:
+    def test_transfers_missed_while_disconnected_are_backfilled(
+        self, websocket_server, transfers_server
+    ):
+        transfers_server.transfers = [transfer_node(1)]
+
+        async def run():
+            client = SubscriptionClient(
+                url=websocket_server.url,
+                retry=RetryPolicy(
+                    backoff=0.01, exceptions=DEFAULT_RECONNECT_EXCEPTIONS
+                ),
+            )
+            async with AsyncClient(url=transfers_server.url) as backfill_client:
+                token_transfers = subscribe_token_transfers(
+                    "0xc", client=client, backfill_client=backfill_client
+                )
+                received = asyncio.ensure_future(anext(token_transfers))
+                await websocket_server.wait_for_subscriptions(1)
+                transfers_server.transfers.insert(0, transfer_node(2))
+                await asyncio.to_thread(
+                    websocket_server.push, {"tokenTransfers": [transfer_node(2)]}
+                )
+                rows = [await received]
+
+                transfers_server.transfers[:0] = [transfer_node(4), transfer_node(3)]
+                await asyncio.to_thread(websocket_server.drop)
+                rows += [await anext(token_transfers) for _ in range(2)]
+
+                received = asyncio.ensure_future(anext(token_transfers))
+                await websocket_server.wait_for_subscriptions(2)
+                await asyncio.to_thread(
+                    websocket_server.push, {"tokenTransfers": [transfer_node(5)]}
+                )
+                rows.append(await received)
+                await token_transfers.aclose()
+                await client.close()
+                return rows
+
+        token_transfers = asyncio.run(run())
+
+        assert [i.blockNumber for i in token_transfers] == [2, 3, 4, 5]
+        assert websocket_server.documents[0]["variables"] == {
+            "tokenContractAddressHash": "0xc"
+        }
+
+    def test_subscription_resumes_from_position(
+        self, websocket_server, transfers_server
+    ):
+        transfers_server.transfers = [transfer_node(i) for i in range(5, 0, -1)]
+
+        async def run():
+            async with (
+                SubscriptionClient(url=websocket_server.url) as client,
+                AsyncClient(url=transfers_server.url) as backfill_client,
+            ):
+                token_transfers = subscribe_token_transfers(
+                    "0xc",
+                    position=WatchPosition(id="id_3", blockNumber=3),
+                    client=client,
+                    backfill_client=backfill_client,
+                    mode="dict",
+                )
+                rows = [await anext(token_transfers) for _ in range(2)]
+                await token_transfers.aclose()
+                return rows
+
+        assert asyncio.run(run()) == [transfer_node(4), transfer_node(5)]
+
+    def test_newest_transfer_of_a_block_is_resumed_from(
+        self, websocket_server, transfers_server
+    ):
+        first = transfer_node(2)
+        second = {**first, "id": "id_2_1", "logIndex": 1}
+        transfers_server.transfers = [transfer_node(1)]
+
+        async def run():
+            client = SubscriptionClient(
+                url=websocket_server.url,
+                retry=RetryPolicy(
+                    backoff=0.01, exceptions=DEFAULT_RECONNECT_EXCEPTIONS
+                ),
+            )
+            async with AsyncClient(url=transfers_server.url) as backfill_client:
+                token_transfers = subscribe_token_transfers(
+                    "0xc", client=client, backfill_client=backfill_client
+                )
+                received = asyncio.ensure_future(anext(token_transfers))
+                await websocket_server.wait_for_subscriptions(1)
+                transfers_server.transfers[:0] = [second, first]
+                await asyncio.to_thread(
+                    websocket_server.push, {"tokenTransfers": [first, second]}
+                )
+                rows = [await received, await anext(token_transfers)]
+
+                transfers_server.transfers.insert(0, transfer_node(3))
+                await asyncio.to_thread(websocket_server.drop)
+                rows.append(await anext(token_transfers))
+                await token_transfers.aclose()
+                await client.close()
+                return rows
+
+        assert [i.id for i in asyncio.run(run())] == ["id_2", "id_2_1", "id_3"]
@@ -1,15 +1,37 @@
+import asyncio
 import contextlib
 from decimal import Decimal
 
+import pytest
 import requests_mock
 
-from flare_explorer.gql_client import API_URL, PageInfo
+from flare_explorer.binary import BinaryData
+from flare_explorer.cache import MemoryCache
+from flare_explorer.exceptions import QueryComplexityLimit
+from flare_explorer.gql_client import API_URL, AsyncClient, Client, PageInfo
+from flare_explorer.serialization import build
 from flare_explorer.transaction import (
+    MAX_PAGE_SIZE,
+    MAX_TRANSACTIONS_PER_QUERY,
+    BinaryInternalTransaction,
+    BinaryTransaction,
     InternalTransaction,
     Transaction,
+    build_call_tree,
     get_internal_transactions,
+    get_internal_transactions_async,
     get_transaction,
+    get_transaction_async,
+    get_transaction_with_trace,
+    get_transactions,
+    get_transactions_async,
     get_transactions_from_address,
+    get_transactions_from_address_async,
+    get_transactions_with_trace,
+    get_transactions_with_trace_async,
+    iter_internal_transactions,
+    iter_transactions_from_address,
+    watch_transactions_from_address,
 )
 
 
@@ -27,8 +49,9 @@ class TestGetTransaction:
             with contextlib.suppress(KeyError):
                 get_transaction("test_hash_123")
 
-            query = m.last_request.json()["query"]
-            assert 'transaction(hash: "test_hash_123")' in query
+            request = m.last_request.json()
+            assert "transaction(hash: $hash)" in request["query"]
+            assert request["variables"] == {"hash": "test_hash_123"}
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -114,9 +137,26 @@ class TestGetInternalTransactions:
             with contextlib.suppress(TypeError):
                 get_internal_transactions("hash", previous_cursor="prev")
 
-            query = m.last_request.json()["query"]
-            assert 'transaction(hash: "hash") {' in query
-            assert 'internalTransactions(first: 5, after: "prev") {' in query
+            request = m.last_request.json()
+            assert (
+                "internalTransactions(first: $first, after: $after)"
+                in (request["query"])
+            )
+            assert request["variables"] == {"hash": "hash", "first": 5, "after": "prev"}
+
+    def test_page_size_is_used_in_query(self):
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, status_code=200, json={"data": {"transaction": None}})
+            with contextlib.suppress(TypeError):
+                get_internal_transactions("hash", page_size=MAX_PAGE_SIZE)
+
+            variables = m.last_request.json()["variables"]
+            assert variables["first"] == MAX_PAGE_SIZE
+            assert variables["after"] is None
+
+    def test_page_size_outside_complexity_limit_raises_exception(self):
+        with pytest.raises(QueryComplexityLimit):
+            get_internal_transactions("hash", page_size=MAX_PAGE_SIZE + 1)
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -302,9 +342,13 @@ class TestGetTransactionsFromAddress:
             with contextlib.suppress(KeyError):
                 get_transactions_from_address("hash", previous_cursor="prev")
 
-            query = m.last_request.json()["query"]
-            assert 'address(hash: "hash") {' in query
-            assert 'transactions(first: 5, after: "prev") {' in query
+            request = m.last_request.json()
+            assert "transactions(first: $first, after: $after)" in request["query"]
+            assert request["variables"] == {"hash": "hash", "first": 5, "after": "prev"}
+
+    def test_page_size_outside_complexity_limit_raises_exception(self):
+        with pytest.raises(QueryComplexityLimit):
+            get_transactions_from_address("hash", page_size=0)
 
     def test_response_is_serialized_correctly_for_correct_response(self):
         with requests_mock.Mocker() as m:
@@ -582,3 +626,489 @@ class TestGetTransactionsFromAddress:
                 hasPreviousPage=False,
                 startCursor="YXJyYXljb25uZWN0aW9uOjA=",
             )
+
+
+TRANSACTION_NODE = {
+    "blockNumber": 4463469,
+    "createdContractAddressHash": None,
+    "cumulativeGasUsed": "85427",
+    "error": None,
+    "fromAddressHash": "0x4668b6ec17d7e6a0cbf600b68ec4f04ae45d225e",
+    "gas": "300000",
+    "gasPrice": "157368749629",
+    "gasUsed": "85427",
+    "hash": "0x03c19c13195c7a85affbecea186b253e58011f76a160489bbfbad244f969eeb2",
+    "id": "id_1",
+    "index": 0,
+    "input": "0x",
+    "nonce": "4",
+    "r": "1",
+    "s": "2",
+    "status": "OK",
+    "toAddressHash": "0x258e20bdbb2d891521308d2af381b1bd962b67b5",
+    "v": "64",
+    "value": "0",
+}
+
+INTERNAL_TRANSACTION_NODE = {
+    "blockNumber": 4463469,
+    "callType": "CALL",
+    "createdContractAddressHash": None,
+    "createdContractCode": None,
+    "error": None,
+    "fromAddressHash": "0x4668b6ec17d7e6a0cbf600b68ec4f04ae45d225e",
+    "gas": "278284",
+    "gasUsed": "63711",
+    "id": "id_1",
+    "index": 0,
+    "init": None,
+    "input": "0x",
+    "output": "0x",
+    "toAddressHash": "0x258e20bdbb2d891521308d2af381b1bd962b67b5",
+    "traceAddress": "[]",
+    "transactionHash": (
+        "0x03c19c13195c7a85affbecea186b253e58011f76a160489bbfbad244f969eeb2"
+    ),
+    "transactionIndex": 0,
+    "type": "CALL",
+    "value": "0",
+}
+
+PAGE_INFO = {
+    "endCursor": "YXJyYXljb25uZWN0aW9uOjA=",
+    "hasNextPage": False,
+    "hasPreviousPage": False,
+    "startCursor": "YXJyYXljb25uZWN0aW9uOjA=",
+}
+
+
+class TestGetTransactionAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {"transaction": TRANSACTION_NODE}
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_transaction_async("test_hash_123", client=client)
+
+        response = asyncio.run(run())
+
+        assert graphql_server.requests[0]["variables"] == {"hash": "test_hash_123"}
+        assert response == Transaction(**TRANSACTION_NODE)
+
+
+class TestGetInternalTransactionsAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "transaction": {
+                    "internalTransactions": {
+                        "edges": [{"node": INTERNAL_TRANSACTION_NODE}],
+                        "pageInfo": PAGE_INFO,
+                    }
+                }
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_internal_transactions_async(
+                    "hash", previous_cursor="prev", client=client
+                )
+
+        internal_transactions, page_info = asyncio.run(run())
+
+        variables = graphql_server.requests[0]["variables"]
+        assert variables == {"hash": "hash", "first": 5, "after": "prev"}
+        assert internal_transactions == [
+            InternalTransaction(**INTERNAL_TRANSACTION_NODE)
+        ]
+        assert page_info == PageInfo(**PAGE_INFO)
+
+
+class TestGetTransactionsFromAddressAsync:
+    def test_response_is_serialized_correctly_for_correct_response(
+        self, graphql_server
+    ):
+        graphql_server.respond = lambda payload: {
+            "data": {
+                "address": {
+                    "transactions": {
+                        "edges": [{"node": TRANSACTION_NODE}],
+                        "pageInfo": PAGE_INFO,
+                    }
+                }
+            }
+        }
+
+        async def run():
+            async with AsyncClient(url=graphql_server.url) as client:
+                return await get_transactions_from_address_async(
+                    "hash", previous_cursor="prev", client=client
+                )
+
+        transactions, page_info = asyncio.run(run())
+
+        variables = graphql_server.requests[0]["variables"]
+        assert variables == {"hash": "hash", "first": 5, "after": "prev"}
+        assert transactions == [Transaction(**TRANSACTION_NODE)]
+        assert page_info == PageInfo(**PAGE_INFO)
+
+
+class TestIterInternalTransactions:
+    def test_rows_are_streamed_across_pages(self):
+        def page(end_cursor, has_next_page):
+            return {
+                "json": {
+                    "data": {
+                        "transaction": {
+                            "internalTransactions": {
+                                "edges": [{"node": INTERNAL_TRANSACTION_NODE}],
+                                "pageInfo": {
+                                    **PAGE_INFO,
+                                    "endCursor": end_cursor,
+                                    "hasNextPage": has_next_page,
+                                },
+                            }
+                        }
+                    }
+                }
+            }
+
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, [page("c1", True), page("c2", True)])
+            iterator = iter_internal_transactions("hash", max_pages=2)
+            internal_transactions = list(iterator)
+
+        assert (
+            internal_transactions
+            == [InternalTransaction(**INTERNAL_TRANSACTION_NODE)] * 2
+        )
+        assert iterator.cursor == "c2"
+        assert m.call_count == 2
+
+
+class TestIterTransactionsFromAddress:
+    def test_max_items_limits_rows(self):
+        with requests_mock.Mocker() as m:
+            m.post(
+                API_URL,
+                json={
+                    "data": {
+                        "address": {
+                            "transactions": {
+                                "edges": [{"node": TRANSACTION_NODE}] * 3,
+                                "pageInfo": {**PAGE_INFO, "hasNextPage": True},
+                            }
+                        }
+                    }
+                },
+            )
+            transactions = list(
+                iter_transactions_from_address("hash", max_items=2, mode="dict")
+            )
+
+        assert transactions == [TRANSACTION_NODE] * 2
+        assert m.call_count == 1
+
+
+class TestWatchTransactionsFromAddress:
+    def test_only_new_transactions_are_returned(self):
+        def page(*ids):
+            return {
+                "json": {
+                    "data": {
+                        "address": {
+                            "transactions": {
+                                "edges": [
+                                    {"node": {**TRANSACTION_NODE, "id": i}} for i in ids
+                                ],
+                                "pageInfo": PAGE_INFO,
+                            }
+                        }
+                    }
+                }
+            }
+
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, [page("id_2", "id_1"), page("id_4", "id_3", "id_2")])
+            watcher = watch_transactions_from_address(["0x1"], mode="dict")
+
+            assert watcher.poll() == []
+            assert [i["id"] for i in watcher.poll()] == ["id_3", "id_4"]
+            assert watcher.positions["0x1"].id == "id_4"
+
+
+@pytest.fixture
+def transactions_server(graphql_server):
+    """Serves every transaction except 0x...dead"""
+
+    def respond(payload):
+        data, errors = {}, []
+        for variable, transaction_hash in payload["variables"].items():
+            alias = variable.replace("v", "a")
+            if transaction_hash == "0xdead":
+                data[alias] = None
+                errors.append({"message": "Transaction not found.", "path": [alias]})
+            else:
+                data[alias] = {**TRANSACTION_NODE, "hash": transaction_hash}
+        return {"data": data, "errors": errors}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+class TestGetTransactions:
+    def test_transactions_are_batched_into_aliased_queries(self, transactions_server):
+        hashes = [f"0x{i:x}" for i in range(1, 26)]
+
+        transactions = get_transactions(
+            [*hashes, "0xDEAD", "0X1"], client=Client(url=transactions_server.url)
+        )
+
+        assert len(transactions_server.requests) == 3
+        assert [i and i.hash for i in transactions] == [*hashes, None, "0x1"]
+
+    def test_batch_size_outside_complexity_limit_raises_exception(self):
+        with pytest.raises(QueryComplexityLimit):
+            get_transactions(["0x1"], batch_size=MAX_TRANSACTIONS_PER_QUERY + 1)
+
+
+class TestGetTransactionsAsync:
+    def test_transactions_are_batched_into_concurrent_queries(
+        self, transactions_server
+    ):
+        async def run():
+            async with AsyncClient(url=transactions_server.url) as client:
+                return await get_transactions_async(
+                    ["0x1", "0xdead", "0x2"], batch_size=2, client=client
+                )
+
+        transactions = asyncio.run(run())
+
+        assert len(transactions_server.requests) == 2
+        assert [i and i.hash for i in transactions] == ["0x1", None, "0x2"]
+
+
+class TestBinaryFields:
+    def test_input_is_decoded_on_first_read(self, graphql_server):
+        node = {**TRANSACTION_NODE, "input": "0xa9059cbb" + "00" * 64}
+        graphql_server.respond = lambda payload: {"data": {"transaction": node}}
+
+        transaction = get_transaction(
+            "hash", binary=True, client=Client(url=graphql_server.url)
+        )
+
+        assert isinstance(transaction, BinaryTransaction)
+        assert not transaction.input.decoded
+        assert transaction.input.tobytes()[:4] == bytes.fromhex("a9059cbb")
+        assert transaction.model_dump(mode="json") == node
+
+    def test_fields_and_batches_keep_binary_input(self, transactions_server):
+        transactions = get_transactions(
+            ["0x1", "0x2"],
+            fields=["hash", "input"],
+            binary=True,
+            client=Client(url=transactions_server.url),
+        )
+
+        assert [bytes(i.input) for i in transactions] == [b"", b""]
+        assert "gasPrice" not in transactions_server.requests[0]["query"]
+
+    def test_internal_transaction_fields_are_binary(self):
+        node = {**INTERNAL_TRANSACTION_NODE, "createdContractCode": "0x6080"}
+        response = {
+            "data": {
+                "transaction": {
+                    "internalTransactions": {
+                        "edges": [{"node": node}],
+                        "pageInfo": PAGE_INFO,
+                    }
+                }
+            }
+        }
+
+        with requests_mock.Mocker() as m:
+            m.post(API_URL, json=response)
+            (internal_transaction,) = iter_internal_transactions("hash", binary=True)
+            (record,) = iter_internal_transactions("hash", binary=True, mode="record")
+
+        assert isinstance(internal_transaction, BinaryInternalTransaction)
+        assert internal_transaction.createdContractCode == b"\x60\x80"
+        assert internal_transaction.init is None
+        assert isinstance(internal_transaction.output, BinaryData)
+        assert record.createdContractCode == "0x6080"
+
+
+TRACE_ADDRESSES = ["[]", "[0]", "[1]", "[0, 0]", "[0, 1]", "[1, 0]", "[0, 0, 0]"]
+
+
+def internal_transaction_node(index, trace_address):
+    return {**INTERNAL_TRANSACTION_NODE, "index": index, "traceAddress": trace_address}
+
+
+@pytest.fixture
+def traces_server(graphql_server):
+    """
+    Serves transactions with the internal transactions of TRACE_ADDRESSES,
+    paged by index, except 0x...dead which is not found
+    """
+
+    def respond(payload):
+        variables = payload["variables"]
+        if variables["hash"] == "0xdead":
+            return {
+                "data": {"transaction": None},
+                "errors": [{"message": "Transaction not found.", "path": ["a"]}],
+            }
+        start = int(variables["after"] or 0)
+        end = min(start + variables["first"], len(TRACE_ADDRESSES))
+        nodes = [
+            internal_transaction_node(i, TRACE_ADDRESSES[i]) for i in range(start, end)
+        ]
+        connection = {
+            "edges": [{"node": i} for i in nodes],
+            "pageInfo": {
+                **PAGE_INFO,
+                "endCursor": str(end),
+                "hasNextPage": end < len(TRACE_ADDRESSES),
+            },
+        }
+        transaction = {"internalTransactions": connection}
+        if "TransactionWithTrace" in payload["query"]:
+            transaction = {
+                **TRANSACTION_NODE,
+                "hash": variables["hash"],
+                **transaction,
+            }
+        return {"data": {"transaction": transaction}}
+
+    graphql_server.respond = respond
+    return graphql_server
+
+
+def tree(calls):
+    return [(i.traceAddress, tree(i.calls)) for i in calls]
+
+
+class TestBuildCallTree:
+    @pytest.mark.parametrize("mode", ["model", "dict", "record"])
+    def test_calls_are_nested_in_order(self, mode):
+        rows = [
+            build(InternalTransaction, internal_transaction_node(i, address), mode)
+            for i, address in reversed(list(enumerate(TRACE_ADDRESSES)))
+        ]
+
+        (root,) = build_call_tree(rows)
+
+        assert root.internalTransaction is rows[-1]
+        assert tree([root]) == [
+            (
+                [],
+                [
+                    ([0], [([0, 0], [([0, 0, 0], [])]), ([0, 1], [])]),
+                    ([1], [([1, 0], [])]),
+                ],
+            )
+        ]
+
+    def test_calls_with_missing_callers_move_up(self):
+        rows = [
+            internal_transaction_node(0, "[0]"),
+            internal_transaction_node(1, "[0, 2, 1]"),
+            internal_transaction_node(2, "[3, 0]"),
+        ]
+
+        assert tree(build_call_tree(rows)) == [
+            ([0], [([0, 2, 1], [])]),
+            ([3, 0], []),
+        ]
+        assert build_call_tree([]) == []
+
+
+class TestGetTransactionWithTrace:
+    def test_transaction_and_first_page_are_fetched_together(self, traces_server):
+        trace = get_transaction_with_trace(
+            "0x1", page_size=3, client=Client(url=traces_server.url)
+        )
+
+        assert [i["variables"]["after"] for i in traces_server.requests] == [
+            None,
+            "3",
+            "6",
+        ]
+        assert "TransactionWithTrace" in traces_server.requests[0]["query"]
+        assert trace.transaction == Transaction(**{**TRANSACTION_NODE, "hash": "0x1"})
+        assert [i.index for i in trace.internalTransactions] == list(range(7))
+        assert trace.calls[0].calls[1].internalTransaction.traceAddress == "[1]"
+
+    def test_rows_are_built_in_mode(self, traces_server):
+        trace = get_transaction_with_trace(
+            "0x1", binary=True, client=Client(url=traces_server.url), mode="dict"
+        )
+
+        assert trace.transaction == {**TRANSACTION_NODE, "hash": "0x1"}
+        assert trace.internalTransactions[0] == internal_transaction_node(0, "[]")
+        assert len(traces_server.requests) == 1
+
+    def test_cached_responses_are_left_intact(self, traces_server):
+        client = Client(url=traces_server.url, cache=MemoryCache())
+
+        first = get_transaction_with_trace("0x1", client=client)
+        second = get_transaction_with_trace("0x1", client=client)
+
+        assert second == first
+        assert len(traces_server.requests) == 1
+
+    def test_page_size_outside_complexity_limit_raises_exception(self):
+        with pytest.raises(QueryComplexityLimit):
+            get_transaction_with_trace("0x1", page_size=MAX_PAGE_SIZE + 1)
+
+
+class TestGetTransactionsWithTrace:
+    def test_traces_are_fetched_concurrently(self, traces_server):
+        traces_server.delay = 0.05
+
+        result = get_transactions_with_trace(
+            ["0x1", "0x2", "0xdead", "0X1", "0x3"],
+            concurrency=3,
+            client=Client(url=traces_server.url),
+        )
+
+        assert [i and i.transaction.hash for i in result.traces] == [
+            "0x1",
+            "0x2",
+            None,
+            "0x1",
+            "0x3",
+        ]
+        assert result.traces[3] is result.traces[0]
+        assert [i.transactionHash for i in result.failures] == ["0xdead"]
+        assert len(traces_server.requests) == 4
+        assert traces_server.max_in_flight == 3
+
+    def test_async_traces_are_fetched_concurrently(self, traces_server):
+        async def run():
+            async with AsyncClient(url=traces_server.url) as client:
+                return await get_transactions_with_trace_async(
+                    ["0x1", "0xdead", "0x2"],
+                    page_size=5,
+                    client=client,
+                    mode="record",
+                )
+
+        result = asyncio.run(run())
+
+        assert [i and i.transaction.hash for i in result.traces] == [
+            "0x1",
+            None,
+            "0x2",
+        ]
+        assert len(result.traces[0].internalTransactions) == 7
+        assert len(result.failures) == 1
+        assert len(traces_server.requests) == 5
@@ -0,0 +1,127 @@
+import pytest
+
+from flare_explorer.gql_client import Client
+from flare_explorer.token_transfers import TokenTransfer
+from flare_explorer.transfer_index import TokenTransferIndex
+from flare_explorer.watch import WatchPosition
+from tests.test_token_transfers import transfers_server  # noqa: F401
+
+TOKEN = "0x" + "c" * 40
+ALICE = "0x" + "a" * 40
+BOB = "0x" + "b" * 40
+CAROL = "0x" + "d" * 40
+
+
+def transfer_node(number, sender=ALICE, recipient=BOB, log_index=0):
+    return {
+        "amount": str(10**30 + number),
+        "blockNumber": number,
+        "fromAddressHash": sender,
+        "id": f"id_{number}_{log_index}",
+        "logIndex": log_index,
+        "toAddressHash": recipient,
+        "tokenContractAddressHash": TOKEN,
+        "tokenId": None,
+        "transactionHash": f"0x{number:064x}",
+    }
+
+
+@pytest.fixture
+def index(tmp_path, transfers_server):  # noqa: F811
+    with TokenTransferIndex(
+        tmp_path / "transfers.db", client=Client(url=transfers_server.url)
+    ) as index:
+        yield index
+
+
+class TestSync:
+    def test_history_is_fetched_page_by_page(self, index, transfers_server):  # noqa: F811
+        transfers_server.transfers = [transfer_node(i) for i in range(5, 0, -1)]
+
+        assert index.sync(TOKEN, page_size=2) == 5
+
+        assert len(index) == 5
+        assert len(transfers_server.requests) == 3
+        assert index.sync_state(TOKEN).model_dump() == {
+            "head": {"id": "id_5_0", "blockNumber": 5},
+            "cursor": "5",
+            "complete": True,
+        }
+
+    def test_interrupted_sync_resumes_from_stored_cursor(
+        self,
+        index,
+        transfers_server,  # noqa: F811
+    ):
+        transfers_server.transfers = [transfer_node(i) for i in range(5, 0, -1)]
+
+        assert index.sync(TOKEN, page_size=2, max_pages=1) == 2
+        assert not index.sync_state(TOKEN).complete
+        assert index.sync(TOKEN, page_size=2) == 3
+
+        assert [i["variables"]["after"] for i in transfers_server.requests] == [
+            None,
+            None,
+            "2",
+            "4",
+        ]
+
+    def test_later_syncs_fetch_only_new_transfers(self, index, transfers_server):  # noqa: F811
+        transfers_server.transfers = [transfer_node(i) for i in range(5, 0, -1)]
+        index.sync(TOKEN)
+        transfers_server.transfers[:0] = [transfer_node(7), transfer_node(6)]
+        transfers_server.requests.clear()
+
+        assert index.sync(TOKEN) == 2
+
+        assert len(transfers_server.requests) == 1
+        assert index.sync_state(TOKEN).head == WatchPosition(id="id_7_0", blockNumber=7)
+        assert index.sync(TOKEN) == 0
+
+    def test_index_persists_across_instances(self, tmp_path, index, transfers_server):  # noqa: F811
+        transfers_server.transfers = [transfer_node(1)]
+        index.sync(TOKEN)
+
+        with TokenTransferIndex(tmp_path / "transfers.db") as reopened:
+            assert len(reopened) == 1
+            assert reopened.sync_state(TOKEN).complete
+
+
+class TestTokenTransfers:
+    @pytest.fixture
+    def synced(self, index, transfers_server):  # noqa: F811
+        transfers_server.transfers = [
+            transfer_node(4, BOB, CAROL, log_index=1),
+            transfer_node(4, CAROL, ALICE),
+            transfer_node(3, ALICE, CAROL),
+            transfer_node(2),
+            transfer_node(1, BOB, ALICE),
+        ]
+        index.sync(TOKEN)
+        return index
+
+    def test_rows_are_rebuilt_exactly(self, synced, transfers_server):  # noqa: F811
+        rows = synced.token_transfers(mode="dict")
+
+        assert rows == transfers_server.transfers
+        assert isinstance(synced.token_transfers(limit=1)[0], TokenTransfer)
+
+    def test_address_matches_sender_or_recipient(self, synced):
+        rows = synced.token_transfers(address_hash="0x" + "D" * 40, mode="record")
+
+        assert [(i.blockNumber, i.logIndex) for i in rows] == [(4, 1), (4, 0), (3, 0)]
+
+    def test_lookups_combine_filters(self, synced):
+        rows = synced.token_transfers(
+            token_contract_address_hash=TOKEN,
+            address_hash=ALICE,
+            from_block=2,
+            to_block=3,
+            mode="record",
+        )
+
+        assert [i.blockNumber for i in rows] == [3, 2]
+        assert synced.token_transfers(from_block=4, limit=1, mode="record")[
+            0
+        ].logIndex == (1)
+        assert synced.token_transfers(token_contract_address_hash="0x" + "0" * 40) == []
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+
+from flare_explorer.gql_client import PageInfo
+from flare_explorer.watch import AsyncWatcher, Watcher, WatchPosition
+
+
+class Feed:
+    """Rows newest first with offset cursors, new rows are added to the front"""
+
+    def __init__(self, count=0):
+        self.rows = []
+        self.calls = []
+        self.count = 0
+        self.add(count)
+
+    def add(self, count):
+        for _ in range(count):
+            self.rows.insert(0, {"id": f"id_{self.count}", "blockNumber": self.count})
+            self.count += 1
+
+    def __call__(self, previous_cursor, page_size):
+        self.calls.append(previous_cursor)
+        start = 0 if previous_cursor is None else int(previous_cursor)
+        end = min(start + page_size, len(self.rows))
+        return self.rows[start:end], PageInfo(
+            endCursor=str(end),
+            hasNextPage=end < len(self.rows),
+            hasPreviousPage=start > 0,
+            startCursor=str(start),
+        )
+
+
+def ids(rows):
+    return [i["id"] for i in rows]
+
+
+class TestWatcher:
+    def test_first_poll_starts_from_newest_row(self):
+        feed = Feed(100)
+        watcher = Watcher({"a": feed}, page_size=10)
+
+        assert watcher.poll() == []
+        assert feed.calls == [None]
+        assert watcher.positions == {"a": WatchPosition(id="id_99", blockNumber=99)}
+
+    def test_only_new_rows_are_fetched_oldest_first(self):
+        feed = Feed(100)
+        watcher = Watcher({"a": feed}, page_size=10)
+        watcher.poll()
+        feed.add(3)
+
+        assert ids(watcher.poll()) == ["id_100", "id_101", "id_102"]
+        assert feed.calls == [None, None]
+        assert watcher.poll() == []
+
+    def test_delta_larger_than_a_page_is_paged(self):
+        feed = Feed(100)
+        watcher = Watcher({"a": feed}, page_size=10)
+        watcher.poll()
+        feed.add(25)
+
+        assert ids(watcher.poll()) == [f"id_{i}" for i in range(100, 125)]
+        assert feed.calls == [None, None, "10", "20"]
+
+    def test_positions_resume_watching(self):
+        feed = Feed(10)
+        watcher = Watcher({"a": feed}, positions={"a": None})
+        watcher.poll()
+        feed.add(2)
+
+        resumed = Watcher({"a": feed}, positions=watcher.positions)
+
+        assert ids(resumed.poll()) == ["id_10", "id_11"]
+
+    def test_paging_stops_at_older_block_if_seen_row_is_gone(self):
+        feed = Feed(100)
+        watcher = Watcher({"a": feed}, page_size=10)
+        watcher.poll()
+        feed.rows.pop(0)
+        feed.add(2)
+
+        assert ids(watcher.poll()) == ["id_100", "id_101"]
+        assert feed.calls == [None, None]
+
+    def test_each_key_keeps_its_own_position(self):
+        first, second = Feed(5), Feed(5)
+        watcher = Watcher({"a": first, "b": second})
+        watcher.poll()
+        second.add(1)
+
+        assert ids(watcher.poll()) == ["id_5"]
+        assert watcher.positions["a"].id == "id_4"
+        assert watcher.positions["b"].id == "id_5"
+
+    def test_interval_backs_off_while_idle(self):
+        feed = Feed(5)
+        watcher = Watcher({"a": feed}, min_interval=1, max_interval=5)
+        intervals = []
+        for _ in range(4):
+            watcher.poll()
+            intervals.append(watcher.interval)
+        feed.add(1)
+        watcher.poll()
+
+        assert intervals == [2, 4, 5, 5]
+        assert watcher.interval == 1
+
+    def test_run_passes_new_rows_to_callback(self):
+        feed = Feed(5)
+        stop = threading.Event()
+        rows = []
+
+        def fetch(previous_cursor, page_size):
+            page = feed(previous_cursor, page_size)
+            feed.add(1)
+            return page
+
+        def callback(row):
+            rows.append(row)
+            if len(rows) == 3:
+                stop.set()
+
+        Watcher({"a": fetch}, min_interval=0.01).run(callback, stop)
+
+        assert ids(rows) == ["id_5", "id_6", "id_7"]
+
+
+class TestAsyncWatcher:
+    def test_new_rows_are_yielded(self):
+        feed = Feed(5)
+
+        async def fetch(previous_cursor, page_size):
+            await asyncio.sleep(0)
+            rows = feed(previous_cursor, page_size)
+            feed.add(1)
+            return rows
+
+        async def run():
+            watcher = AsyncWatcher({"a": fetch}, min_interval=0)
+            return [row async for row in take(watcher, 3)]
+
+        assert ids(asyncio.run(run())) == ["id_5", "id_6", "id_7"]
+
+
+async def take(iterable, count):
+    async for row in iterable:
+        yield row
+        count -= 1
+        if not count:
+            return